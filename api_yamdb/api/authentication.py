@@ -0,0 +1,192 @@
+"""JWT-аутентификация без чтения пользователя из БД на каждый запрос.
+
+Токен несёт в claims роль и флаг суперпользователя: этого хватает
+разрешениям IsAdmin и ReviewCommentPermissions. Пользователь строится
+из claims как экземпляр модели с отложенными полями, поэтому остальные
+поля догружаются из БД только при обращении к ним.
+
+Чтобы смена роли или блокировка действовали сразу, а не после истечения
+токена, claims сверяются с текущими правами пользователя. Права лежат в
+кеше и сбрасываются сигналом при сохранении пользователя. Кеш в памяти
+процесса другие процессы не видят, поэтому в нём права живут несколько
+секунд.
+
+Где нужен весь пользователь (токены без claims, get_full_user), строка
+берётся из LRU-кеша процесса user_cache, если её права совпадают с
+текущими.
+"""
+import threading
+from collections import OrderedDict
+from time import monotonic
+
+from django.contrib.auth import get_user_model
+from django.core.cache.backends.locmem import LocMemCache
+from django.db import router, transaction
+from django.utils.translation import gettext_lazy as _
+from rest_framework_simplejwt.authentication import JWTAuthentication
+from rest_framework_simplejwt.exceptions import AuthenticationFailed
+from rest_framework_simplejwt.settings import api_settings
+from rest_framework_simplejwt.tokens import AccessToken
+
+from .cache import get_cache
+
+User = get_user_model()
+
+CLAIM_FIELDS = ('role', 'is_superuser')
+USER_FIELDS = tuple(field.attname for field in User._meta.concrete_fields)
+ACCESS_KEY = 'user-access:{}'
+ACCESS_TIMEOUT = 300
+# Сброс в LocMemCache виден только своему процессу; остальные увидят
+# новые права не позже, чем через это время.
+LOCAL_ACCESS_TIMEOUT = 5
+USER_CACHE_SIZE = 1024
+# Прочие поля, изменённые в другом процессе, видны через это время.
+USER_CACHE_TTL = 60
+
+
+class UserCache(object):
+    """LRU-кеш строк пользователей в памяти процесса со сроком жизни.
+
+    Хранит значения полей, а не объекты: каждый запрос получает свой
+    экземпляр модели и не видит чужих несохранённых изменений.
+    """
+
+    def __init__(self, maxsize=USER_CACHE_SIZE, ttl=USER_CACHE_TTL):
+        self.maxsize = maxsize
+        self.ttl = ttl
+        self.lock = threading.Lock()
+        self.rows = OrderedDict()
+
+    def get(self, user_id):
+        with self.lock:
+            expires, row = self.rows.get(user_id, (None, None))
+            if row is None:
+                return None
+            if expires < monotonic():
+                del self.rows[user_id]
+                return None
+            self.rows.move_to_end(user_id)
+            return row
+
+    def set(self, user_id, row):
+        with self.lock:
+            self.rows[user_id] = (monotonic() + self.ttl, row)
+            self.rows.move_to_end(user_id)
+            while len(self.rows) > self.maxsize:
+                self.rows.popitem(last=False)
+
+    def discard(self, user_id):
+        with self.lock:
+            self.rows.pop(user_id, None)
+
+    def clear(self):
+        with self.lock:
+            self.rows.clear()
+
+
+user_cache = UserCache()
+
+
+def get_access_token(user):
+    token = AccessToken.for_user(user)
+    for field in CLAIM_FIELDS:
+        token[field] = getattr(user, field)
+    return token
+
+
+def get_access(user_id):
+    """Текущие (role, is_superuser) активного пользователя или ()."""
+    access = get_cache().get(ACCESS_KEY.format(user_id))
+    if access is None:
+        access = User.objects.filter(pk=user_id, is_active=True).values_list(
+            *CLAIM_FIELDS).first() or ()
+        remember_access(user_id, access)
+    return tuple(access)
+
+
+def remember_access(user_id, access):
+    cache = get_cache()
+    timeout = (
+        LOCAL_ACCESS_TIMEOUT if isinstance(cache, LocMemCache)
+        else ACCESS_TIMEOUT
+    )
+    cache.set(ACCESS_KEY.format(user_id), tuple(access), timeout)
+
+
+def row_access(row):
+    if not row['is_active']:
+        return ()
+    return tuple(row[field] for field in CLAIM_FIELDS)
+
+
+def forget_user(user_id):
+    user_cache.discard(user_id)
+
+    # После фиксации ещё раз: иначе параллельный запрос успел бы
+    # положить в кеши старые данные.
+    def forget():
+        user_cache.discard(user_id)
+        get_cache().delete(ACCESS_KEY.format(user_id))
+    transaction.on_commit(forget)
+
+
+def make_user(values):
+    # from_db ждёт значения в порядке полей модели, недостающие поля
+    # становятся отложенными.
+    fields = [field for field in USER_FIELDS if field in values]
+    return User.from_db(
+        router.db_for_read(User), fields,
+        [values[field] for field in fields]
+    )
+
+
+def load_user(user_id):
+    """Пользователь со всеми полями или None, если его нет."""
+    row = user_cache.get(user_id)
+    if row is None or row_access(row) != get_access(user_id):
+        row = User.objects.filter(pk=user_id).values(*USER_FIELDS).first()
+        if row is None:
+            user_cache.discard(user_id)
+            return None
+        user_cache.set(user_id, row)
+        remember_access(user_id, row_access(row))
+    return make_user(row)
+
+
+def get_full_user(user):
+    """Пользователь со всеми полями, если из claims собран не весь."""
+    if not user.get_deferred_fields():
+        return user
+    full_user = load_user(user.pk)
+    if full_user is None:
+        raise AuthenticationFailed(_('User not found'), code='user_not_found')
+    return full_user
+
+
+class StatelessJWTAuthentication(JWTAuthentication):
+    """JWTAuthentication, который берёт пользователя из claims токена.
+
+    Токены без нужных claims, выданные раньше, получают пользователя
+    через load_user.
+    """
+
+    def get_user(self, validated_token):
+        if api_settings.USER_ID_CLAIM not in validated_token:
+            return super().get_user(validated_token)
+        user_id = validated_token[api_settings.USER_ID_CLAIM]
+        if any(field not in validated_token for field in CLAIM_FIELDS):
+            user = load_user(user_id)
+            if user is None:
+                raise AuthenticationFailed(
+                    _('User not found'), code='user_not_found')
+            if not user.is_active:
+                raise AuthenticationFailed(
+                    _('User is inactive'), code='user_inactive')
+            return user
+        claims = {field: validated_token[field] for field in CLAIM_FIELDS}
+        if get_access(user_id) != tuple(claims.values()):
+            raise AuthenticationFailed(
+                'Права пользователя изменились, получите новый токен.',
+                code='token_not_valid',
+            )
+        return make_user({api_settings.USER_ID_FIELD: user_id, **claims})
@@ -0,0 +1,128 @@
+import json
+from functools import partial
+from hashlib import md5
+from time import time_ns
+
+from django.conf import settings
+from django.core.cache import caches
+from django.db import transaction
+
+VERSION_KEY = 'response-cache:version:{}'
+RESPONSE_KEY = 'response-cache:response:{}'
+CACHED_HEADERS = ('Content-Type', 'Vary', 'Allow', 'ETag')
+
+# Версии, которые меняет массовая правка модели. Изменение отзыва
+# меняет и рейтинг произведения, имя пользователя - подпись автора.
+MODEL_RESOURCES = {
+    'reviews.title': ('title', 'title:all'),
+    'reviews.title_genre': ('title', 'title:all'),
+    'reviews.review': ('title', 'title:all', 'review:all'),
+    'reviews.comment': ('comment:all',),
+    'reviews.category': ('category',),
+    'reviews.genre': ('genre',),
+    'users.customuser': ('author',),
+}
+
+
+def get_cache():
+    return caches[settings.RESPONSE_CACHE_ALIAS]
+
+
+def get_versions(resources):
+    """Текущие версии ресурсов.
+
+    Версия - время последнего изменения ресурса в наносекундах. Если
+    версия пропала из кеша, она начинается заново с текущего времени:
+    это больше любой прежней, поэтому старые ответы и ETag не оживают.
+    """
+    cache = get_cache()
+    keys = [VERSION_KEY.format(resource) for resource in resources]
+    versions = cache.get_many(keys)
+    for key in keys:
+        if key not in versions:
+            cache.add(key, time_ns(), timeout=None)
+            versions[key] = cache.get(key)
+    return [versions[key] for key in keys]
+
+
+def bump(*resources):
+    cache = get_cache()
+    keys = [VERSION_KEY.format(resource) for resource in resources]
+    versions = cache.get_many(keys)
+    now = time_ns()
+    cache.set_many(
+        {key: max(versions.get(key, 0) + 1, now) for key in keys},
+        timeout=None
+    )
+
+
+def invalidate(*resources):
+    # Версия меняется после коммита: иначе параллельный запрос успел бы
+    # сохранить старые данные под новой версией.
+    transaction.on_commit(partial(bump, *resources))
+
+
+def invalidate_object(resource, pk):
+    invalidate(resource, f'{resource}:{pk}')
+
+
+def invalidate_model(model):
+    """Сбрасывает все ответы, зависящие от модели, после массовых правок."""
+    resources = MODEL_RESOURCES.get(model._meta.label_lower)
+    if resources is not None:
+        invalidate(*resources)
+
+
+def fingerprint(request, resources, versions):
+    """Хеш адреса, параметров в порядке сортировки, Accept и версий
+    ресурсов, от которых зависит ответ.
+    """
+    query = sorted(
+        (name, value)
+        for name, values in request.GET.lists()
+        for value in values
+    )
+    raw = json.dumps([
+        request.build_absolute_uri(request.path),
+        query,
+        request.META.get('HTTP_ACCEPT', ''),
+        resources,
+        versions,
+    ])
+    return md5(raw.encode()).hexdigest()
+
+
+def get_last_modified(versions):
+    """Last-Modified в секундах или None.
+
+    Last-Modified точен до секунды. Пока секунда последнего изменения не
+    прошла, ресурс может измениться ещё раз с тем же Last-Modified, и
+    If-Modified-Since получил бы 304 со старыми данными. Поэтому такие
+    ответы идут без Last-Modified, только с ETag.
+    """
+    second = max(versions) // 10 ** 9
+    if second >= time_ns() // 10 ** 9:
+        return None
+    return second
+
+
+def get_validators(request, resources):
+    """Сильный ETag и Last-Modified ответа без обращения к БД."""
+    versions = get_versions(resources)
+    etag = f'"{fingerprint(request, resources, versions)}"'
+    return versions, etag, get_last_modified(versions)
+
+
+def response_cache_key(request, resources, versions):
+    return RESPONSE_KEY.format(fingerprint(request, resources, versions))
+
+
+def store_response(key, response):
+    get_cache().set(
+        key,
+        (response.content, [
+            (header, response[header])
+            for header in CACHED_HEADERS if header in response
+        ]),
+        settings.RESPONSE_CACHE_TIMEOUT
+    )
@@ -13,7 +13,11 @@ class TitleFilter(django_filters.FilterSet):
         field_name='genre__slug',
         lookup_expr='iexact'
     )
+    search = django_filters.CharFilter(method='filter_search')
 
     class Meta:
         model = Title
         fields = ('category', 'genre', 'name', 'year')
+
+    def filter_search(self, queryset, name, value):
+        return queryset.search(value)
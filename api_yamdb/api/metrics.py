@@ -0,0 +1,304 @@
+import atexit
+import json
+import os
+import threading
+import uuid
+from bisect import bisect_left
+from pathlib import Path
+from time import monotonic, perf_counter
+
+from django.conf import settings
+
+# Границы корзин в секундах, штуках и байтах, как le у гистограмм
+# Prometheus.
+TIME_BUCKETS = (
+    0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1, 2.5, 5, 10
+)
+QUERY_BUCKETS = (0, 1, 2, 3, 5, 10, 20, 50, 100, 200, 500)
+SIZE_BUCKETS = (100, 500, 1000, 5000, 10000, 50000, 100000, 500000, 1000000)
+
+# Имя метрики: (тип, описание, корзины гистограммы).
+METRICS = {
+    'api_requests_total': (
+        'counter', 'Число ответов по маршруту, методу и статусу.', None),
+    'api_request_duration_seconds': (
+        'histogram', 'Время ответа.', TIME_BUCKETS),
+    'api_response_size_bytes': (
+        'histogram', 'Размер тела ответа.', SIZE_BUCKETS),
+    'api_db_queries': (
+        'histogram', 'Число SQL-запросов на один ответ.', QUERY_BUCKETS),
+    'api_db_duration_seconds': (
+        'histogram', 'Время SQL-запросов на один ответ.', TIME_BUCKETS),
+    'api_serializer_duration_seconds': (
+        'histogram', 'Время сериализации на один ответ.', TIME_BUCKETS),
+    'api_cache_requests_total': (
+        'counter', 'Обращения к кешу ответов: hit или miss.', None),
+    'api_auth_failures_total': (
+        'counter', 'Отказы в аутентификации и доступе.', None),
+    'api_throttled_total': (
+        'counter', 'Запросы, отклонённые ограничением частоты.', None),
+}
+# Метрики одного запроса и гистограммы, в которые они попадают.
+REQUEST_HISTOGRAMS = {
+    'queries': 'api_db_queries',
+    'db_time': 'api_db_duration_seconds',
+    'serializer_time': 'api_serializer_duration_seconds',
+    'latency': 'api_request_duration_seconds',
+}
+AUTH_FAILURE_STATUSES = {401: 'unauthenticated', 403: 'forbidden'}
+UNMATCHED_ROUTE = 'unmatched'
+FLUSH_INTERVAL = 1.0
+
+
+class Histogram:
+    def __init__(self, buckets, counts=None, sum=0, count=0):
+        self.buckets = buckets
+        self.counts = counts or [0] * (len(buckets) + 1)
+        self.sum = sum
+        self.count = count
+
+    def observe(self, value):
+        self.counts[bisect_left(self.buckets, value)] += 1
+        self.sum += value
+        self.count += 1
+
+    def merge(self, other):
+        for index, count in enumerate(other.counts):
+            self.counts[index] += count
+        self.sum += other.sum
+        self.count += other.count
+
+    def cumulative(self):
+        cumulative = 0
+        for bound, count in zip(self.buckets + ('+Inf',), self.counts):
+            cumulative += count
+            yield str(bound), cumulative
+
+    def as_dict(self):
+        return {
+            'buckets': dict(self.cumulative()),
+            'sum': self.sum,
+            'count': self.count,
+        }
+
+
+class RequestMetrics:
+    """Счётчики одного запроса.
+
+    Экземпляр подключается к соединениям через execute_wrapper и
+    учитывает каждый SQL-запрос, поэтому работает и при DEBUG = False.
+    """
+
+    def __init__(self):
+        self.queries = 0
+        self.db_time = 0.0
+        self.serializer_time = 0.0
+        self.latency = 0.0
+
+    def __call__(self, execute, sql, params, many, context):
+        started = perf_counter()
+        try:
+            return execute(sql, params, many, context)
+        finally:
+            self.db_time += perf_counter() - started
+            self.queries += 1
+
+
+class MetricsRegistry:
+    """Счётчики и гистограммы с метками.
+
+    Если задан PROMETHEUS_MULTIPROC_DIR, каждый процесс не чаще раза в
+    FLUSH_INTERVAL секунд записывает свои значения в отдельный файл
+    этого каталога, а collect() складывает файлы всех процессов, в том
+    числе завершившихся, чтобы счётчики не убывали. Каталог нужно
+    очищать при перезапуске сервиса.
+    """
+
+    def __init__(self):
+        self.lock = threading.Lock()
+        self.reset()
+
+    def reset(self):
+        self.counters = {}
+        self.histograms = {}
+        self.pid = os.getpid()
+        self.filename = f'{self.pid}-{uuid.uuid4().hex}.json'
+        self.flushed_at = monotonic()
+
+    @property
+    def directory(self):
+        directory = getattr(settings, 'PROMETHEUS_MULTIPROC_DIR', None)
+        return Path(directory) if directory else None
+
+    @staticmethod
+    def key(name, labels):
+        return name, tuple(sorted(labels.items()))
+
+    def check_fork(self):
+        # После fork ребёнок получает копию значений родителя: их уже
+        # учитывает файл родителя, поэтому ребёнок начинает с нуля.
+        if self.pid != os.getpid():
+            self.reset()
+
+    def inc(self, name, value=1, **labels):
+        with self.lock:
+            self.check_fork()
+            key = self.key(name, labels)
+            self.counters[key] = self.counters.get(key, 0) + value
+        self.maybe_flush()
+
+    def observe(self, name, value, **labels):
+        with self.lock:
+            self.check_fork()
+            self._observe(name, value, labels)
+        self.maybe_flush()
+
+    def _observe(self, name, value, labels):
+        key = self.key(name, labels)
+        histogram = self.histograms.get(key)
+        if histogram is None:
+            histogram = self.histograms[key] = Histogram(METRICS[name][2])
+        histogram.observe(value)
+
+    def observe_request(self, route, method, status, size, request_metrics):
+        labels = {'route': route, 'method': method}
+        with self.lock:
+            self.check_fork()
+            key = self.key(
+                'api_requests_total', dict(labels, status=str(status)))
+            self.counters[key] = self.counters.get(key, 0) + 1
+            if status in AUTH_FAILURE_STATUSES:
+                key = self.key('api_auth_failures_total', {
+                    'reason': AUTH_FAILURE_STATUSES[status]})
+                self.counters[key] = self.counters.get(key, 0) + 1
+            if size is not None:
+                self._observe('api_response_size_bytes', size, labels)
+            for attr, name in REQUEST_HISTOGRAMS.items():
+                self._observe(name, getattr(request_metrics, attr), labels)
+        self.maybe_flush()
+
+    def dump(self):
+        return {
+            'counters': [
+                [name, labels, value]
+                for (name, labels), value in self.counters.items()
+            ],
+            'histograms': [
+                [name, labels, histogram.counts, histogram.sum,
+                 histogram.count]
+                for (name, labels), histogram in self.histograms.items()
+            ],
+        }
+
+    def maybe_flush(self):
+        if monotonic() - self.flushed_at >= FLUSH_INTERVAL:
+            self.flush()
+
+    def flush(self):
+        directory = self.directory
+        if directory is None:
+            return
+        with self.lock:
+            self.check_fork()
+            data = json.dumps(self.dump())
+            self.flushed_at = monotonic()
+        path = directory / self.filename
+        temp_path = path.with_suffix('.tmp')
+        temp_path.write_text(data)
+        os.replace(temp_path, path)
+
+    def collect(self):
+        """Возвращает сложенные по всем процессам счётчики и гистограммы."""
+        directory = self.directory
+        if directory is None:
+            with self.lock:
+                dumps = [self.dump()]
+        else:
+            self.flush()
+            dumps = []
+            for path in directory.glob('*.json'):
+                try:
+                    dumps.append(json.loads(path.read_text()))
+                except (OSError, ValueError):
+                    continue
+        counters, histograms = {}, {}
+        for data in dumps:
+            for name, labels, value in data['counters']:
+                key = name, tuple(map(tuple, labels))
+                counters[key] = counters.get(key, 0) + value
+            for name, labels, counts, total, count in data['histograms']:
+                key = name, tuple(map(tuple, labels))
+                histogram = Histogram(METRICS[name][2], counts, total, count)
+                if key in histograms:
+                    histograms[key].merge(histogram)
+                else:
+                    histograms[key] = histogram
+        return counters, histograms
+
+    def snapshot(self):
+        """Гистограммы метрик запроса по маршрутам, сложенные по методам."""
+        _, histograms = self.collect()
+        routes = {}
+        metrics = {name: attr for attr, name in REQUEST_HISTOGRAMS.items()}
+        for (name, labels), histogram in sorted(histograms.items()):
+            if name not in metrics:
+                continue
+            route = routes.setdefault(dict(labels)['route'], {})
+            attr = metrics[name]
+            if attr in route:
+                route[attr].merge(histogram)
+            else:
+                route[attr] = Histogram(
+                    histogram.buckets, list(histogram.counts),
+                    histogram.sum, histogram.count)
+        return {
+            route: {
+                attr: histogram.as_dict()
+                for attr, histogram in sorted(route_histograms.items())
+            }
+            for route, route_histograms in routes.items()
+        }
+
+    def clear(self):
+        with self.lock:
+            self.counters.clear()
+            self.histograms.clear()
+
+
+def escape_label(value):
+    return (str(value).replace('\\', r'\\').replace('"', r'\"')
+            .replace('\n', r'\n'))
+
+
+def format_labels(labels):
+    if not labels:
+        return ''
+    return '{%s}' % ','.join(
+        f'{name}="{escape_label(value)}"' for name, value in labels)
+
+
+def render_prometheus(counters, histograms):
+    """Текстовый формат экспозиции Prometheus 0.0.4."""
+    lines = []
+    for name, (kind, description, _) in METRICS.items():
+        lines.append(f'# HELP {name} {description}')
+        lines.append(f'# TYPE {name} {kind}')
+        if kind == 'counter':
+            for (key_name, labels), value in sorted(counters.items()):
+                if key_name == name:
+                    lines.append(f'{name}{format_labels(labels)} {value}')
+            continue
+        for (key_name, labels), histogram in sorted(histograms.items()):
+            if key_name != name:
+                continue
+            for bound, count in histogram.cumulative():
+                bucket_labels = format_labels(labels + (('le', bound),))
+                lines.append(f'{name}_bucket{bucket_labels} {count}')
+            lines.append(f'{name}_sum{format_labels(labels)} {histogram.sum}')
+            lines.append(
+                f'{name}_count{format_labels(labels)} {histogram.count}')
+    return '\n'.join(lines) + '\n'
+
+
+registry = MetricsRegistry()
+atexit.register(registry.flush)
@@ -0,0 +1,48 @@
+from contextlib import ExitStack
+from time import perf_counter
+
+from django.db import connections
+
+from .metrics import UNMATCHED_ROUTE, RequestMetrics, registry
+
+METRICS_REQUEST_HEADER = 'HTTP_X_REQUEST_METRICS'
+
+
+class RequestMetricsMiddleware:
+    """Считает SQL-запросы, время БД, сериализации и ответа по маршрутам.
+
+    Итоги вместе со статусом и размером ответа попадают в реестр
+    metrics.registry. Если в запросе есть заголовок X-Request-Metrics,
+    те же значения возвращаются в заголовках X-Query-Count и
+    Server-Timing.
+    """
+
+    def __init__(self, get_response):
+        self.get_response = get_response
+
+    def __call__(self, request):
+        metrics = request.metrics = RequestMetrics()
+        started = perf_counter()
+        with ExitStack() as stack:
+            for connection in connections.all():
+                stack.enter_context(connection.execute_wrapper(metrics))
+            response = self.get_response(request)
+        metrics.latency = perf_counter() - started
+
+        match = request.resolver_match
+        route = match.url_name if match and match.url_name else UNMATCHED_ROUTE
+        size = None if response.streaming else len(response.content)
+        registry.observe_request(
+            route, request.method, response.status_code, size, metrics)
+
+        if METRICS_REQUEST_HEADER in request.META:
+            response['X-Query-Count'] = metrics.queries
+            response['Server-Timing'] = ', '.join(
+                f'{name};dur={value * 1000:.2f}'
+                for name, value in (
+                    ('db', metrics.db_time),
+                    ('serializer', metrics.serializer_time),
+                    ('total', metrics.latency),
+                )
+            )
+        return response
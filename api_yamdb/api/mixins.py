@@ -1,14 +1,220 @@
 import re
+from functools import partial
+from time import perf_counter
 
+from django.http import HttpResponse
+from django.utils.cache import get_conditional_response
+from django.utils.http import http_date
 from rest_framework import mixins, viewsets, serializers
 from rest_framework.permissions import IsAuthenticatedOrReadOnly
-from rest_framework.pagination import PageNumberPagination
 from rest_framework.filters import SearchFilter
 
+from .cache import (
+    get_cache,
+    get_last_modified,
+    get_validators,
+    get_versions,
+    response_cache_key,
+    store_response
+)
+from .metrics import registry
+from .pagination import ApiPageNumberPagination, PubDateCursorPagination
 from .permissions import IsAdminUserOrReadOnly
 
 
+class SerializerTimingMixin(object):
+    """Добавляет время to_representation в метрики запроса."""
+
+    def get_serializer(self, *args, **kwargs):
+        serializer = super().get_serializer(*args, **kwargs)
+        metrics = getattr(self.request, 'metrics', None)
+        if metrics is None:
+            return serializer
+        to_representation = serializer.to_representation
+
+        def timed_to_representation(instance):
+            started = perf_counter()
+            try:
+                return to_representation(instance)
+            finally:
+                metrics.serializer_time += perf_counter() - started
+
+        serializer.to_representation = timed_to_representation
+        return serializer
+
+
+class VersionedResourcesMixin(object):
+    """Версии ресурсов, от которых зависят ответы представления.
+
+    Сигналы из api.signals меняют версии при записи, поэтому по ним
+    можно проверить, изменился ли ответ, не обращаясь к БД.
+    """
+    cache_resource = None
+    cache_dependencies = ()
+
+    def get_cache_resources(self):
+        lookup = self.kwargs.get(self.lookup_url_kwarg or self.lookup_field)
+        if lookup is None:
+            return [self.cache_resource, *self.cache_dependencies]
+        return [
+            f'{self.cache_resource}:{lookup}',
+            f'{self.cache_resource}:all',
+            *self.cache_dependencies
+        ]
+
+
+def set_validators(response, etag, last_modified):
+    if etag is not None:
+        response['ETag'] = etag
+    if last_modified is not None:
+        response['Last-Modified'] = http_date(last_modified)
+
+
+class ConditionalGetMixin(VersionedResourcesMixin):
+    """Отвечает 304 на If-None-Match и If-Modified-Since.
+
+    ETag и Last-Modified строятся из версий ресурсов, так что
+    неизменившийся ответ не читается из БД и не сериализуется.
+    """
+
+    def conditional_response(self, handler, request, *args, **kwargs):
+        _, etag, last_modified = get_validators(
+            request, self.get_cache_resources())
+        response = get_conditional_response(
+            request, etag=etag, last_modified=last_modified)
+        if response is None:
+            response = handler(request, *args, **kwargs)
+        if response.status_code in (200, 304):
+            set_validators(response, etag, last_modified)
+        return response
+
+    def initial(self, request, *args, **kwargs):
+        # Проверка идёт после аутентификации и прав, но до обработчика:
+        # обработчик GET заменяется обёрткой только для list и retrieve.
+        super().initial(request, *args, **kwargs)
+        if request.method == 'GET' and self.action in ('list', 'retrieve'):
+            self.get = partial(self.conditional_response, self.get)
+
+
+class ResponseCacheMixin(VersionedResourcesMixin):
+    """Кеширует ответы на анонимные GET-запросы.
+
+    Ключ ответа включает версии ресурсов из get_cache_resources(),
+    поэтому изменённые данные не отдаются из кеша, и ждать истечения
+    срока хранения не нужно.
+    """
+
+    def dispatch(self, request, *args, **kwargs):
+        if request.method != 'GET' or 'HTTP_AUTHORIZATION' in request.META:
+            return super().dispatch(request, *args, **kwargs)
+        self.kwargs = kwargs
+        resources = self.get_cache_resources()
+        versions = get_versions(resources)
+        key = response_cache_key(request, resources, versions)
+        cached = get_cache().get(key)
+        registry.inc(
+            'api_cache_requests_total',
+            resource=self.cache_resource,
+            result='miss' if cached is None else 'hit'
+        )
+        if cached is not None:
+            content, headers = cached
+            response = HttpResponse(content)
+            for header, value in headers:
+                response[header] = value
+            # Last-Modified зависит от текущего времени, поэтому в кеше
+            # не хранится.
+            last_modified = get_last_modified(versions)
+            response = get_conditional_response(
+                request,
+                etag=response.get('ETag'),
+                last_modified=last_modified,
+                response=response
+            )
+            set_validators(response, response.get('ETag'), last_modified)
+            return response
+        response = super().dispatch(request, *args, **kwargs)
+        if response.status_code == 200:
+            response.add_post_render_callback(partial(store_response, key))
+        return response
+
+
+class SparseFieldsetMixin(object):
+    """Параметры ?fields= и ?omit= для GET-запросов.
+
+    Вывод сокращается до запрошенных полей, а запрос к БД читает только
+    нужные колонки через only() и не подтягивает связи, которые не
+    попадут в ответ. Работает с сериализаторами FastReadSerializer.
+    """
+    # Поля модели для only() по имени поля сериализатора; по умолчанию
+    # поле модели называется так же.
+    sparse_field_columns = {}
+    # Колонки, которые нужны всегда, например для пагинации.
+    sparse_required_columns = ('id',)
+    # Связи из select_related и prefetch_related по имени поля.
+    sparse_select_related = {}
+    sparse_prefetch_related = {}
+
+    def get_sparse_fields(self):
+        if hasattr(self, '_sparse_fields'):
+            return self._sparse_fields
+        self._sparse_fields = None
+        params = self.request.query_params
+        serializer_class = self.get_serializer_class()
+        if (self.request.method != 'GET'
+                or not hasattr(serializer_class, 'get_field_names')
+                or not ('fields' in params or 'omit' in params)):
+            return None
+        available = serializer_class.get_field_names()
+        requested, omitted = (
+            {name.strip() for name in params.get(param, '').split(',')
+             if name.strip()}
+            for param in ('fields', 'omit')
+        )
+        unknown = (requested | omitted) - set(available)
+        if unknown:
+            raise serializers.ValidationError({
+                'fields': 'Неизвестные поля: '
+                          f'{", ".join(sorted(unknown))}. '
+                          f'Доступны: {", ".join(available)}.'
+            })
+        self._sparse_fields = tuple(
+            name for name in available
+            if (not requested or name in requested) and name not in omitted
+        )
+        return self._sparse_fields
+
+    def filter_queryset(self, queryset):
+        queryset = super().filter_queryset(queryset)
+        fields = self.get_sparse_fields()
+        if fields is None:
+            return queryset
+        columns = list(self.sparse_required_columns)
+        for name in fields:
+            columns.extend(self.sparse_field_columns.get(name, (name,)))
+        if self.sparse_select_related:
+            queryset = queryset.select_related(None).select_related(*(
+                relation
+                for name, relation in self.sparse_select_related.items()
+                if name in fields
+            ))
+        if self.sparse_prefetch_related:
+            queryset = queryset.prefetch_related(None).prefetch_related(*(
+                relation
+                for name, relation in self.sparse_prefetch_related.items()
+                if name in fields
+            ))
+        return queryset.only(*columns)
+
+    def get_serializer(self, *args, **kwargs):
+        fields = self.get_sparse_fields()
+        if fields is not None:
+            kwargs['fields'] = fields
+        return super().get_serializer(*args, **kwargs)
+
+
 class ListCreateDestroyViewSet(
+    SerializerTimingMixin,
     mixins.ListModelMixin,
     mixins.CreateModelMixin,
     mixins.DestroyModelMixin,
@@ -19,12 +225,29 @@ class ListCreateDestroyViewSet(
 
 class NameViewSetMixin(ListCreateDestroyViewSet):
     permission_classes = [IsAuthenticatedOrReadOnly, IsAdminUserOrReadOnly]
-    pagination_class = PageNumberPagination
+    pagination_class = ApiPageNumberPagination
     filter_backends = (SearchFilter,)
     lookup_field = 'slug'
     search_fields = ('name',)
 
 
+class CursorPaginationMixin(object):
+    """Включает keyset-пагинацию по ?pagination=cursor или ?cursor=."""
+    cursor_pagination_class = PubDateCursorPagination
+
+    @property
+    def paginator(self):
+        if not hasattr(self, '_paginator'):
+            params = self.request.query_params
+            if (params.get('pagination') == 'cursor'
+                    or self.cursor_pagination_class.cursor_query_param
+                    in params):
+                self._paginator = self.cursor_pagination_class()
+            else:
+                return super().paginator
+        return self._paginator
+
+
 class ValidateUsernameMixin(object):
     def validate_username(self, value):
         pattern = re.compile(r'^[\w.@+-]+\Z')
@@ -0,0 +1,167 @@
+from collections import OrderedDict
+
+from django.conf import settings
+from django.db.models import Q
+from django.utils.dateparse import parse_datetime
+from rest_framework.exceptions import NotFound
+from rest_framework.pagination import (
+    CursorPagination,
+    PageNumberPagination,
+    remove_query_param,
+    replace_query_param
+)
+from rest_framework.response import Response
+
+
+class ApiPageNumberPagination(PageNumberPagination):
+    """Постраничный вывод с ?page_size= и режимом без COUNT(*).
+
+    Размер страницы клиент выбирает сам, но не больше MAX_PAGE_SIZE.
+    С ?count=false общее число записей не считается: выбирается
+    page_size + 1 строк, и лишняя строка говорит о наличии следующей
+    страницы, а в ответе count равен null.
+    """
+    page_size_query_param = 'page_size'
+    max_page_size = settings.MAX_PAGE_SIZE
+    count_query_param = 'count'
+    count_off_values = ('false', '0')
+
+    def paginate_queryset(self, queryset, request, view=None):
+        self.count_free = (
+            request.query_params.get(self.count_query_param)
+            in self.count_off_values
+        )
+        if not self.count_free:
+            return super().paginate_queryset(queryset, request, view)
+
+        page_size = self.get_page_size(request)
+        if not page_size:
+            return None
+        try:
+            self.page_number = int(
+                request.query_params.get(self.page_query_param, 1))
+        except ValueError:
+            self.page_number = 0
+        if self.page_number < 1:
+            raise NotFound(self.invalid_page_message)
+
+        offset = (self.page_number - 1) * page_size
+        results = list(queryset[offset:offset + page_size + 1])
+        if not results and self.page_number > 1:
+            raise NotFound(self.invalid_page_message)
+        self.has_next = len(results) > page_size
+        self.request = request
+        return results[:page_size]
+
+    def get_paginated_response(self, data):
+        if not self.count_free:
+            return super().get_paginated_response(data)
+        return Response(OrderedDict([
+            ('count', None),
+            ('next', self.get_next_link()),
+            ('previous', self.get_previous_link()),
+            ('results', data)
+        ]))
+
+    def get_next_link(self):
+        if not self.count_free:
+            return super().get_next_link()
+        if not self.has_next:
+            return None
+        return replace_query_param(
+            self.request.build_absolute_uri(), self.page_query_param,
+            self.page_number + 1
+        )
+
+    def get_previous_link(self):
+        if not self.count_free:
+            return super().get_previous_link()
+        if self.page_number == 1:
+            return None
+        url = self.request.build_absolute_uri()
+        if self.page_number == 2:
+            return remove_query_param(url, self.page_query_param)
+        return replace_query_param(
+            url, self.page_query_param, self.page_number - 1)
+
+
+class PubDateCursorPagination(CursorPagination):
+    """Keyset-пагинация по паре (pub_date, id).
+
+    Позиция курсора содержит обе колонки, поэтому она уникальна:
+    страница выбирается условием по индексу без OFFSET и COUNT(*),
+    а новые записи не сдвигают уже выданные страницы.
+    """
+    ordering = ('-pub_date', '-id')
+    page_size_query_param = 'page_size'
+    max_page_size = settings.MAX_PAGE_SIZE
+
+    def paginate_queryset(self, queryset, request, view=None):
+        self.page_size = self.get_page_size(request)
+        if not self.page_size:
+            return None
+
+        self.base_url = request.build_absolute_uri()
+        self.cursor = self.decode_cursor(request)
+        if self.cursor is None:
+            reverse, current_position = False, None
+        else:
+            _, reverse, current_position = self.cursor
+
+        if reverse:
+            queryset = queryset.order_by('pub_date', 'id')
+        else:
+            queryset = queryset.order_by(*self.ordering)
+
+        if current_position is not None:
+            pub_date, pk = self._parse_position(current_position)
+            lookup = 'gt' if reverse else 'lt'
+            queryset = queryset.filter(
+                Q(**{f'pub_date__{lookup}': pub_date})
+                | Q(pub_date=pub_date, **{f'id__{lookup}': pk})
+            )
+
+        results = list(queryset[:self.page_size + 1])
+        self.page = results[:self.page_size]
+        if reverse:
+            self.page = list(reversed(self.page))
+
+        following_position = None
+        if len(results) > self.page_size:
+            following_position = self._get_position_from_instance(
+                results[-1], self.ordering)
+        self._set_positions(reverse, current_position, following_position)
+
+        if (self.has_previous or self.has_next) and self.template is not None:
+            self.display_page_controls = True
+
+        return self.page
+
+    def _set_positions(self, reverse, current_position, following_position):
+        # Курсор назад выбирает строки в обратном порядке, поэтому
+        # следующая за страницей позиция становится ссылкой previous.
+        forward_position, backward_position = (
+            following_position, current_position
+        )
+        if reverse:
+            forward_position, backward_position = (
+                backward_position, forward_position
+            )
+        self.has_next = forward_position is not None
+        self.has_previous = backward_position is not None
+        self.next_position = forward_position
+        self.previous_position = backward_position
+
+    def _get_position_from_instance(self, instance, ordering):
+        return f'{instance.pub_date.isoformat()}|{instance.pk}'
+
+    def _parse_position(self, position):
+        pub_date, _, pk = position.rpartition('|')
+        try:
+            pub_date = parse_datetime(pub_date)
+            pk = int(pk)
+        except ValueError:
+            pub_date = None
+        if pub_date is None:
+            raise NotFound(self.invalid_cursor_message)
+        return pub_date, pk
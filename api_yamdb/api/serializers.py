@@ -1,5 +1,11 @@
+from functools import partial
+from inspect import isfunction
+from operator import attrgetter
+
+from django.db import models
 from rest_framework import serializers
 from rest_framework.exceptions import ValidationError
+from rest_framework.fields import SkipField
 from rest_framework_simplejwt.serializers import TokenObtainPairSerializer
 from django.contrib.auth import get_user_model
 
@@ -104,6 +110,111 @@ class CommentSerializer(serializers.ModelSerializer):
         )
 
 
+def represent(plan, instance):
+    row = {}
+    for name, get_value, convert in plan:
+        try:
+            value = get_value(instance)
+        except SkipField:
+            continue
+        row[name] = None if value is None else convert(value)
+    return row
+
+
+def represent_many(child, value):
+    if isinstance(value, models.Manager):
+        value = value.all()
+    return [child(item) for item in value]
+
+
+def compile_plan(serializer):
+    """Разбирает поля сериализатора в кортеж (имя, геттер, преобразование).
+
+    Простые поля читаются attrgetter, вложенные сериализаторы
+    разбираются рекурсивно. Остальное делают методы самих полей,
+    поэтому результат совпадает с serializer.data.
+    """
+    model = getattr(getattr(serializer, 'Meta', None), 'model', None)
+    plan = []
+    for field in serializer._readable_fields:
+        attrs = field.source_attrs
+        if (len(attrs) == 1
+                and not isfunction(getattr(model, attrs[0], None))):
+            get_value = attrgetter(attrs[0])
+        else:
+            get_value = field.get_attribute
+        plan.append((field.field_name, get_value, compile_field(field)))
+    return tuple(plan)
+
+
+def compile_field(field):
+    if isinstance(field, serializers.ListSerializer):
+        child = field.child
+        if isinstance(child, serializers.Serializer):
+            child = partial(represent, compile_plan(child))
+        else:
+            child = child.to_representation
+        return partial(represent_many, child)
+    if isinstance(field, serializers.Serializer):
+        return partial(represent, compile_plan(field))
+    if type(field) is serializers.IntegerField:
+        return int
+    if type(field) is serializers.CharField:
+        return str
+    return field.to_representation
+
+
+class FastReadSerializer(serializers.BaseSerializer):
+    """Сериализатор только для чтения с тем же выводом, что serializer_class.
+
+    Поля serializer_class разбираются один раз на класс, и объекты
+    сериализуются по готовому плану без создания и привязки полей.
+    Для записи и проверки данных остаются обычные сериализаторы. Поля,
+    которым нужен context (например, гиперссылки), не поддерживаются.
+
+    Аргумент fields оставляет в выводе только перечисленные поля.
+    """
+    serializer_class = None
+
+    def __init__(self, *args, fields=None, **kwargs):
+        super().__init__(*args, **kwargs)
+        self.plan = self.get_plan(fields)
+
+    @classmethod
+    def get_plan(cls, fields=None):
+        plans = cls.__dict__.get('plans')
+        if plans is None:
+            plans = cls.plans = {
+                None: compile_plan(cls.serializer_class())
+            }
+        key = None if fields is None else tuple(fields)
+        plan = plans.get(key)
+        if plan is None:
+            plan = plans[key] = tuple(
+                entry for entry in plans[None] if entry[0] in fields
+            )
+        return plan
+
+    @classmethod
+    def get_field_names(cls):
+        return [name for name, *_ in cls.get_plan()]
+
+    def to_representation(self, instance):
+        return represent(self.plan, instance)
+
+
+class TitleReadSerializer(FastReadSerializer):
+    serializer_class = TitleSerializerGet
+
+
+class ReviewReadSerializer(FastReadSerializer):
+    serializer_class = ReviewSerializer
+
+
+class CommentReadSerializer(FastReadSerializer):
+    serializer_class = CommentSerializer
+
+
 class SignupSerializer(
     ValidateUsernameMixin,
     serializers.ModelSerializer
@@ -119,6 +230,20 @@ class SignupSerializer(
         model = User
 
 
+class SignupFormatSerializer(SignupSerializer):
+    """SignupSerializer без проверок уникальности, которые делают запросы.
+
+    Занятость username и email проверяет сам
+    CustomUser.set_confirmation_code.
+    """
+
+    class Meta(SignupSerializer.Meta):
+        extra_kwargs = {
+            'username': {'validators': []},
+            'email': {'validators': []},
+        }
+
+
 class AuthSerializer(serializers.ModelSerializer):
     username = serializers.CharField(max_length=150)
     confirmation_code = serializers.CharField(max_length=27)
@@ -134,6 +259,7 @@ class CustomTokenObtainPairSerializer(TokenObtainPairSerializer):
         token = super().get_token(user)
 
         token['role'] = user.role
+        token['is_superuser'] = user.is_superuser
 
         return token
 
@@ -150,3 +276,7 @@ class UserSerializer(ValidateUsernameMixin, serializers.ModelSerializer):
             'role'
         )
         model = User
+
+
+class UserReadSerializer(FastReadSerializer):
+    serializer_class = UserSerializer
@@ -0,0 +1,75 @@
+from django.contrib.auth import get_user_model
+from django.db.models.signals import (
+    m2m_changed,
+    post_delete,
+    post_save,
+    pre_save
+)
+from django.dispatch import receiver
+
+from reviews.models import Category, Comment, Genre, Review, Title
+from .authentication import forget_user
+from .cache import invalidate, invalidate_model, invalidate_object
+
+
+@receiver([post_save, post_delete], sender=Title)
+def title_changed(sender, instance, **kwargs):
+    invalidate_object('title', instance.pk)
+
+
+@receiver(m2m_changed, sender=Title.genre.through)
+def title_genres_changed(sender, instance, action, reverse, pk_set,
+                         **kwargs):
+    if not action.startswith('post_'):
+        return
+    if not reverse:
+        invalidate_object('title', instance.pk)
+    elif pk_set is None:
+        invalidate_model(Title)
+    else:
+        for pk in pk_set:
+            invalidate_object('title', pk)
+
+
+@receiver([post_save, post_delete], sender=Category)
+def category_changed(sender, instance, **kwargs):
+    invalidate('category')
+
+
+@receiver([post_save, post_delete], sender=Genre)
+def genre_changed(sender, instance, **kwargs):
+    invalidate('genre')
+
+
+@receiver([post_save, post_delete], sender=Review)
+def review_changed(sender, instance, **kwargs):
+    # Отзыв мог переехать к другому произведению: сбрасываем оба.
+    invalidate(f'review:{instance.pk}')
+    title_ids = {instance.title_id}
+    if hasattr(instance, '_loaded_score'):
+        title_ids.add(instance._loaded_score[0])
+    for title_id in title_ids:
+        invalidate_object('title', title_id)
+        invalidate(f'title:{title_id}:reviews')
+
+
+@receiver([post_save, post_delete], sender=Comment)
+def comment_changed(sender, instance, **kwargs):
+    invalidate(f'review:{instance.review_id}:comments')
+
+
+@receiver(pre_save, sender=get_user_model())
+def user_renamed(sender, instance, **kwargs):
+    # В отзывах и комментариях автор показан по имени пользователя.
+    if instance._state.adding:
+        return
+    username = sender.objects.filter(pk=instance.pk).values_list(
+        'username', flat=True).first()
+    if username is not None and username != instance.username:
+        invalidate('author')
+
+
+@receiver([post_save, post_delete], sender=get_user_model())
+def user_access_changed(sender, instance, **kwargs):
+    # Строка пользователя и его права берутся из кешей при запросах с JWT.
+    forget_user(instance.pk)
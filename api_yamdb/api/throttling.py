@@ -0,0 +1,176 @@
+"""Token bucket для эндпоинтов регистрации и получения токена.
+
+Состояние корзин лежит в отдельном файле SQLite, общем для всех
+процессов сервера на машине, поэтому лимит не умножается на число
+процессов и не требует Redis. Одна проверка - один UPSERT ... RETURNING
+по первичному ключу, без обращений к основной БД. SQLite старше 3.35 не
+знает RETURNING, там корзина читается и пишется в транзакции
+BEGIN IMMEDIATE.
+"""
+import os
+import sqlite3
+import threading
+import time
+
+from django.conf import settings
+from rest_framework.settings import api_settings
+from rest_framework.throttling import BaseThrottle, SimpleRateThrottle
+
+from .metrics import registry
+
+# Сколько токенов в корзине сейчас: накопленные с прошлого раза, но не
+# больше ёмкости. Параметры: :capacity, :rate (токенов в секунду), :now.
+REFILLED = 'min(:capacity, tokens + (:now - updated) * :rate)'
+TAKE_SQL = f"""
+    INSERT INTO buckets (key, tokens, updated, full_at)
+    VALUES (:key, :capacity - 1, :now, :now + 1 / :rate)
+    ON CONFLICT (key) DO UPDATE SET
+        tokens = {REFILLED} - 1,
+        updated = :now,
+        full_at = :now + (:capacity - {REFILLED} + 1) / :rate
+    WHERE {REFILLED} >= 1
+    RETURNING tokens
+"""
+UPSERT_VERSION = (3, 35, 0)
+# Для SQLite без RETURNING: :tokens уже посчитаны по строке из SELECT.
+REPLACE_SQL = """
+    INSERT OR REPLACE INTO buckets (key, tokens, updated, full_at)
+    VALUES (:key, :tokens, :now, :now + (:capacity - :tokens) / :rate)
+"""
+CREATE_SQL = """
+    CREATE TABLE IF NOT EXISTS buckets (
+        key TEXT PRIMARY KEY,
+        tokens REAL NOT NULL,
+        updated REAL NOT NULL,
+        full_at REAL NOT NULL
+    ) WITHOUT ROWID
+"""
+# Раз в столько проверок процесс удаляет полные корзины: их строки
+# ничем не отличаются от отсутствующих.
+PURGE_EVERY = 1000
+
+
+class BucketStore(object):
+    """Корзины в файле SQLite; у каждого потока своё соединение."""
+
+    def __init__(self, path):
+        self.path = str(path)
+        self.local = threading.local()
+        self.calls = 0
+
+    @property
+    def connection(self):
+        connection = getattr(self.local, 'connection', None)
+        if connection is None or self.local.pid != os.getpid():
+            connection = sqlite3.connect(
+                self.path, timeout=1, isolation_level=None)
+            # Потеря состояния при сбое питания только обнулит лимиты.
+            connection.execute('PRAGMA journal_mode=WAL')
+            connection.execute('PRAGMA synchronous=OFF')
+            connection.execute(CREATE_SQL)
+            self.local.connection = connection
+            self.local.pid = os.getpid()
+        return connection
+
+    def take(self, key, capacity, rate):
+        """Берёт токен; возвращает 0 или сколько секунд ждать следующего."""
+        now = time.time()
+        params = {'key': key, 'capacity': capacity, 'rate': rate, 'now': now}
+        connection = self.connection
+        self.calls += 1
+        if self.calls % PURGE_EVERY == 0:
+            connection.execute(
+                'DELETE FROM buckets WHERE full_at < ?', (now,))
+        if sqlite3.sqlite_version_info < UPSERT_VERSION:
+            tokens = self.take_locked(connection, params)
+        elif connection.execute(TAKE_SQL, params).fetchone() is not None:
+            return 0
+        else:
+            tokens = self.refilled(connection, params)
+        if tokens >= 1:
+            return 0
+        return (1 - tokens) / rate
+
+    def refilled(self, connection, params):
+        row = connection.execute(
+            f'SELECT {REFILLED} FROM buckets WHERE key = :key', params
+        ).fetchone()
+        return params['capacity'] if row is None else row[0]
+
+    def take_locked(self, connection, params):
+        """Берёт токен без RETURNING; возвращает, сколько их было."""
+        # IMMEDIATE сразу берёт блокировку записи: два процесса не
+        # возьмут последний токен одновременно.
+        connection.execute('BEGIN IMMEDIATE')
+        try:
+            tokens = self.refilled(connection, params)
+            if tokens >= 1:
+                connection.execute(
+                    REPLACE_SQL, {**params, 'tokens': tokens - 1})
+        except BaseException:
+            connection.execute('ROLLBACK')
+            raise
+        connection.execute('COMMIT')
+        return tokens
+
+    def clear(self):
+        self.connection.execute('DELETE FROM buckets')
+
+
+stores = {}
+stores_lock = threading.Lock()
+
+
+def get_store():
+    path = settings.THROTTLE_STORE_PATH
+    with stores_lock:
+        if path not in stores:
+            stores[path] = BucketStore(path)
+        return stores[path]
+
+
+class TokenBucketThrottle(BaseThrottle):
+    """Ограничение вида "N/период": корзина на N запросов подряд,
+    которая пополняется равномерно за период.
+
+    Частоты берутся из DEFAULT_THROTTLE_RATES по scope, как у
+    SimpleRateThrottle.
+    """
+    scope = None
+    parse_rate = SimpleRateThrottle.parse_rate
+
+    def get_key(self, request):
+        raise NotImplementedError
+
+    def allow_request(self, request, view):
+        self.wait_time = 0
+        rate = api_settings.DEFAULT_THROTTLE_RATES.get(self.scope)
+        key = self.get_key(request)
+        if rate is None or key is None:
+            return True
+        capacity, duration = self.parse_rate(rate)
+        self.wait_time = get_store().take(
+            f'{self.scope}:{key}', capacity, capacity / duration)
+        if self.wait_time:
+            registry.inc('api_throttled_total', scope=self.scope)
+        return not self.wait_time
+
+    def wait(self):
+        return self.wait_time
+
+
+class AuthIPThrottle(TokenBucketThrottle):
+    scope = 'auth_ip'
+
+    def get_key(self, request):
+        return self.get_ident(request)
+
+
+class AuthUsernameThrottle(TokenBucketThrottle):
+    scope = 'auth_username'
+
+    def get_key(self, request):
+        username = request.data.get('username')
+        if not isinstance(username, str) or not username:
+            return None
+        return username[:150]
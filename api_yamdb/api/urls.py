@@ -9,6 +9,7 @@ from .views import (
     TitleViewSet,
     UsersViewSet,
     CustomAuthToken,
+    RequestMetricsView,
     api_signup)
 
 v1_router = routers.DefaultRouter()
@@ -35,5 +36,10 @@ auth_urls = [
 
 urlpatterns = [
     path('v1/auth/', include(auth_urls)),
+    path(
+        'v1/internal/metrics/',
+        RequestMetricsView.as_view(),
+        name='request-metrics'
+    ),
     path('v1/', include(v1_router.urls)),
 ]
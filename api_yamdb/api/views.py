@@ -1,15 +1,21 @@
-from secrets import token_urlsafe
-from django.db.models import Avg
-from django.db.models import IntegerField
+from secrets import compare_digest, token_urlsafe
 from rest_framework import viewsets, status
 from rest_framework.response import Response
-from rest_framework.decorators import action, api_view
-from rest_framework.pagination import PageNumberPagination
+from rest_framework.decorators import (
+    action,
+    api_view,
+    authentication_classes,
+    throttle_classes
+)
+from rest_framework.exceptions import ValidationError
+from rest_framework.validators import UniqueValidator
 from rest_framework.views import APIView
 from rest_framework.filters import SearchFilter
-from rest_framework_simplejwt.tokens import AccessToken
+from django.conf import settings
+from django.http import HttpResponse
 from django.shortcuts import get_object_or_404
-from django.core.mail import send_mail
+from django.db import transaction
+from django.db.models import Q
 from django.contrib.auth import get_user_model
 from rest_framework.permissions import (
     IsAuthenticatedOrReadOnly,
@@ -17,7 +23,10 @@ from rest_framework.permissions import (
 )
 from django_filters.rest_framework import DjangoFilterBackend
 
+from outbox.mail import send_mail_later
 from reviews.models import Title, Category, Genre, Review
+from .authentication import forget_user, get_access_token, get_full_user
+from .throttling import AuthIPThrottle, AuthUsernameThrottle
 from .permissions import (
     IsAdmin,
     IsAdminUserOrReadOnly,
@@ -26,59 +35,122 @@ from .permissions import (
 from api_yamdb.settings import DEFAULT_FROM_EMAIL
 from .serializers import (
     CategorySerializer,
-    TitleSerializerGet,
+    TitleReadSerializer,
     TitleSerializerPost,
     GenreSerializer,
+    CommentReadSerializer,
     CommentSerializer,
+    ReviewReadSerializer,
     ReviewSerializer,
+    UserReadSerializer,
     UserSerializer,
+    SignupFormatSerializer,
     SignupSerializer,
     AuthSerializer,
 )
 from .filters import TitleFilter
-from .mixins import NameViewSetMixin
+from .metrics import registry, render_prometheus
+from .pagination import ApiPageNumberPagination
+from .mixins import (
+    ConditionalGetMixin,
+    CursorPaginationMixin,
+    NameViewSetMixin,
+    ResponseCacheMixin,
+    SerializerTimingMixin,
+    SparseFieldsetMixin
+)
 
 User = get_user_model()
 
 
-class TitleViewSet(viewsets.ModelViewSet):
+class TitleViewSet(
+    ResponseCacheMixin,
+    ConditionalGetMixin,
+    SparseFieldsetMixin,
+    SerializerTimingMixin,
+    viewsets.ModelViewSet
+):
     http_method_names = ["get", "post", "patch", "delete"]
-    queryset = (Title.objects.annotate(
-        rating=Avg('reviews__score', output_field=IntegerField()))
-        .order_by('year'))
+    queryset = (Title.objects
+                .select_related('category')
+                .prefetch_related('genre')
+                .order_by('year'))
     permission_classes = [IsAuthenticatedOrReadOnly, IsAdminUserOrReadOnly]
     filter_backends = (DjangoFilterBackend,)
     filterset_class = TitleFilter
-    pagination_class = PageNumberPagination
+    pagination_class = ApiPageNumberPagination
     ordering = ('year',)
+    cache_resource = 'title'
+    cache_dependencies = ('category', 'genre')
+    sparse_field_columns = {
+        'rating': ('score_sum', 'score_count'),
+        'category': ('category__name', 'category__slug'),
+        'genre': (),
+    }
+    sparse_select_related = {'category': 'category'}
+    sparse_prefetch_related = {'genre': 'genre'}
 
     def get_serializer_class(self):
         if self.request.method in ['POST', 'PATCH']:
             return TitleSerializerPost
-        return TitleSerializerGet
+        return TitleReadSerializer
 
 
-class CategoryViewSet(NameViewSetMixin):
+class CategoryViewSet(
+    ResponseCacheMixin,
+    ConditionalGetMixin,
+    NameViewSetMixin
+):
     queryset = Category.objects.all()
     serializer_class = CategorySerializer
+    cache_resource = 'category'
 
 
-class GenreViewSet(NameViewSetMixin):
+class GenreViewSet(
+    ResponseCacheMixin,
+    ConditionalGetMixin,
+    NameViewSetMixin
+):
     queryset = Genre.objects.all()
     serializer_class = GenreSerializer
+    cache_resource = 'genre'
 
 
-class ReviewViewSet(viewsets.ModelViewSet):
+class ReviewViewSet(
+    ConditionalGetMixin,
+    SparseFieldsetMixin,
+    SerializerTimingMixin,
+    CursorPaginationMixin,
+    viewsets.ModelViewSet
+):
     serializer_class = ReviewSerializer
     permission_classes = [ReviewCommentPermissions]
     http_method_names = ['get', 'post', 'delete', 'patch']
+    sparse_field_columns = {'author': ('author__username',)}
+    sparse_required_columns = ('id', 'pub_date')
+    sparse_select_related = {'author': 'author'}
 
     def get_title(self):
         title_id = self.kwargs.get('title_id')
         return get_object_or_404(Title, pk=title_id)
 
     def get_queryset(self):
-        return self.get_title().reviews.all()
+        return self.get_title().reviews.select_related('author')
+
+    def get_serializer_class(self):
+        if self.request.method == 'GET':
+            return ReviewReadSerializer
+        return ReviewSerializer
+
+    def get_cache_resources(self):
+        # Версия самого произведения нужна, чтобы после его удаления
+        # список отзывов не получил 304.
+        return [
+            f'title:{self.kwargs["title_id"]}:reviews',
+            f'title:{self.kwargs["title_id"]}',
+            'review:all',
+            'author'
+        ]
 
     def perform_create(self, serializer):
         serializer.save(
@@ -87,17 +159,42 @@ class ReviewViewSet(viewsets.ModelViewSet):
         )
 
 
-class CommentViewSet(viewsets.ModelViewSet):
+class CommentViewSet(
+    ConditionalGetMixin,
+    SparseFieldsetMixin,
+    SerializerTimingMixin,
+    CursorPaginationMixin,
+    viewsets.ModelViewSet
+):
     serializer_class = CommentSerializer
     permission_classes = [ReviewCommentPermissions]
     http_method_names = ['get', 'post', 'delete', 'patch']
+    sparse_field_columns = {'author': ('author__username',)}
+    sparse_required_columns = ('id', 'pub_date')
+    sparse_select_related = {'author': 'author'}
 
     def get_review(self):
         review_id = self.kwargs.get('review_id')
         return get_object_or_404(Review, pk=review_id)
 
     def get_queryset(self):
-        return self.get_review().comments.all()
+        return self.get_review().comments.select_related('author')
+
+    def get_serializer_class(self):
+        if self.request.method == 'GET':
+            return CommentReadSerializer
+        return CommentSerializer
+
+    def get_cache_resources(self):
+        return [
+            f'review:{self.kwargs["review_id"]}:comments',
+            f'review:{self.kwargs["review_id"]}',
+            f'title:{self.kwargs["title_id"]}:reviews',
+            f'title:{self.kwargs["title_id"]}',
+            'comment:all',
+            'review:all',
+            'author'
+        ]
 
     def perform_create(self, serializer):
         serializer.save(
@@ -106,7 +203,11 @@ class CommentViewSet(viewsets.ModelViewSet):
         )
 
 
-class UsersViewSet(viewsets.ModelViewSet):
+class UsersViewSet(
+    SparseFieldsetMixin,
+    SerializerTimingMixin,
+    viewsets.ModelViewSet
+):
     queryset = User.objects.all()
     serializer_class = UserSerializer
     permission_classes = [IsAuthenticated, IsAdmin]
@@ -115,6 +216,11 @@ class UsersViewSet(viewsets.ModelViewSet):
     search_fields = ('username',)
     lookup_field = 'username'
 
+    def get_serializer_class(self):
+        if self.request.method == 'GET':
+            return UserReadSerializer
+        return UserSerializer
+
     @action(
         methods=['get', 'patch'],
         detail=False,
@@ -122,46 +228,68 @@ class UsersViewSet(viewsets.ModelViewSet):
         url_path='me',
         url_name='me')
     def my_user(self, request):
-        user = request.user
         if request.method == 'PATCH':
             if 'role' in request.data:
                 return Response(status=status.HTTP_400_BAD_REQUEST)
-            serializer = UserSerializer(user, data=request.data, partial=True)
+            # save() пишет все колонки, поэтому строка из кеша, которую
+            # мог обогнать другой процесс, для записи не годится.
+            user = get_object_or_404(User, pk=request.user.pk)
+            serializer = self.get_serializer(
+                user, data=request.data, partial=True)
             serializer.is_valid(raise_exception=True)
             serializer.save()
             return Response(serializer.data)
-        serializer = UserSerializer(user)
+        serializer = self.get_serializer(get_full_user(request.user))
         return Response(serializer.data)
 
 
 @api_view(['POST'])
+@authentication_classes([])
+@throttle_classes([AuthIPThrottle, AuthUsernameThrottle])
 def api_signup(request):
-    user = User.objects.filter(
-        username=request.data.get('username'),
-        email=request.data.get('email')
-    ).first()
-    if user:
-        serializer = SignupSerializer(
-            user,
-            data=request.data,
-            partial=True)
-    else:
-        serializer = SignupSerializer(data=request.data)
-    serializer.is_valid(raise_exception=True)
+    serializer = SignupFormatSerializer(data=request.data)
+    if not serializer.is_valid():
+        # Ошибки отдаём полным сериализатором: вместе с ошибками формата
+        # он сообщает и о занятых username и email.
+        SignupSerializer(data=request.data).is_valid(raise_exception=True)
+        raise ValidationError(serializer.errors)
+    username = serializer.validated_data['username']
+    email = serializer.validated_data['email']
     code = token_urlsafe(20)
-    serializer.save(confirmation_code=code)
-    send_mail(
-        subject='Ваш код аутентификации',
-        message='Сохраните код! Он понадобится вам для получения токена.\n'
-                f'confirmation_code:\n{code}\n',
-        from_email=DEFAULT_FROM_EMAIL,
-        recipient_list=[serializer.validated_data['email']],
-        fail_silently=False,
-    )
+    with transaction.atomic():
+        user_id = User.set_confirmation_code(username, email, code)
+        if user_id is None:
+            raise ValidationError(signup_conflicts(username, email))
+        send_mail_later(
+            subject='Ваш код аутентификации',
+            message='Сохраните код! Он понадобится вам для получения '
+                    f'токена.\nconfirmation_code:\n{code}\n',
+            from_email=DEFAULT_FROM_EMAIL,
+            recipient_list=[email],
+        )
+    forget_user(user_id)
     return Response(serializer.data, status=status.HTTP_200_OK)
 
 
+def signup_conflicts(username, email):
+    """Те же ошибки, что дают UniqueValidator полного SignupSerializer."""
+    taken = list(User.objects.filter(
+        Q(username=username) | Q(email=email)
+    ).values('username', 'email'))
+    fields = SignupSerializer().fields
+    errors = {}
+    for field, value in (('username', username), ('email', email)):
+        if any(row[field] == value for row in taken):
+            errors[field] = [
+                validator.message for validator in fields[field].validators
+                if isinstance(validator, UniqueValidator)
+            ]
+    return errors
+
+
 class CustomAuthToken(APIView):
+    authentication_classes = ()
+    throttle_classes = (AuthIPThrottle, AuthUsernameThrottle)
 
     def post(self, request):
         serializer = AuthSerializer(data=request.data)
@@ -170,9 +298,30 @@ class CustomAuthToken(APIView):
         confirmation_code = serializer.validated_data["confirmation_code"]
         user = get_object_or_404(User, username=username)
         if user.confirmation_code != confirmation_code:
+            registry.inc('api_auth_failures_total', reason='confirmation_code')
             return Response(
                 serializer.errors,
                 status=status.HTTP_400_BAD_REQUEST,
             )
-        token = AccessToken.for_user(user)
+        token = get_access_token(user)
         return Response({"token": str(token)}, status=status.HTTP_200_OK)
+
+
+class RequestMetricsView(APIView):
+    """Гистограммы RequestMetricsMiddleware по маршрутам."""
+    permission_classes = [IsAuthenticated, IsAdmin]
+
+    def get(self, request):
+        return Response(registry.snapshot())
+
+
+def prometheus_metrics(request):
+    """Метрики всех процессов сервера в текстовом формате Prometheus."""
+    token = settings.PROMETHEUS_METRICS_TOKEN
+    if token and not compare_digest(
+            request.META.get('HTTP_AUTHORIZATION', ''), f'Bearer {token}'):
+        return HttpResponse(status=status.HTTP_401_UNAUTHORIZED)
+    return HttpResponse(
+        render_prometheus(*registry.collect()),
+        content_type='text/plain; version=0.0.4; charset=utf-8'
+    )
@@ -1,3 +1,5 @@
+import os
+import tempfile
 from pathlib import Path
 from datetime import timedelta
 
@@ -24,10 +26,12 @@ INSTALLED_APPS = [
     'reviews.apps.ReviewsConfig',
     'api.apps.ApiConfig',
     'csv_import.apps.CsvImportConfig',
+    'outbox.apps.OutboxConfig',
     'users'
 ]
 
 MIDDLEWARE = [
+    'api.middleware.RequestMetricsMiddleware',
     'django.middleware.security.SecurityMiddleware',
     'django.contrib.sessions.middleware.SessionMiddleware',
     'django.middleware.common.CommonMiddleware',
@@ -65,6 +69,29 @@ DATABASES = {
 }
 
 
+# Кеш ответов для анонимных GET-запросов. Локальная память у каждого
+# процесса своя; если процессов несколько или данные меняют команды
+# csv_import и generate_data, нужен общий кеш, например
+# django.core.cache.backends.filebased.FileBasedCache.
+# Кеш общий для всех процессов сервера и команд manage.py: иначе версии
+# ресурсов, изменённые в одном процессе, не увидели бы остальные.
+CACHES = {
+    'default': {
+        'BACKEND': os.environ.get(
+            'CACHE_BACKEND',
+            'django.core.cache.backends.filebased.FileBasedCache'
+        ),
+        'LOCATION': os.environ.get(
+            'CACHE_LOCATION',
+            os.path.join(tempfile.gettempdir(), 'api_yamdb-cache')
+        ),
+        'OPTIONS': {'MAX_ENTRIES': 10000},
+    }
+}
+RESPONSE_CACHE_ALIAS = 'default'
+RESPONSE_CACHE_TIMEOUT = 600
+
+
 AUTH_PASSWORD_VALIDATORS = [
     {
         'NAME': 'django.contrib.auth.password_validation.UserAttributeSimilarityValidator',
@@ -88,6 +115,19 @@ EMAIL_BACKEND = 'django.core.mail.backends.filebased.EmailBackend'
 EMAIL_FILE_PATH = BASE_DIR / 'sent_emails'
 DEFAULT_FROM_EMAIL = 'noreply@yaprak.ru'
 
+# Письма кладутся в таблицу outbox и отправляются командой send_outbox.
+# EMAIL_OUTBOX_EAGER=1 отправляет письмо сразу после фиксации транзакции,
+# без отдельного процесса. Неудачная отправка повторяется через
+# EMAIL_OUTBOX_RETRY_DELAY секунд, каждый раз вдвое позже.
+EMAIL_OUTBOX_EAGER = os.environ.get('EMAIL_OUTBOX_EAGER') == '1'
+EMAIL_OUTBOX_MAX_ATTEMPTS = 5
+EMAIL_OUTBOX_RETRY_DELAY = 60
+
+# Каталог, через который процессы сервера делят метрики /metrics, и
+# необязательный Bearer-токен для их чтения.
+PROMETHEUS_MULTIPROC_DIR = os.environ.get('PROMETHEUS_MULTIPROC_DIR')
+PROMETHEUS_METRICS_TOKEN = os.environ.get('PROMETHEUS_METRICS_TOKEN')
+
 SIMPLE_JWT = {
     "TOKEN_OBTAIN_SERIALIZER": "api.serializers.CustomTokenObtainPairSerializer",
 }
@@ -108,13 +148,36 @@ STATIC_URL = '/static/'
 
 STATICFILES_DIRS = ((BASE_DIR / 'static/'),)
 
+# Файл SQLite с корзинами api.throttling, общий для процессов на машине.
+THROTTLE_STORE_PATH = os.environ.get(
+    'THROTTLE_STORE_PATH',
+    os.path.join(tempfile.gettempdir(), 'api_yamdb-throttle.sqlite3')
+)
+
+# Наибольший размер страницы, который клиент может запросить ?page_size=.
+MAX_PAGE_SIZE = 100
+
 REST_FRAMEWORK = {
-    'DEFAULT_PAGINATION_CLASS': 'rest_framework.pagination.PageNumberPagination',
+    'DEFAULT_PAGINATION_CLASS': 'api.pagination.ApiPageNumberPagination',
     'PAGE_SIZE': 5,
 
     'DEFAULT_AUTHENTICATION_CLASSES': [
-        'rest_framework_simplejwt.authentication.JWTAuthentication',
-    ]
+        'api.authentication.StatelessJWTAuthentication',
+    ],
+    'DEFAULT_RENDERER_CLASSES': [
+        'api.renderers.FastJSONRenderer',
+        'rest_framework.renderers.BrowsableAPIRenderer',
+    ],
+    # Token bucket: N запросов подряд, пополнение за период.
+    'DEFAULT_THROTTLE_RATES': {
+        'auth_ip': '20/min',
+        'auth_username': '5/min',
+    },
+    'DEFAULT_PARSER_CLASSES': [
+        'api.parsers.FastJSONParser',
+        'rest_framework.parsers.FormParser',
+        'rest_framework.parsers.MultiPartParser',
+    ],
 }
 
 SIMPLE_JWT = {
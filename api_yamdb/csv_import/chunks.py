@@ -0,0 +1,130 @@
+import gzip
+import io
+import json
+import os
+from csv import DictReader, reader
+
+from .tables import TABLES
+
+READ_BLOCK_SIZE = 1 << 16
+
+
+def _count_quotes(csv_file, start, end):
+    csv_file.seek(start)
+    quotes = 0
+    while start < end:
+        block = csv_file.read(min(READ_BLOCK_SIZE, end - start))
+        quotes += block.count(b'"')
+        start += len(block)
+    return quotes
+
+
+def _next_record_start(csv_file, position, in_quotes):
+    """Ищет начало следующей записи после position.
+
+    Перевод строки внутри кавычек запись не заканчивает: текст отзыва
+    может быть многострочным. Удвоенная кавычка внутри поля меняет
+    чётность дважды, поэтому на результат не влияет.
+    """
+    csv_file.seek(position)
+    while True:
+        block = csv_file.read(READ_BLOCK_SIZE)
+        if not block:
+            return None
+        start = 0
+        while True:
+            newline = block.find(b'\n', start)
+            if newline == -1:
+                in_quotes ^= bool(block.count(b'"', start) & 1)
+                break
+            in_quotes ^= bool(block.count(b'"', start, newline) & 1)
+            if not in_quotes:
+                return position + newline + 1
+            start = newline + 1
+        position += len(block)
+
+
+def find_dump(path, filename):
+    """Путь к файлу таблицы: csv или выгрузка csv_export.
+
+    csv_export пишет filename как есть, в ndjson и со сжатием gzip.
+    Если файла нет ни в одном виде, возвращается путь к csv.
+    """
+    stem = filename[:-len('.csv')]
+    for name in (filename, filename + '.gz',
+                 stem + '.ndjson', stem + '.ndjson.gz'):
+        filepath = os.path.join(path, name)
+        if os.path.exists(filepath):
+            return filepath
+    return os.path.join(path, filename)
+
+
+def is_ndjson(filepath):
+    return filepath.endswith(('.ndjson', '.ndjson.gz'))
+
+
+def open_dump(filepath):
+    if filepath.endswith('.gz'):
+        return gzip.open(
+            filepath, 'rt', encoding='utf-8-sig', newline='')
+    return open(filepath, encoding='utf-8-sig', newline='')
+
+
+def read_rows(filepath):
+    """Потоково читает строки файла как словари колонка -> значение."""
+    with open_dump(filepath) as dump_file:
+        if not is_ndjson(filepath):
+            yield from DictReader(dump_file)
+            return
+        for line in dump_file:
+            if line.strip():
+                yield json.loads(line)
+
+
+def read_header(filepath):
+    if is_ndjson(filepath):
+        return list(next(read_rows(filepath), {}))
+    with open_dump(filepath) as dump_file:
+        return next(reader(dump_file), [])
+
+
+def split_csv(filepath, chunk_size):
+    """Делит csv-файл на куски примерно по chunk_size байт.
+
+    Возвращает заголовок и список пар (начало, конец) в байтах. Границы
+    совпадают с границами записей, поэтому куски разбираются независимо.
+    Файл только просматривается побайтно, без разбора csv.
+    """
+    with open(filepath, 'rb') as csv_file:
+        header = csv_file.readline()
+        fieldnames = next(reader([header.decode('utf-8-sig')]))
+        size = os.fstat(csv_file.fileno()).st_size
+        chunks = []
+        start = csv_file.tell()
+        while start < size:
+            end = start + chunk_size
+            if end < size:
+                # Кусок начинается с границы записи, значит нечётное
+                # число кавычек означает, что end попал внутрь поля.
+                in_quotes = bool(_count_quotes(csv_file, start, end) & 1)
+                end = _next_record_start(csv_file, end, in_quotes) or size
+            else:
+                end = size
+            chunks.append((start, end))
+            start = end
+    return fieldnames, chunks
+
+
+def parse_chunk(table_name, filepath, fieldnames, start, end):
+    """Разбирает кусок csv-файла в параметры INSERT (make_values).
+
+    Выполняется в дочернем процессе, поэтому таблица передаётся по имени.
+    Объекты модели назад не передаются: их распаковка стоила бы
+    родительскому процессу столько же, сколько сам разбор.
+    """
+    table = TABLES[table_name]
+    with open(filepath, 'rb') as csv_file:
+        csv_file.seek(start)
+        text = csv_file.read(end - start).decode('utf-8')
+    rows = DictReader(io.StringIO(text, newline=''), fieldnames=fieldnames)
+    return [table.make_values(row) for row in rows]
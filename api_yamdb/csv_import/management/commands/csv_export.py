@@ -0,0 +1,102 @@
+import gzip
+import os
+from csv import writer
+
+from django.core.management import BaseCommand, CommandError
+from django.core.serializers.json import DjangoJSONEncoder
+
+from csv_import.tables import TABLES, get_load_order
+
+DEFAULT_CHUNK_SIZE = 2000
+FORMATS = ('csv', 'ndjson')
+
+
+class Command(BaseCommand):
+    help = ("Выгружает таблицы в csv- или ndjson-файлы в формате, "
+            "который читает csv_import")
+
+    def add_arguments(self, parser):
+        parser.add_argument('--path', type=str, required=True)
+        parser.add_argument(
+            '--format',
+            choices=FORMATS,
+            default='csv',
+            help='Формат файлов (по умолчанию csv)'
+        )
+        parser.add_argument(
+            '--gzip',
+            action='store_true',
+            help='Сжимать файлы gzip'
+        )
+        parser.add_argument(
+            '--chunk-size',
+            type=int,
+            default=DEFAULT_CHUNK_SIZE,
+            help='Сколько строк читать из БД за один раз '
+                 f'(по умолчанию {DEFAULT_CHUNK_SIZE})'
+        )
+        parser.add_argument(
+            '--tables',
+            nargs='+',
+            choices=list(TABLES),
+            help='Какие таблицы выгрузить (по умолчанию все)'
+        )
+
+    def handle(self, *args, **kwargs):
+        self.chunk_size = kwargs['chunk_size']
+        if self.chunk_size < 1:
+            raise CommandError('--chunk-size должен быть больше нуля')
+        self.format = kwargs['format']
+        self.gzip = kwargs['gzip']
+        self.encoder = DjangoJSONEncoder(ensure_ascii=False)
+        path = kwargs['path']
+        os.makedirs(path, exist_ok=True)
+        names = kwargs['tables'] or get_load_order()
+        for name in names:
+            table = TABLES[name]
+            self.stdout.write(f'Выгружаем данные по {table.label}')
+            self.export_table(
+                table, os.path.join(path, self.get_filename(table)))
+
+    def get_filename(self, table):
+        filename = table.filename
+        if self.format == 'ndjson':
+            filename = filename[:-len('.csv')] + '.ndjson'
+        if self.gzip:
+            filename += '.gz'
+        return filename
+
+    def open(self, filepath):
+        if self.gzip:
+            return gzip.open(filepath, 'wt', encoding='utf-8', newline='')
+        return open(filepath, 'w', encoding='utf-8', newline='')
+
+    def export_table(self, table, filepath):
+        """Пишет таблицу в файл построчно.
+
+        iterator() читает строки из курсора БД порциями по chunk_size и
+        не кеширует их в QuerySet, поэтому память не растёт с размером
+        таблицы.
+        """
+        columns = list(table.columns.values())
+        rows = table.model.objects.order_by('pk').values_list(
+            *table.columns
+        ).iterator(chunk_size=self.chunk_size)
+        with self.open(filepath) as output:
+            if self.format == 'csv':
+                csv_writer = writer(output)
+                csv_writer.writerow(columns)
+                csv_writer.writerows(map(self.format_csv_row, rows))
+            else:
+                for row in rows:
+                    output.write(self.encoder.encode(dict(zip(columns, row))))
+                    output.write('\n')
+
+    def format_csv_row(self, row):
+        # Даты пишутся так же, как в исходных csv-файлах: ISO 8601 с Z.
+        return [
+            '' if value is None
+            else value if isinstance(value, (str, int))
+            else self.encoder.default(value)
+            for value in row
+        ]
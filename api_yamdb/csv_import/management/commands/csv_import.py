@@ -1,15 +1,28 @@
-from csv import DictReader
-from django.core.management import BaseCommand
-from django.contrib.auth import get_user_model
+import os
+import threading
+from collections import deque
+from concurrent.futures import (
+    FIRST_EXCEPTION,
+    ProcessPoolExecutor,
+    ThreadPoolExecutor,
+    wait
+)
+from contextlib import nullcontext
+from itertools import islice
 
-from reviews.models import (
-    Title,
-    Category,
-    Genre,
-    Review,
-    Comment)
+import django
+from django.core.management import BaseCommand, CommandError
+from django.db import connection, connections, transaction
 
-User = get_user_model()
+from api.cache import invalidate_model
+from csv_import.chunks import (
+    find_dump,
+    parse_chunk,
+    read_header,
+    read_rows,
+    split_csv
+)
+from csv_import.tables import TABLES, get_dependencies, get_load_order
 
 
 ALREDY_LOADED_ERROR_MESSAGE = """
@@ -18,146 +31,236 @@ first delete the db.sqlite3 file to destroy the database.
 Then, run `python manage.py migrate` for a new empty
 database with tables"""
 
+DEFAULT_BATCH_SIZE = 1000
+DEFAULT_CHUNK_SIZE = 4 * 1024 * 1024
+
 
 class Command(BaseCommand):
     # Показать это, когда пользователь наберет help
     help = "Загружает данные из всех csv-файлов для тестирования приложения"
 
     def add_arguments(self, parser):
-        parser.add_argument('--path', type=str)
+        parser.add_argument(
+            '--path',
+            type=str,
+            help='Каталог с csv-файлами; читаются и выгрузки csv_export '
+                 '(.csv.gz, .ndjson, .ndjson.gz)'
+        )
+        parser.add_argument(
+            '--batch-size',
+            type=int,
+            default=DEFAULT_BATCH_SIZE,
+            help='Сколько строк записывать в БД одним INSERT '
+                 f'(по умолчанию {DEFAULT_BATCH_SIZE})'
+        )
+        parser.add_argument(
+            '--upsert',
+            action='store_true',
+            help='Не пропускать уже заполненные таблицы, а добавить новые '
+                 'и обновить изменившиеся строки'
+        )
+        parser.add_argument(
+            '--workers',
+            type=int,
+            default=1,
+            help='Сколько процессов разбирают csv-файлы параллельно; '
+                 'независимые таблицы при этом тоже грузятся параллельно '
+                 '(по умолчанию 1 - последовательная загрузка)'
+        )
+        parser.add_argument(
+            '--chunk-size',
+            type=int,
+            default=DEFAULT_CHUNK_SIZE,
+            help='Размер куска csv-файла в байтах для одного процесса '
+                 f'(по умолчанию {DEFAULT_CHUNK_SIZE})'
+        )
 
     def handle(self, *args, **kwargs):
         path = kwargs['path']
-        self.load_category_data(filepath='/'.join([path, 'category.csv']))
-        self.load_genre_data(filepath='/'.join([path, 'genre.csv']))
-        self.load_titles_data(filepath='/'.join([path, 'titles.csv']))
-        self.load_genre_title_data(
-            filepath='/'.join([path, 'genre_title.csv']))
-        self.load_users_data(filepath='/'.join([path, 'users.csv']))
-        self.load_review_data(filepath='/'.join([path, 'review.csv']))
-        self.load_comment_data(filepath='/'.join([path, 'comments.csv']))
-
-    def load_category_data(self, filepath):
+        self.batch_size = kwargs['batch_size']
+        self.workers = kwargs['workers']
+        self.chunk_size = kwargs['chunk_size']
+        self.upsert = kwargs['upsert']
+        if self.batch_size < 1:
+            raise CommandError('--batch-size должен быть больше нуля')
+        if self.workers < 1:
+            raise CommandError('--workers должен быть больше нуля')
+        if self.chunk_size < 1:
+            raise CommandError('--chunk-size должен быть больше нуля')
+
+        filepaths = {
+            name: find_dump(path, table.filename)
+            for name, table in TABLES.items()
+        }
+        if self.workers == 1:
+            for name in get_load_order():
+                self.load_table(TABLES[name], filepaths[name])
+        else:
+            self.load_parallel(filepaths)
+
+    def load_parallel(self, filepaths):
+        """Грузит независимые таблицы одновременно.
+
+        Каждая таблица ждёт только те, на которые ссылаются её внешние
+        ключи. SQLite допускает одного писателя, поэтому для него запись
+        в БД выполняется под общей блокировкой, а разбор файлов
+        по-прежнему идёт параллельно в дочерних процессах.
+        """
+        self.write_lock = (
+            threading.Lock() if connection.vendor == 'sqlite'
+            else nullcontext()
+        )
+        dependencies = get_dependencies()
+        with ProcessPoolExecutor(
+                self.workers, initializer=django.setup) as processes, \
+                ThreadPoolExecutor(len(TABLES)) as threads:
+            futures = {}
+            for name in get_load_order():
+                futures[name] = threads.submit(
+                    self.load_table_after,
+                    TABLES[name],
+                    filepaths[name],
+                    [futures[required] for required in dependencies[name]],
+                    processes
+                )
+            done, _ = wait(futures.values(), return_when=FIRST_EXCEPTION)
+            for future in done:
+                if future.exception() is not None:
+                    for pending in futures.values():
+                        pending.cancel()
+                    raise future.exception()
+
+    def load_table_after(self, table, filepath, required, processes):
+        try:
+            for future in required:
+                future.result()
+            self.load_table(table, filepath, processes)
+        finally:
+            # У каждого потока своё соединение с БД.
+            connections.close_all()
+
+    def load_table(self, table, filepath, processes=None):
+        write_lock = getattr(self, 'write_lock', nullcontext())
+        with write_lock:
+            loaded = not self.upsert and table.model.objects.exists()
         # Показать это сообщение, если данные уже есть в БД
-        if Category.objects.exists():
-            print('Данные по категориям уже загружены...выходим.')
-            print(ALREDY_LOADED_ERROR_MESSAGE)
+        if loaded:
+            # stdout.write пишет строку одним вызовом, поэтому сообщения
+            # параллельных потоков не перемешиваются.
+            self.stdout.write(
+                f'Данные по {table.label} уже загружены...выходим.')
+            self.stdout.write(ALREDY_LOADED_ERROR_MESSAGE)
             return
 
         # Показываем это сообщение перед началом загрузки данных в БД
-        print("Загружаем данные по категориям")
+        self.stdout.write(f"Загружаем данные по {table.label}")
+
+        # По байтовым границам делятся только несжатые csv-файлы.
+        if (processes is None or not filepath.endswith('.csv')
+                or os.path.getsize(filepath) <= self.chunk_size):
+            batches = self.read_batches(table, filepath)
+        else:
+            batches = self.parse_batches(table, filepath, processes)
 
         # Загружаем данные в БД
-        bulk_list = list()
-        for row in DictReader(open(filepath, encoding="utf-8-sig")):
-            category = Category(
-                id=row['id'],
-                name=row['name'],
-                slug=row['slug'])
-            bulk_list.append(category)
-        Category.objects.bulk_create(bulk_list)
-
-    def load_genre_data(self, filepath):
-        if Genre.objects.exists():
-            print('Данные по жанрам уже загружены...выходим.')
-            print(ALREDY_LOADED_ERROR_MESSAGE)
-            return
+        with write_lock, table.file_dates(), transaction.atomic():
+            invalidate_model(table.model)
+            if self.upsert:
+                fields = table.upsert_fields(read_header(filepath))
+                created = updated = 0
+                for batch in batches:
+                    changes = self.upsert_batch(table, batch, fields)
+                    created += sum(old is None for old, _ in changes)
+                    updated += sum(old is not None for old, _ in changes)
+                    if changes and table.after_load is not None:
+                        table.after_load(changes)
+                self.stdout.write(
+                    f'Данные по {table.label}: добавлено строк {created}, '
+                    f'обновлено {updated}')
+                return
+            for batch in batches:
+                table.insert(batch)
+            if table.after_load is not None:
+                table.after_load()
 
-        print("Загружаем данные по жанрам")
+    def upsert_batch(self, table, batch, fields):
+        """Пишет в БД только новые и изменившиеся строки пачки.
 
-        bulk_list = list()
-        for row in DictReader(open(filepath, encoding="utf-8-sig")):
-            genre = Genre(id=row['id'], name=row['name'], slug=row['slug'])
-            bulk_list.append(genre)
-        Genre.objects.bulk_create(bulk_list)
+        Существующие строки читаются одним запросом по первичным ключам
+        пачки, так что объём работы пропорционален изменениям, а не
+        размеру таблицы. Возвращает пары (старый объект или None, новый).
+        """
+        model = table.model
+        batch = [table.from_values(values) for values in batch]
+        for obj in batch:
+            obj.pk = model._meta.pk.to_python(obj.pk)
+            for field in fields:
+                setattr(obj, field.attname,
+                        field.to_python(getattr(obj, field.attname)))
+        existing = model.objects.only(
+            *(field.name for field in fields)
+        ).in_bulk([obj.pk for obj in batch])
 
-    def load_titles_data(self, filepath):
-        if Title.objects.exists():
-            print('Данные по произведениям уже загружены...выходим.')
-            print(ALREDY_LOADED_ERROR_MESSAGE)
-            return
+        changes, created, updated = [], [], []
+        for obj in batch:
+            old = existing.get(obj.pk)
+            if old is None:
+                created.append(obj)
+            elif any(getattr(old, field.attname) != getattr(obj, field.attname)
+                     for field in fields):
+                updated.append(obj)
+            else:
+                continue
+            changes.append((old, obj))
+        if created:
+            model.objects.bulk_create(created, batch_size=self.batch_size)
+        if updated:
+            model.objects.bulk_update(
+                updated,
+                [field.name for field in fields],
+                batch_size=self.batch_size
+            )
+        return changes
 
-        print("Загружаем данные по произведениям")
-
-        bulk_list = list()
-        for row in DictReader(open(filepath, encoding="utf-8-sig")):
-            title = Title(id=row['id'],
-                          name=row['name'],
-                          year=row['year'],
-                          category_id=row['category'])
-            bulk_list.append(title)
-        Title.objects.bulk_create(bulk_list)
-
-    def load_genre_title_data(self, filepath):
-        if Title.genre.through.objects.exists():
-            print('Данные по жанрам и произведениям уже загружены...выходим.')
-            print(ALREDY_LOADED_ERROR_MESSAGE)
-            return
+    def read_batches(self, table, filepath):
+        """Потоково читает файл пачками по batch_size строк make_values.
 
-        print("Загружаем данные по связи жанров и произведений")
-
-        bulk_list = list()
-        for row in DictReader(open(filepath, encoding="utf-8-sig")):
-            genre_title = Title.genre.through(
-                id=row['id'],
-                title_id=row['title_id'],
-                genre_id=row['genre_id'])
-            bulk_list.append(genre_title)
-        Title.genre.through.objects.bulk_create(bulk_list)
-
-    def load_users_data(self, filepath):
-        if User.objects.exists():
-            print('Данные по пользователям уже загружены...выходим.')
-            print(ALREDY_LOADED_ERROR_MESSAGE)
-            return
+        В памяти одновременно находится не больше одной пачки, поэтому
+        размер файла на потребление памяти не влияет.
+        """
+        rows = map(table.make_values, read_rows(filepath))
+        while True:
+            batch = list(islice(rows, self.batch_size))
+            if not batch:
+                break
+            yield batch
 
-        print("Загружаем данные по пользователям")
-
-        bulk_list = list()
-        for row in DictReader(open(filepath, encoding="utf-8-sig")):
-            user = User(id=row['id'],
-                        username=row['username'],
-                        email=row['email'],
-                        role=row['role'],
-                        bio=row['bio'],
-                        first_name=row['first_name'],
-                        last_name=row['last_name'])
-            bulk_list.append(user)
-        User.objects.bulk_create(bulk_list)
-
-    def load_review_data(self, filepath):
-        if Review.objects.exists():
-            print('Данные по отзывам уже загружены...выходим.')
-            print(ALREDY_LOADED_ERROR_MESSAGE)
-            return
+    def parse_batches(self, table, filepath, processes):
+        """Разбирает куски csv-файла в дочерних процессах.
 
-        print("Загружаем данные по отзывам")
-
-        bulk_list = list()
-        for row in DictReader(open(filepath, encoding="utf-8-sig")):
-            review = Review(id=row['id'],
-                            title_id=row['title_id'],
-                            text=row['text'],
-                            author_id=row['author'],
-                            score=row['score'],
-                            pub_date=row['pub_date'])
-            bulk_list.append(review)
-        Review.objects.bulk_create(bulk_list)
-
-    def load_comment_data(self, filepath):
-        if Comment.objects.exists():
-            print('Данные по комментариям уже загружены...выходим.')
-            print(ALREDY_LOADED_ERROR_MESSAGE)
-            return
+        Первые куски отправляются в работу сразу, ещё до захвата
+        блокировки записи. В работе одновременно не больше двух кусков
+        на процесс, чтобы память оставалась ограниченной при любом
+        размере файла.
+        """
+        fieldnames, chunks = split_csv(filepath, self.chunk_size)
+        chunks = iter(chunks)
+        pending = deque()
+
+        def submit():
+            for start, end in islice(chunks, 1):
+                pending.append(processes.submit(
+                    parse_chunk, table.name, filepath, fieldnames, start, end
+                ))
+
+        for _ in range(2 * self.workers):
+            submit()
+
+        def batches():
+            while pending:
+                rows = pending.popleft().result()
+                submit()
+                for start in range(0, len(rows), self.batch_size):
+                    yield rows[start:start + self.batch_size]
 
-        print("Загружаем данные по комментариям")
-
-        bulk_list = list()
-        for row in DictReader(open(filepath, encoding="utf-8-sig")):
-            comment = Comment(id=row['id'],
-                              review_id=row['review_id'],
-                              text=row['text'],
-                              author_id=row['author'],
-                              pub_date=row['pub_date'])
-            bulk_list.append(comment)
-        Comment.objects.bulk_create(bulk_list)
+        return batches()
@@ -0,0 +1,130 @@
+import os
+from csv import DictWriter
+from itertools import islice
+
+from django.core.management import BaseCommand, CommandError
+from django.db import transaction
+
+from api.cache import invalidate_model
+from csv_import.synthetic import DEFAULT_SCORE_WEIGHTS, SyntheticDataset
+from csv_import.tables import TABLES, get_load_order
+
+DEFAULT_BATCH_SIZE = 1000
+
+
+class Command(BaseCommand):
+    help = ("Генерирует синтетические данные заданного масштаба в формате "
+            "csv_import или сразу загружает их в БД")
+
+    def add_arguments(self, parser):
+        target = parser.add_mutually_exclusive_group(required=True)
+        target.add_argument(
+            '--path',
+            type=str,
+            help='Каталог, куда записать csv-файлы для csv_import'
+        )
+        target.add_argument(
+            '--load',
+            action='store_true',
+            help='Сразу записать данные в БД через bulk_create'
+        )
+        parser.add_argument('--titles', type=int, default=1000)
+        parser.add_argument('--users', type=int, default=1000)
+        parser.add_argument('--reviews', type=int, default=10000)
+        parser.add_argument('--comments', type=int, default=30000)
+        parser.add_argument('--categories', type=int, default=10)
+        parser.add_argument('--genres', type=int, default=30)
+        parser.add_argument(
+            '--max-genres',
+            type=int,
+            default=3,
+            help='Наибольшее число жанров у произведения'
+        )
+        parser.add_argument(
+            '--skew',
+            type=float,
+            default=1.0,
+            help='Показатель закона Ципфа для популярности произведений; '
+                 '0 - отзывы распределены равномерно'
+        )
+        parser.add_argument(
+            '--score-weights',
+            type=str,
+            default=','.join(map(str, DEFAULT_SCORE_WEIGHTS)),
+            help='Десять весов для оценок от 1 до 10 через запятую'
+        )
+        parser.add_argument('--seed', type=int, default=0)
+        parser.add_argument(
+            '--batch-size',
+            type=int,
+            default=DEFAULT_BATCH_SIZE,
+            help='Размер пачки для bulk_create при --load'
+        )
+
+    def handle(self, *args, **kwargs):
+        try:
+            score_weights = [
+                float(weight)
+                for weight in kwargs['score_weights'].split(',')
+            ]
+        except ValueError:
+            score_weights = []
+        if len(score_weights) != 10 or min(score_weights) < 0:
+            raise CommandError(
+                '--score-weights: нужно десять неотрицательных чисел')
+        for option in ('titles', 'users', 'categories', 'genres',
+                       'max_genres', 'batch_size'):
+            if kwargs[option] < 1:
+                raise CommandError(
+                    f'--{option.replace("_", "-")} должен быть больше нуля')
+        self.batch_size = kwargs['batch_size']
+
+        dataset = SyntheticDataset(
+            titles=kwargs['titles'],
+            users=kwargs['users'],
+            reviews=kwargs['reviews'],
+            comments=kwargs['comments'],
+            categories=kwargs['categories'],
+            genres=kwargs['genres'],
+            max_genres=kwargs['max_genres'],
+            skew=kwargs['skew'],
+            score_weights=score_weights,
+            seed=kwargs['seed'],
+        )
+        path = kwargs['path']
+        if path:
+            os.makedirs(path, exist_ok=True)
+        for name in get_load_order():
+            table = TABLES[name]
+            rows = dataset.rows(name)
+            if path:
+                count = self.write_csv(
+                    table, rows, os.path.join(path, table.filename))
+            else:
+                count = self.load(table, rows)
+            self.stdout.write(f'Сгенерировано строк по {table.label}: {count}')
+
+    def write_csv(self, table, rows, filepath):
+        count = 0
+        with open(filepath, 'w', encoding='utf-8', newline='') as csv_file:
+            writer = DictWriter(csv_file, fieldnames=table.columns.values())
+            writer.writeheader()
+            for row in rows:
+                writer.writerow(row)
+                count += 1
+        return count
+
+    def load(self, table, rows):
+        count = 0
+        objects = map(table.make_object, rows)
+        with table.file_dates(), transaction.atomic():
+            invalidate_model(table.model)
+            while True:
+                batch = list(islice(objects, self.batch_size))
+                if not batch:
+                    break
+                table.model.objects.bulk_create(batch)
+                count += len(batch)
+            if table.after_load is not None:
+                table.after_load()
+        return count
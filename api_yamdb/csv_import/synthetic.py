@@ -0,0 +1,198 @@
+import math
+import random
+from datetime import datetime, timedelta, timezone
+from itertools import accumulate
+
+WORDS = (
+    'фильм книга песня сюжет герой автор режиссёр финал актёр музыка '
+    'история сцена диалог роман альбом жанр атмосфера персонаж мир '
+    'отличный скучный сильный слабый неожиданный добрый мрачный смешной '
+    'затянутый яркий честно очень совсем немного снова впервые наконец '
+    'понравился разочаровал удивил рекомендую пересмотрю перечитаю'
+).split()
+
+DEFAULT_SCORE_WEIGHTS = (1, 1, 2, 3, 5, 8, 12, 15, 12, 8)
+ROLES = ('user', 'moderator', 'admin')
+ROLE_WEIGHTS = (98, 1.5, 0.5)
+START_DATE = datetime(2015, 1, 1, tzinfo=timezone.utc)
+DATE_RANGE = timedelta(days=365 * 8)
+
+
+class SyntheticDataset:
+    """Генератор правдоподобных данных для нагрузочного тестирования.
+
+    Каждая таблица отдаётся генератором строк в формате csv_import, так
+    что память не зависит от масштаба. Отзывы распределяются по
+    произведениям по закону Ципфа с показателем skew: несколько
+    популярных произведений собирают большую часть отзывов. Одинаковый
+    seed даёт одинаковые данные.
+    """
+
+    def __init__(self, titles, users, reviews, comments, categories=10,
+                 genres=30, max_genres=3, skew=1.0,
+                 score_weights=DEFAULT_SCORE_WEIGHTS, seed=0):
+        self.titles = titles
+        self.users = users
+        self.reviews = reviews
+        self.comments = comments
+        self.categories = categories
+        self.genres = genres
+        self.max_genres = min(max_genres, genres)
+        self.skew = skew
+        self.score_cum_weights = list(accumulate(score_weights))
+        self.seed = seed
+
+    def random(self, table):
+        # У каждой таблицы свой поток случайных чисел, поэтому таблицы
+        # можно генерировать по отдельности и в любом порядке.
+        return random.Random(f'{self.seed}:{table}')
+
+    @staticmethod
+    def text(rng, min_words, max_words):
+        words = rng.choices(WORDS, k=rng.randint(min_words, max_words))
+        return ' '.join(words).capitalize() + '.'
+
+    @staticmethod
+    def moment(rng, start=START_DATE):
+        span = (START_DATE + DATE_RANGE - start).total_seconds()
+        return start + timedelta(seconds=rng.random() * span)
+
+    @staticmethod
+    def format_date(moment):
+        # Тот же вид, что в static/data: миллисекунды и Z.
+        return moment.strftime('%Y-%m-%dT%H:%M:%S.%f')[:-3] + 'Z'
+
+    def category_rows(self):
+        for pk in range(1, self.categories + 1):
+            yield {'id': pk, 'name': f'Категория {pk}', 'slug': f'cat-{pk}'}
+
+    def genre_rows(self):
+        for pk in range(1, self.genres + 1):
+            yield {'id': pk, 'name': f'Жанр {pk}', 'slug': f'genre-{pk}'}
+
+    def title_rows(self):
+        rng = self.random('titles')
+        for pk in range(1, self.titles + 1):
+            yield {
+                'id': pk,
+                'name': self.text(rng, 1, 4)[:-1],
+                'year': rng.randint(1950, 2022),
+                'category': rng.randint(1, self.categories),
+                'description': self.text(rng, 5, 30),
+            }
+
+    def genre_title_rows(self):
+        rng = self.random('genre_title')
+        pk = 0
+        for title_id in range(1, self.titles + 1):
+            fan_out = rng.randint(1, self.max_genres)
+            for genre_id in rng.sample(range(1, self.genres + 1), fan_out):
+                pk += 1
+                yield {'id': pk, 'title_id': title_id, 'genre_id': genre_id}
+
+    def user_rows(self):
+        rng = self.random('users')
+        for pk in range(1, self.users + 1):
+            yield {
+                'id': pk,
+                'username': f'user{pk}',
+                'email': f'user{pk}@yamdb.fake',
+                'role': rng.choices(ROLES, ROLE_WEIGHTS)[0],
+                'bio': self.text(rng, 0, 15) if rng.random() < 0.3 else '',
+                'first_name': '',
+                'last_name': '',
+            }
+
+    def reviews_per_title(self):
+        """Число отзывов каждого произведения по закону Ципфа.
+
+        Популярность не связана с id: ранги перемешаны. Одному автору
+        можно оставить только один отзыв, поэтому у произведения не
+        больше отзывов, чем пользователей; излишек отдаётся остальным.
+        """
+        rng = self.random('popularity')
+        ranks = list(range(1, self.titles + 1))
+        rng.shuffle(ranks)
+        weights = [rank ** -self.skew for rank in ranks]
+        capped = set()
+        while True:
+            remaining = self.reviews - len(capped) * self.users
+            free_weight = sum(
+                weight for title, weight in enumerate(weights)
+                if title not in capped
+            )
+            scale = max(remaining, 0) / free_weight if free_weight else 0
+            overflow = {
+                title for title, weight in enumerate(weights)
+                if title not in capped and weight * scale > self.users
+            }
+            if not overflow:
+                break
+            capped |= overflow
+        counts = []
+        for title, weight in enumerate(weights):
+            if title in capped:
+                counts.append(self.users)
+                continue
+            expected = weight * scale
+            counts.append(int(expected) + (rng.random() < expected % 1))
+        return counts
+
+    def review_rows(self):
+        for row, _ in self.reviews_with_dates():
+            yield row
+
+    def reviews_with_dates(self):
+        rng = self.random('review')
+        pk = 0
+        for title_id, count in enumerate(self.reviews_per_title(), 1):
+            for author in rng.sample(range(1, self.users + 1), count):
+                pk += 1
+                moment = self.moment(rng)
+                yield {
+                    'id': pk,
+                    'title_id': title_id,
+                    'text': self.text(rng, 3, 60),
+                    'author': author,
+                    'score': rng.choices(
+                        range(1, 11), cum_weights=self.score_cum_weights
+                    )[0],
+                    'pub_date': self.format_date(moment),
+                }, moment
+
+    def comment_rows(self):
+        """Комментарии к отзывам, в среднем comments / reviews на отзыв.
+
+        Отзывы генерируются повторно из того же seed, поэтому держать их
+        в памяти не нужно. Комментарий всегда новее своего отзыва.
+        """
+        reviews = sum(self.reviews_per_title())
+        if not reviews or not self.comments:
+            return
+        rng = self.random('comments')
+        # Целая часть экспоненциальной величины с такой интенсивностью
+        # распределена геометрически со средним comments / reviews.
+        rate = math.log1p(reviews / self.comments)
+        pk = 0
+        for review, review_moment in self.reviews_with_dates():
+            for _ in range(int(rng.expovariate(rate))):
+                pk += 1
+                yield {
+                    'id': pk,
+                    'review_id': review['id'],
+                    'text': self.text(rng, 1, 30),
+                    'author': rng.randint(1, self.users),
+                    'pub_date': self.format_date(
+                        self.moment(rng, review_moment)),
+                }
+
+    def rows(self, table_name):
+        return {
+            'category': self.category_rows,
+            'genre': self.genre_rows,
+            'titles': self.title_rows,
+            'genre_title': self.genre_title_rows,
+            'users': self.user_rows,
+            'review': self.review_rows,
+            'comments': self.comment_rows,
+        }[table_name]()
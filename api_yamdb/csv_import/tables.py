@@ -0,0 +1,214 @@
+from contextlib import contextmanager
+
+from django.contrib.auth import get_user_model
+from django.db import connections, router
+
+from reviews.models import Category, Comment, Genre, Review, Title
+
+User = get_user_model()
+
+
+class CsvTable:
+    """Описание одного csv-файла и модели, в которую он загружается.
+
+    columns сопоставляет поле модели с колонкой csv-файла. Колонки полей
+    из optional в файле может не быть, тогда поле получает значение по
+    умолчанию. Пустая строка во внешнем ключе, допускающем NULL, читается
+    как NULL.
+    """
+
+    def __init__(self, name, model, filename, label, columns,
+                 optional=(), after_load=None):
+        self.name = name
+        self.model = model
+        self.filename = filename
+        self.label = label
+        self.columns = columns
+        self.optional = optional
+        self.after_load = after_load
+        self.nullable_relations = set()
+        for name in columns:
+            field = model._meta.get_field(name)
+            if field.is_relation and field.null:
+                self.nullable_relations.add(name)
+
+    def make_object(self, row):
+        values = {}
+        for field, column in self.columns.items():
+            if field in self.optional and column not in row:
+                continue
+            value = row[column]
+            if value == '' and field in self.nullable_relations:
+                value = None
+            values[field] = value
+        return self.model(**values)
+
+    def make_values(self, row):
+        """Строка файла как параметры INSERT в порядке полей модели.
+
+        Значения сразу приводятся к виду для БД, поэтому дочерние
+        процессы отдают кортежи, а не объекты модели, и записи остаётся
+        только выполнить INSERT.
+        """
+        obj = self.make_object(row)
+        connection = connections[router.db_for_write(self.model)]
+        return tuple(
+            field.get_db_prep_save(getattr(obj, field.attname), connection)
+            for field in self.model._meta.concrete_fields
+        )
+
+    def from_values(self, values):
+        """Объект модели из кортежа make_values.
+
+        Значения проходят те же конвертеры, что и строки, прочитанные
+        из БД: иначе, например, дата на SQLite осталась бы строкой без
+        часового пояса и не совпала бы с датой уже сохранённой записи.
+        """
+        connection = connections[router.db_for_write(self.model)]
+        values = list(values)
+        for index, field in enumerate(self.model._meta.concrete_fields):
+            column = field.get_col(self.model._meta.db_table)
+            converters = (connection.ops.get_db_converters(column)
+                          + field.get_db_converters(connection))
+            for converter in converters:
+                values[index] = converter(values[index], column, connection)
+        # Позиционные аргументы идут в порядке concrete_fields, так
+        # объект собирается быстрее, чем по именам.
+        return self.model(*values)
+
+    def insert(self, rows):
+        """Вставляет строки из make_values без создания объектов."""
+        connection = connections[router.db_for_write(self.model)]
+        quote_name = connection.ops.quote_name
+        fields = self.model._meta.concrete_fields
+        sql = 'INSERT INTO {} ({}) VALUES ({})'.format(
+            quote_name(self.model._meta.db_table),
+            ', '.join(quote_name(field.column) for field in fields),
+            ', '.join(['%s'] * len(fields)),
+        )
+        with connection.cursor() as cursor:
+            cursor.executemany(sql, rows)
+
+    def upsert_fields(self, fieldnames):
+        """Поля, по которым строка из csv сравнивается со строкой в БД.
+
+        Необязательных колонок может не быть в файле, поэтому такие поля
+        в сравнении и обновлении не участвуют.
+        """
+        fields = []
+        for name, column in self.columns.items():
+            if name in self.optional and column not in fieldnames:
+                continue
+            field = self.model._meta.get_field(name)
+            if field.primary_key:
+                continue
+            fields.append(field)
+        return fields
+
+    @contextmanager
+    def file_dates(self):
+        """На время загрузки даты auto_now_add берутся из файла.
+
+        bulk_create вызывает pre_save(add=True), и без этого все отзывы
+        и комментарии получили бы время загрузки.
+        """
+        fields = [
+            field for field in self.model._meta.concrete_fields
+            if getattr(field, 'auto_now_add', False)
+            and field.name in self.columns
+        ]
+        for field in fields:
+            field.auto_now_add = False
+        try:
+            yield
+        finally:
+            for field in fields:
+                field.auto_now_add = True
+
+
+def refresh_title_scores(changes=None):
+    """Пересчитывает суммы оценок произведений.
+
+    bulk_create и bulk_update не вызывают Review.save(). При полной
+    загрузке пересчитываются все произведения, при upsert - только те,
+    чьи отзывы добавились или изменились.
+    """
+    if changes is None:
+        Title.objects.refresh_scores()
+        return
+    title_ids = set()
+    for old, review in changes:
+        title_ids.add(review.title_id)
+        if old is not None:
+            title_ids.add(old.title_id)
+    Title.objects.filter(pk__in=title_ids).refresh_scores()
+
+
+TABLES = {table.name: table for table in (
+    CsvTable(
+        'category', Category, 'category.csv', 'категориям',
+        {'id': 'id', 'name': 'name', 'slug': 'slug'}
+    ),
+    CsvTable(
+        'genre', Genre, 'genre.csv', 'жанрам',
+        {'id': 'id', 'name': 'name', 'slug': 'slug'}
+    ),
+    CsvTable(
+        'titles', Title, 'titles.csv', 'произведениям',
+        {'id': 'id', 'name': 'name', 'year': 'year',
+         'category_id': 'category', 'description': 'description'},
+        optional=('description',)
+    ),
+    CsvTable(
+        'genre_title', Title.genre.through, 'genre_title.csv',
+        'связи жанров и произведений',
+        {'id': 'id', 'title_id': 'title_id', 'genre_id': 'genre_id'}
+    ),
+    CsvTable(
+        'users', User, 'users.csv', 'пользователям',
+        {'id': 'id', 'username': 'username', 'email': 'email',
+         'role': 'role', 'bio': 'bio', 'first_name': 'first_name',
+         'last_name': 'last_name'}
+    ),
+    CsvTable(
+        'review', Review, 'review.csv', 'отзывам',
+        {'id': 'id', 'title_id': 'title_id', 'text': 'text',
+         'author_id': 'author', 'score': 'score', 'pub_date': 'pub_date'},
+        after_load=refresh_title_scores
+    ),
+    CsvTable(
+        'comments', Comment, 'comments.csv', 'комментариям',
+        {'id': 'id', 'review_id': 'review_id', 'text': 'text',
+         'author_id': 'author', 'pub_date': 'pub_date'}
+    ),
+)}
+
+
+def get_dependencies(tables=TABLES):
+    """Строит граф зависимостей таблиц по внешним ключам моделей."""
+    by_model = {table.model: name for name, table in tables.items()}
+    return {
+        name: {
+            by_model[field.related_model]
+            for field in table.model._meta.concrete_fields
+            if field.is_relation
+            and field.related_model in by_model
+            and field.related_model is not table.model
+        }
+        for name, table in tables.items()
+    }
+
+
+def get_load_order(tables=TABLES):
+    """Возвращает имена таблиц так, что зависимости идут раньше."""
+    dependencies = get_dependencies(tables)
+    order = []
+    while len(order) < len(dependencies):
+        ready = [
+            name for name, required in dependencies.items()
+            if name not in order and required.issubset(order)
+        ]
+        if not ready:
+            raise ValueError('Циклическая зависимость между таблицами')
+        order.extend(ready)
+    return order
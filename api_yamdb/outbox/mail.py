@@ -0,0 +1,113 @@
+"""Очередь исходящих писем.
+
+send_mail_later сохраняет письмо в OutboxMessage в текущей транзакции,
+поэтому оно уходит только вместе с данными, ради которых написано.
+deliver отправляет накопившиеся письма пачкой через одно соединение
+с почтовым бэкендом и откладывает неудачные с растущей паузой.
+"""
+from datetime import timedelta
+from uuid import uuid4
+
+from django.conf import settings
+from django.core.mail import EmailMessage, get_connection
+from django.db import transaction
+from django.db.models import F
+from django.utils import timezone
+
+from .models import OutboxMessage
+
+DEFAULT_BATCH_SIZE = 100
+# Письма обработчика, который упал посреди пачки, через это время
+# снова попадут в очередь.
+LEASE = timedelta(minutes=5)
+
+
+def send_mail_later(subject, message, from_email, recipient_list):
+    """Ставит письмо в очередь; аргументы как у send_mail."""
+    outbox_message = OutboxMessage.objects.create(
+        subject=subject,
+        body=message,
+        from_email=from_email or settings.DEFAULT_FROM_EMAIL,
+        recipients=list(recipient_list),
+    )
+    if settings.EMAIL_OUTBOX_EAGER:
+        transaction.on_commit(lambda: deliver(pks=[outbox_message.pk]))
+    return outbox_message
+
+
+def retry_delay(attempts):
+    return timedelta(
+        seconds=settings.EMAIL_OUTBOX_RETRY_DELAY * 2 ** (attempts - 1))
+
+
+def claim(batch_size, pks=None):
+    """Берёт в работу до batch_size писем, которым пора уйти.
+
+    Условие на status и send_after повторяется в UPDATE, так что
+    письмо, которое успел забрать другой обработчик, не уйдёт дважды.
+    """
+    now = timezone.now()
+    due = OutboxMessage.objects.filter(
+        status=OutboxMessage.Status.Pending, send_after__lte=now)
+    pending = due if pks is None else due.filter(pk__in=pks)
+    batch = list(pending.order_by('send_after', 'id').values_list(
+        'pk', flat=True)[:batch_size])
+    if not batch:
+        return []
+    lock_id = uuid4()
+    due.filter(pk__in=batch).update(
+        lock_id=lock_id,
+        send_after=now + LEASE,
+        attempts=F('attempts') + 1,
+    )
+    return list(OutboxMessage.objects.filter(lock_id=lock_id))
+
+
+def reschedule(message, error):
+    message.lock_id = None
+    message.last_error = f'{type(error).__name__}: {error}'
+    if message.attempts >= settings.EMAIL_OUTBOX_MAX_ATTEMPTS:
+        message.status = OutboxMessage.Status.Failed
+    else:
+        message.send_after = timezone.now() + retry_delay(message.attempts)
+    message.save(
+        update_fields=('lock_id', 'last_error', 'status', 'send_after'))
+
+
+def deliver(batch_size=DEFAULT_BATCH_SIZE, connection=None, pks=None):
+    """Отправляет одну пачку писем и возвращает (отправлено, неудачно).
+
+    Переданное соединение остаётся открытым, чтобы следующая пачка
+    ушла через него же; собственное закрывается в конце.
+    """
+    messages = claim(batch_size, pks)
+    if not messages:
+        return 0, 0
+    owns_connection = connection is None
+    if owns_connection:
+        connection = get_connection()
+    sent, failed = [], 0
+    try:
+        for message in messages:
+            try:
+                # После ошибки соединение закрыто и открывается заново.
+                connection.open()
+                EmailMessage(
+                    message.subject, message.body, message.from_email,
+                    message.recipients, connection=connection,
+                ).send()
+            except Exception as error:
+                connection.close()
+                reschedule(message, error)
+                failed += 1
+            else:
+                sent.append(message.pk)
+    finally:
+        if owns_connection:
+            connection.close()
+        OutboxMessage.objects.filter(pk__in=sent).update(
+            status=OutboxMessage.Status.Sent,
+            sent_at=timezone.now(),
+            lock_id=None,
+        )
+    return len(sent), failed
@@ -0,0 +1,54 @@
+import time
+
+from django.core.mail import get_connection
+from django.core.management import BaseCommand, CommandError
+
+from outbox.mail import DEFAULT_BATCH_SIZE, deliver
+
+DEFAULT_INTERVAL = 5.0
+
+
+class Command(BaseCommand):
+    help = ("Отправляет письма из очереди outbox пачками через одно "
+            "соединение с почтовым сервером")
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--batch-size',
+            type=int,
+            default=DEFAULT_BATCH_SIZE,
+            help=f'Писем в одной пачке (по умолчанию {DEFAULT_BATCH_SIZE})'
+        )
+        parser.add_argument(
+            '--interval',
+            type=float,
+            default=DEFAULT_INTERVAL,
+            help='Пауза в секундах, когда очередь пуста '
+                 f'(по умолчанию {DEFAULT_INTERVAL})'
+        )
+        parser.add_argument(
+            '--once',
+            action='store_true',
+            help='Отправить то, что уже пора отправить, и завершиться'
+        )
+
+    def handle(self, *args, **kwargs):
+        if kwargs['batch_size'] < 1:
+            raise CommandError('--batch-size должен быть больше нуля')
+        connection = get_connection()
+        try:
+            while True:
+                sent, failed = deliver(kwargs['batch_size'], connection)
+                if sent or failed:
+                    self.stdout.write(
+                        f'Отправлено писем: {sent}, с ошибкой: {failed}')
+                    continue
+                # Пока очередь пуста, соединение с сервером не держим.
+                connection.close()
+                if kwargs['once']:
+                    break
+                time.sleep(kwargs['interval'])
+        except KeyboardInterrupt:
+            pass
+        finally:
+            connection.close()
@@ -0,0 +1,48 @@
+from django.db import models
+from django.utils import timezone
+from django.utils.translation import gettext_lazy as _
+
+
+class OutboxMessage(models.Model):
+    """Письмо, ожидающее отправки командой send_outbox."""
+
+    class Status(models.TextChoices):
+        Pending = 'pending', _('Pending')
+        Sent = 'sent', _('Sent')
+        Failed = 'failed', _('Failed')
+
+    subject = models.CharField('Тема', max_length=255)
+    body = models.TextField('Текст')
+    from_email = models.CharField('Отправитель', max_length=254)
+    recipients = models.JSONField('Получатели')
+    status = models.CharField(
+        'Статус',
+        max_length=7,
+        choices=Status.choices,
+        default=Status.Pending,
+    )
+    attempts = models.PositiveSmallIntegerField('Попыток', default=0)
+    send_after = models.DateTimeField(
+        'Отправить не раньше',
+        default=timezone.now,
+    )
+    # Метка обработчика, взявшего письмо в работу.
+    lock_id = models.UUIDField(null=True, blank=True, editable=False)
+    last_error = models.TextField('Последняя ошибка', blank=True)
+    created = models.DateTimeField('Создано', auto_now_add=True)
+    sent_at = models.DateTimeField('Отправлено', null=True, blank=True)
+
+    class Meta:
+        ordering = ['id']
+        verbose_name = 'outbox message'
+        verbose_name_plural = 'outbox messages'
+        indexes = (
+            models.Index(
+                fields=['status', 'send_after'],
+                name='outbox_status_send_after_idx'
+            ),
+            models.Index(fields=['lock_id'], name='outbox_lock_id_idx'),
+        )
+
+    def __str__(self):
+        return self.subject
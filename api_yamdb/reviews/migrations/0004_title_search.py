@@ -0,0 +1,76 @@
+from django.db import migrations
+
+
+def fold(column):
+    # unicode61 не снимает диакритику с кириллицы, поэтому ё и е
+    # сводятся к одной букве до индексации; запрос делает то же самое.
+    return f"replace(replace({column}, 'ё', 'е'), 'Ё', 'Е')"
+
+
+INDEXED_VALUES = {
+    prefix: f"{prefix}.id, {fold(f'{prefix}.name')}, "
+            f"{fold(f'{prefix}.description')}"
+    for prefix in ('new', 'old', 'reviews_title')
+}
+
+# Внешний (content=) индекс FTS5 хранит только словарь, сами тексты
+# остаются в reviews_title. Триггеры обновляют его при любой записи,
+# включая bulk_create и сырой SQL. Порядок rank задаёт вес названия
+# в десять раз больше веса описания.
+CREATE_SQL = (
+    "CREATE VIRTUAL TABLE reviews_title_fts USING fts5("
+    "name, description, content='reviews_title', content_rowid='id', "
+    "tokenize='unicode61 remove_diacritics 2')",
+    "INSERT INTO reviews_title_fts(reviews_title_fts, rank) "
+    "VALUES ('rank', 'bm25(10.0, 1.0)')",
+    "CREATE TRIGGER reviews_title_fts_insert AFTER INSERT ON reviews_title "
+    "BEGIN "
+    "INSERT INTO reviews_title_fts(rowid, name, description) "
+    f"VALUES ({INDEXED_VALUES['new']}); "
+    "END",
+    "CREATE TRIGGER reviews_title_fts_delete AFTER DELETE ON reviews_title "
+    "BEGIN "
+    "INSERT INTO reviews_title_fts(reviews_title_fts, rowid, name, "
+    f"description) VALUES ('delete', {INDEXED_VALUES['old']}); "
+    "END",
+    "CREATE TRIGGER reviews_title_fts_update "
+    "AFTER UPDATE OF name, description ON reviews_title "
+    "BEGIN "
+    "INSERT INTO reviews_title_fts(reviews_title_fts, rowid, name, "
+    f"description) VALUES ('delete', {INDEXED_VALUES['old']}); "
+    "INSERT INTO reviews_title_fts(rowid, name, description) "
+    f"VALUES ({INDEXED_VALUES['new']}); "
+    "END",
+    "INSERT INTO reviews_title_fts(rowid, name, description) "
+    f"SELECT {INDEXED_VALUES['reviews_title']} FROM reviews_title",
+)
+
+DROP_SQL = (
+    "DROP TRIGGER IF EXISTS reviews_title_fts_insert",
+    "DROP TRIGGER IF EXISTS reviews_title_fts_delete",
+    "DROP TRIGGER IF EXISTS reviews_title_fts_update",
+    "DROP TABLE IF EXISTS reviews_title_fts",
+)
+
+
+def run_on_sqlite(statements):
+    def run(apps, schema_editor):
+        # На других СУБД TitleQuerySet.search обходится без индекса.
+        if schema_editor.connection.vendor != 'sqlite':
+            return
+        for statement in statements:
+            schema_editor.execute(statement, params=None)
+    return run
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('reviews', '0003_access_pattern_indexes'),
+    ]
+
+    operations = [
+        migrations.RunPython(
+            run_on_sqlite(CREATE_SQL), run_on_sqlite(DROP_SQL)
+        ),
+    ]
@@ -1,4 +1,8 @@
-from django.db import models
+import re
+
+from django.db import connections, models, transaction
+from django.db.models import F, OuterRef, Q, Subquery, Sum, Count
+from django.db.models.functions import Coalesce
 from django.core.validators import MaxValueValidator, MinValueValidator
 from django.contrib.auth import get_user_model
 
@@ -6,6 +10,12 @@ from .validators import validate_year
 
 User = get_user_model()
 
+# Индекс FTS5 по названию и описанию, см. миграцию 0004_title_search.
+# Триггеры, пропавшие при пересоздании reviews_title, восстанавливает
+# reviews.search после migrate.
+TITLE_SEARCH_TABLE = 'reviews_title_fts'
+SEARCH_TERM_RE = re.compile(r'\w+')
+
 
 class NameInfo(models.Model):
     name = models.CharField(max_length=256, verbose_name='abstract name')
@@ -40,6 +50,63 @@ class Category(NameInfo):
         ordering = ["slug"]
 
 
+class TitleQuerySet(models.QuerySet):
+
+    def refresh_scores(self):
+        """Пересчитывает сумму и количество оценок по таблице отзывов."""
+        reviews = Review.objects.filter(
+            title=OuterRef('pk')
+        ).order_by().values('title')
+        return self.update(
+            score_sum=Coalesce(
+                Subquery(reviews.annotate(total=Sum('score')).values('total')),
+                0
+            ),
+            score_count=Coalesce(
+                Subquery(reviews.annotate(total=Count('pk')).values('total')),
+                0
+            ),
+        )
+
+    def shift_scores(self, score_delta, count_delta):
+        return self.update(
+            score_sum=F('score_sum') + score_delta,
+            score_count=F('score_count') + count_delta,
+        )
+
+    def search(self, query):
+        """Ищет произведения, где есть все слова запроса как префиксы.
+
+        На SQLite выборка идёт по индексу FTS5 и упорядочена по
+        релевантности, на других СУБД - icontains по обоим полям.
+        """
+        terms = SEARCH_TERM_RE.findall(query)
+        if not terms:
+            return self.none()
+        if connections[self.db].vendor != 'sqlite':
+            condition = Q()
+            for term in terms:
+                condition &= (Q(name__icontains=term)
+                              | Q(description__icontains=term))
+            return self.filter(condition)
+        # Слова в кавычках не разбираются как синтаксис запроса FTS5,
+        # ё заменяется на е, как в триггерах индекса.
+        match = ' '.join(
+            f'"{term}"*'.replace('ё', 'е').replace('Ё', 'Е')
+            for term in terms
+        )
+        return self.extra(
+            select={'search_rank': f'{TITLE_SEARCH_TABLE}.rank'},
+            tables=[TITLE_SEARCH_TABLE],
+            where=[
+                f'{TITLE_SEARCH_TABLE}.rowid = {self.model._meta.db_table}.id',
+                f'{TITLE_SEARCH_TABLE} MATCH %s',
+            ],
+            params=[match],
+            order_by=['search_rank', 'id'],
+        )
+
+
 class Title(models.Model):
     name = models.CharField(max_length=256, verbose_name='title of the work')
     year = models.IntegerField(
@@ -58,15 +125,40 @@ class Title(models.Model):
         Category, on_delete=models.SET_NULL,
         related_name='titles', blank=True, null=True,
         verbose_name='category of the work')
+    score_sum = models.PositiveIntegerField(
+        default=0,
+        editable=False,
+        verbose_name='sum of review scores')
+    score_count = models.PositiveIntegerField(
+        default=0,
+        editable=False,
+        verbose_name='number of review scores')
+
+    objects = TitleQuerySet.as_manager()
 
     class Meta:
         ordering = ["name"]
         verbose_name = 'title'
         verbose_name_plural = 'titles'
+        indexes = (
+            models.Index(fields=['year'], name='title_year_idx'),
+            models.Index(fields=['name', 'year'], name='title_name_year_idx'),
+            models.Index(
+                fields=['category', 'year'],
+                name='title_category_year_idx'
+            ),
+        )
 
     def __str__(self):
         return self.name
 
+    @property
+    def rating(self):
+        # Целочисленное деление повторяет Avg(..., output_field=IntegerField)
+        if not self.score_count:
+            return None
+        return self.score_sum // self.score_count
+
 
 class Review(models.Model):
 
@@ -105,6 +197,12 @@ class Review(models.Model):
         ordering = ('-pub_date',)
         verbose_name = 'review'
         verbose_name_plural = 'reviews'
+        indexes = (
+            models.Index(
+                fields=['title', '-pub_date', '-id'],
+                name='review_title_pub_date_idx'
+            ),
+        )
         constraints = (
             models.UniqueConstraint(
                 fields=[
@@ -115,6 +213,33 @@ class Review(models.Model):
             ),
         )
 
+    @classmethod
+    def from_db(cls, db, field_names, values):
+        instance = super().from_db(db, field_names, values)
+        loaded = dict(zip(field_names, values))
+        if 'title_id' in loaded and 'score' in loaded:
+            instance._loaded_score = (loaded['title_id'], loaded['score'])
+        return instance
+
+    def save(self, *args, **kwargs):
+        loaded = getattr(self, '_loaded_score', None)
+        with transaction.atomic():
+            if loaded is None and not self._state.adding:
+                loaded = Review.objects.filter(pk=self.pk).values_list(
+                    'title_id', 'score').first()
+            super().save(*args, **kwargs)
+            score = int(self.score)
+            if loaded is None:
+                Title.objects.filter(pk=self.title_id).shift_scores(score, 1)
+            elif loaded[0] != self.title_id:
+                Title.objects.filter(pk=loaded[0]).shift_scores(
+                    -loaded[1], -1)
+                Title.objects.filter(pk=self.title_id).shift_scores(score, 1)
+            elif loaded[1] != score:
+                Title.objects.filter(pk=self.title_id).shift_scores(
+                    score - loaded[1], 0)
+        self._loaded_score = (self.title_id, score)
+
 
 class Comment(models.Model):
 
@@ -140,3 +265,9 @@ class Comment(models.Model):
         ordering = ('-pub_date',)
         verbose_name = 'comment'
         verbose_name_plural = 'comments'
+        indexes = (
+            models.Index(
+                fields=['review', '-pub_date', '-id'],
+                name='comment_review_pub_date_idx'
+            ),
+        )
@@ -0,0 +1,79 @@
+"""Триггеры индекса FTS5 по произведениям.
+
+Миграция 0004_title_search создаёт индекс и триггеры, но на SQLite
+Django пересоздаёт таблицу reviews_title при AddField и AlterField, и
+триггеры пропадают вместе со старой таблицей. Поэтому после каждого
+migrate недостающие триггеры создаются заново, а индекс, который мог
+отстать от таблицы, перестраивается.
+"""
+from django.db import connections
+
+
+def fold(column):
+    # То же, что в миграции: ё и е сводятся к одной букве.
+    return f"replace(replace({column}, 'ё', 'е'), 'Ё', 'Е')"
+
+
+INDEXED_VALUES = {
+    prefix: f"{prefix}.id, {fold(f'{prefix}.name')}, "
+            f"{fold(f'{prefix}.description')}"
+    for prefix in ('new', 'old', 'reviews_title')
+}
+TRIGGERS_SQL = {
+    'reviews_title_fts_insert': (
+        "CREATE TRIGGER IF NOT EXISTS reviews_title_fts_insert "
+        "AFTER INSERT ON reviews_title "
+        "BEGIN "
+        "INSERT INTO reviews_title_fts(rowid, name, description) "
+        f"VALUES ({INDEXED_VALUES['new']}); "
+        "END"
+    ),
+    'reviews_title_fts_delete': (
+        "CREATE TRIGGER IF NOT EXISTS reviews_title_fts_delete "
+        "AFTER DELETE ON reviews_title "
+        "BEGIN "
+        "INSERT INTO reviews_title_fts(reviews_title_fts, rowid, name, "
+        f"description) VALUES ('delete', {INDEXED_VALUES['old']}); "
+        "END"
+    ),
+    'reviews_title_fts_update': (
+        "CREATE TRIGGER IF NOT EXISTS reviews_title_fts_update "
+        "AFTER UPDATE OF name, description ON reviews_title "
+        "BEGIN "
+        "INSERT INTO reviews_title_fts(reviews_title_fts, rowid, name, "
+        f"description) VALUES ('delete', {INDEXED_VALUES['old']}); "
+        "INSERT INTO reviews_title_fts(rowid, name, description) "
+        f"VALUES ({INDEXED_VALUES['new']}); "
+        "END"
+    ),
+}
+# 'rebuild' читал бы тексты без замены ё, поэтому индекс очищается и
+# заполняется заново тем же выражением, что в триггерах.
+REINDEX_SQL = (
+    "INSERT INTO reviews_title_fts(reviews_title_fts) VALUES ('delete-all')",
+    "INSERT INTO reviews_title_fts(rowid, name, description) "
+    f"SELECT {INDEXED_VALUES['reviews_title']} FROM reviews_title",
+)
+
+
+def ensure_title_search(using='default', **kwargs):
+    """Восстанавливает триггеры индекса после migrate (post_migrate)."""
+    connection = connections[using]
+    if connection.vendor != 'sqlite':
+        return
+    with connection.cursor() as cursor:
+        cursor.execute(
+            "SELECT type, name FROM sqlite_master "
+            "WHERE name = 'reviews_title_fts' OR type = 'trigger'"
+        )
+        existing = {name for _, name in cursor.fetchall()}
+        # Миграция 0004 ещё не применена или уже откачена.
+        if 'reviews_title_fts' not in existing:
+            return
+        missing = set(TRIGGERS_SQL) - existing
+        if not missing:
+            return
+        for name in sorted(missing):
+            cursor.execute(TRIGGERS_SQL[name])
+        for statement in REINDEX_SQL:
+            cursor.execute(statement)
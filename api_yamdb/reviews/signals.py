@@ -0,0 +1,13 @@
+from django.db.models.signals import post_delete
+from django.dispatch import receiver
+
+from .models import Review, Title
+
+
+@receiver(post_delete, sender=Review)
+def review_deleted(sender, instance, **kwargs):
+    # Collector.delete() уже открыл транзакцию, обновление попадает в неё.
+    title_id, score = getattr(
+        instance, '_loaded_score', (instance.title_id, instance.score)
+    )
+    Title.objects.filter(pk=title_id).shift_scores(-int(score), -1)
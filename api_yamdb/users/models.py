@@ -1,6 +1,9 @@
 from django.contrib.auth.models import AbstractUser
 from django.utils.translation import gettext_lazy as _
-from django.db import models
+from django.db import connections, models, router
+
+# Несколько ON CONFLICT и RETURNING появились в SQLite 3.35.
+SQLITE_UPSERT_VERSION = (3, 35, 0)
 
 
 class CustomUser(AbstractUser):
@@ -30,5 +33,64 @@ class CustomUser(AbstractUser):
     def is_moderator(self):
         return self.role == CustomUser.Role.Moderator
 
+    @classmethod
+    def set_confirmation_code(cls, username, email, code):
+        """Создаёт пользователя или меняет код подтверждения существующему.
+
+        Код меняется, только если username и email принадлежат одному
+        пользователю. Возвращает id или None, если username или email
+        занят другим пользователем. На SQLite 3.35+ это один запрос
+        INSERT ... ON CONFLICT ... RETURNING.
+        """
+        using = router.db_for_write(cls)
+        connection = connections[using]
+        if (connection.vendor != 'sqlite'
+                or connection.Database.sqlite_version_info
+                < SQLITE_UPSERT_VERSION):
+            return cls._set_confirmation_code(username, email, code)
+        user = cls(username=username, email=email, confirmation_code=code)
+        fields = [
+            field for field in cls._meta.concrete_fields
+            if field is not cls._meta.auto_field
+        ]
+        qn = connection.ops.quote_name
+        table = qn(cls._meta.db_table)
+        username_column, email_column, code_column = (
+            qn(cls._meta.get_field(name).column)
+            for name in ('username', 'email', 'confirmation_code')
+        )
+        sql = (
+            f'INSERT INTO {table} '
+            f'({", ".join(qn(field.column) for field in fields)}) '
+            f'VALUES ({", ".join(["%s"] * len(fields))}) '
+            f'ON CONFLICT ({username_column}) DO UPDATE SET '
+            f'{code_column} = excluded.{code_column} '
+            f'WHERE {table}.{email_column} = excluded.{email_column} '
+            f'ON CONFLICT ({email_column}) DO NOTHING '
+            f'RETURNING {qn(cls._meta.pk.column)}'
+        )
+        params = [
+            field.get_db_prep_save(field.pre_save(user, True), connection)
+            for field in fields
+        ]
+        with connection.cursor() as cursor:
+            cursor.execute(sql, params)
+            row = cursor.fetchone()
+        return row[0] if row else None
+
+    @classmethod
+    def _set_confirmation_code(cls, username, email, code):
+        updated = cls.objects.filter(
+            username=username, email=email
+        ).update(confirmation_code=code)
+        if updated:
+            return cls.objects.get(username=username).pk
+        if cls.objects.filter(
+            models.Q(username=username) | models.Q(email=email)
+        ).exists():
+            return None
+        return cls.objects.create(
+            username=username, email=email, confirmation_code=code).pk
+
     class Meta:
         ordering = ["username"]
@@ -0,0 +1,86 @@
+"""Сравнение FastJSONRenderer/FastJSONParser со стандартными из DRF.
+
+Строит страницу из 100 произведений так же, как TitleViewSet, на
+синтетических данных во временной базе в памяти и замеряет рендеринг
+и разбор этой страницы.
+
+    python benchmarks/json_renderer.py --items 100 --repeat 200
+"""
+import argparse
+import io
+import os
+import sys
+import timeit
+from collections import OrderedDict
+from pathlib import Path
+
+BASE_DIR = Path(__file__).resolve().parent.parent
+sys.path[:0] = [str(BASE_DIR / 'api_yamdb'), str(BASE_DIR)]
+os.environ.setdefault('DJANGO_SETTINGS_MODULE', 'benchmarks.settings')
+os.environ['BENCH_DB'] = ':memory:'
+
+
+def build_page(items):
+    from django.core.management import call_command
+
+    from api.serializers import TitleSerializerGet
+    from api.views import TitleViewSet
+
+    call_command('migrate', verbosity=0)
+    call_command('generate_data', load=True, titles=items, users=items,
+                 reviews=items * 10, comments=0, stdout=io.StringIO())
+    titles = TitleViewSet.queryset[:items]
+    return OrderedDict([
+        ('count', items),
+        ('next', 'http://testserver/api/v1/titles/?page=2'),
+        ('previous', None),
+        ('results', TitleSerializerGet(titles, many=True).data),
+    ])
+
+
+def measure(function, repeat):
+    # Лучший из пяти прогонов меньше всего зависит от фоновой нагрузки.
+    return min(timeit.repeat(function, number=repeat, repeat=5)) / repeat
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument('--items', type=int, default=100)
+    parser.add_argument('--repeat', type=int, default=200)
+    args = parser.parse_args()
+
+    import django
+    django.setup()
+    from rest_framework.parsers import JSONParser
+    from rest_framework.renderers import JSONRenderer
+
+    from api.parsers import FastJSONParser
+    from api.renderers import FastJSONRenderer
+
+    page = build_page(args.items)
+    body = JSONRenderer().render(page)
+    assert FastJSONRenderer().render(page) == body, 'Результаты отличаются'
+    print(f'Страница из {args.items} произведений, {len(body)} байт')
+
+    for action, standard, fast in (
+        ('render', JSONRenderer(), FastJSONRenderer()),
+        ('parse', JSONParser(), FastJSONParser()),
+    ):
+        if action == 'render':
+            def run(renderer):
+                return lambda: renderer.render(page)
+        else:
+            def run(parser):
+                return lambda: parser.parse(io.BytesIO(body))
+        standard_time = measure(run(standard), args.repeat)
+        fast_time = measure(run(fast), args.repeat)
+        print(
+            f'{action:<8} {type(standard).__name__:<14}'
+            f'{standard_time * 1e6:9.1f} мкс   '
+            f'{type(fast).__name__:<18}{fast_time * 1e6:9.1f} мкс   '
+            f'x{standard_time / fast_time:.1f}'
+        )
+
+
+if __name__ == '__main__':
+    main()
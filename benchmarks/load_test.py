@@ -0,0 +1,354 @@
+"""Нагрузочный тест всех эндпоинтов /api/v1.
+
+Запускает проект на отдельной базе с синтетическими данными, гоняет
+конкурентный трафик по смеси маршрутов и печатает пропускную
+способность и задержки p50/p95/p99 по каждому маршруту. Результат
+сохраняется в benchmarks/results/<имя>.json, и с ним можно сравнить
+следующий прогон. Нужен только Python и зависимости проекта, сеть
+не используется.
+
+    python benchmarks/load_test.py --save before
+    python benchmarks/load_test.py --compare before
+"""
+import argparse
+import http.client
+import json
+import os
+import random
+import socket
+import subprocess
+import sys
+import threading
+import time
+import uuid
+from pathlib import Path
+
+BASE_DIR = Path(__file__).resolve().parent.parent
+PROJECT_DIR = BASE_DIR / 'api_yamdb'
+RESULTS_DIR = Path(__file__).resolve().parent / 'results'
+SETTINGS_MODULE = 'benchmarks.settings'
+
+sys.path[:0] = [str(PROJECT_DIR), str(BASE_DIR)]
+os.environ.setdefault('DJANGO_SETTINGS_MODULE', SETTINGS_MODULE)
+
+BENCH_USER = 'bench_user'
+BENCH_ADMIN = 'bench_admin'
+BENCH_CODE = 'bench-confirmation-code'
+
+# Имя маршрута совпадает с url_name роутера, вес - доля в смеси.
+ROUTES = (
+    ('title-list', 'GET', '/api/v1/titles/', None, 20),
+    ('title-list-filter', 'GET', '/api/v1/titles/?genre=genre-1', None, 5),
+    ('title-detail', 'GET', '/api/v1/titles/{title}/', None, 15),
+    ('category-list', 'GET', '/api/v1/categories/', None, 5),
+    ('genre-list', 'GET', '/api/v1/genres/', None, 5),
+    ('reviews-list', 'GET', '/api/v1/titles/{title}/reviews/', None, 15),
+    ('reviews-list-deep', 'GET',
+     '/api/v1/titles/{hot_title}/reviews/?page={deep_page}', None, 3),
+    ('reviews-detail', 'GET',
+     '/api/v1/titles/{hot_title}/reviews/{review}/', None, 5),
+    ('comments-list', 'GET',
+     '/api/v1/titles/{hot_title}/reviews/{review}/comments/', None, 10),
+    ('users-list', 'GET', '/api/v1/users/', 'admin', 3),
+    ('users-me', 'GET', '/api/v1/users/me/', 'user', 5),
+    ('auth-signup', 'POST', '/api/v1/auth/signup/', None, 2),
+    ('auth-token', 'POST', '/api/v1/auth/token/', None, 2),
+)
+
+
+def setup_django():
+    import django
+    django.setup()
+
+
+def seed(args):
+    """Создаёт базу, заполняет её и возвращает параметры для запросов."""
+    from django.conf import settings
+    from django.core.cache import cache
+    from django.core.management import call_command
+
+    db_path = Path(settings.DATABASES['default']['NAME'])
+    db_path.parent.mkdir(parents=True, exist_ok=True)
+    if args.reseed and db_path.exists():
+        db_path.unlink()
+    created = not db_path.exists()
+    if created:
+        print(f'Создаём базу {db_path}...')
+    # База от прошлых прогонов могла отстать от новых миграций.
+    call_command('migrate', verbosity=0)
+    if created:
+        # Файловый кеш переживает базу: ответы старой базы не нужны.
+        cache.clear()
+        call_command(
+            'generate_data', load=True, titles=args.titles,
+            users=args.users, reviews=args.reviews, comments=args.comments,
+            seed=0
+        )
+    return make_fixtures()
+
+
+def make_fixtures():
+    from django.contrib.auth import get_user_model
+    from django.db.models import Count
+
+    from api.authentication import get_access_token
+    from reviews.models import Review, Title
+
+    User = get_user_model()
+    user, _ = User.objects.update_or_create(
+        username=BENCH_USER,
+        defaults={'email': 'bench_user@yamdb.fake',
+                  'confirmation_code': BENCH_CODE}
+    )
+    admin, _ = User.objects.update_or_create(
+        username=BENCH_ADMIN,
+        defaults={'email': 'bench_admin@yamdb.fake', 'role': 'admin'}
+    )
+    hot_title = Title.objects.order_by('-score_count').first()
+    review = (Review.objects.filter(title=hot_title)
+              .annotate(comment_count=Count('comments'))
+              .order_by('-comment_count').first())
+    return {
+        'titles': list(Title.objects.values_list('id', flat=True)[:1000]),
+        'hot_title': hot_title.id,
+        'deep_page': max(1, hot_title.score_count // 5),
+        'review': review.id,
+        'tokens': {
+            'user': str(get_access_token(user)),
+            'admin': str(get_access_token(admin)),
+        },
+    }
+
+
+def start_server(port):
+    env = dict(
+        os.environ,
+        DJANGO_SETTINGS_MODULE=SETTINGS_MODULE,
+        PYTHONPATH=os.pathsep.join(
+            [str(PROJECT_DIR), str(BASE_DIR), os.environ.get('PYTHONPATH', '')]
+        ),
+    )
+    server = subprocess.Popen(
+        [sys.executable, str(PROJECT_DIR / 'manage.py'), 'runserver',
+         f'127.0.0.1:{port}', '--noreload'],
+        env=env, stdout=subprocess.DEVNULL, stderr=subprocess.DEVNULL,
+    )
+    deadline = time.monotonic() + 30
+    while time.monotonic() < deadline:
+        if server.poll() is not None:
+            raise RuntimeError('Сервер не запустился')
+        try:
+            socket.create_connection(('127.0.0.1', port), timeout=1).close()
+            return server
+        except OSError:
+            time.sleep(0.2)
+    server.terminate()
+    raise RuntimeError('Сервер не ответил за 30 секунд')
+
+
+class Worker(threading.Thread):
+    """Поток с собственным keep-alive соединением к серверу."""
+
+    def __init__(self, port, routes, fixtures, stop_at, seed):
+        super().__init__(daemon=True)
+        self.port = port
+        self.routes = routes
+        self.fixtures = fixtures
+        self.stop_at = stop_at
+        self.rng = random.Random(seed)
+        self.latencies = {name: [] for name, *_ in routes}
+        self.errors = {name: 0 for name, *_ in routes}
+        self.connection = None
+
+    def build_request(self, method, path, auth):
+        fixtures = self.fixtures
+        path = path.format(
+            title=self.rng.choice(fixtures['titles']),
+            hot_title=fixtures['hot_title'],
+            review=fixtures['review'],
+            deep_page=fixtures['deep_page'],
+        )
+        headers = {'Content-Type': 'application/json'}
+        if auth:
+            headers['Authorization'] = f'Bearer {fixtures["tokens"][auth]}'
+        body = None
+        if path.endswith('/signup/'):
+            name = f'bench{uuid.uuid4().hex[:12]}'
+            body = {'username': name, 'email': f'{name}@yamdb.fake'}
+        elif path.endswith('/token/'):
+            body = {'username': BENCH_USER, 'confirmation_code': BENCH_CODE}
+        return path, headers, body and json.dumps(body)
+
+    def request(self, method, path, headers, body):
+        if self.connection is None:
+            self.connection = http.client.HTTPConnection(
+                '127.0.0.1', self.port, timeout=30)
+        try:
+            self.connection.request(method, path, body=body, headers=headers)
+            response = self.connection.getresponse()
+            response.read()
+            return response.status
+        except (OSError, http.client.HTTPException):
+            self.connection.close()
+            self.connection = None
+            return None
+
+    def run(self):
+        weights = [route[-1] for route in self.routes]
+        while time.monotonic() < self.stop_at:
+            name, method, path, auth, _ = self.rng.choices(
+                self.routes, weights)[0]
+            path, headers, body = self.build_request(method, path, auth)
+            started = time.perf_counter()
+            status = self.request(method, path, headers, body)
+            elapsed = time.perf_counter() - started
+            if status is None or status >= 400:
+                self.errors[name] += 1
+            else:
+                self.latencies[name].append(elapsed)
+
+
+def percentile(values, share):
+    if not values:
+        return None
+    index = min(len(values) - 1, max(0, round(share * len(values)) - 1))
+    return values[index]
+
+
+def run_load(port, routes, fixtures, concurrency, duration):
+    stop_at = time.monotonic() + duration
+    workers = [
+        Worker(port, routes, fixtures, stop_at, seed)
+        for seed in range(concurrency)
+    ]
+    started = time.monotonic()
+    for worker in workers:
+        worker.start()
+    for worker in workers:
+        worker.join()
+    elapsed = time.monotonic() - started
+
+    report = {}
+    for name, *_ in routes:
+        latencies = sorted(
+            value for worker in workers for value in worker.latencies[name]
+        )
+        errors = sum(worker.errors[name] for worker in workers)
+        report[name] = {
+            'requests': len(latencies),
+            'errors': errors,
+            'rps': round(len(latencies) / elapsed, 2),
+            **{
+                f'p{int(share * 100)}_ms': (
+                    None if percentile(latencies, share) is None
+                    else round(percentile(latencies, share) * 1000, 2)
+                )
+                for share in (0.5, 0.95, 0.99)
+            },
+        }
+    return report
+
+
+def print_report(report, baseline=None):
+    columns = ('requests', 'errors', 'rps', 'p50_ms', 'p95_ms', 'p99_ms')
+    print(f'{"route":<20}' + ''.join(f'{column:>18}' for column in columns))
+    for name, row in report.items():
+        cells = []
+        for column in columns:
+            value = row[column]
+            cell = '-' if value is None else f'{value}'
+            base = (baseline or {}).get(name, {}).get(column)
+            if base and value is not None and column in (
+                    'rps', 'p50_ms', 'p95_ms', 'p99_ms'):
+                cell += f' ({(value - base) / base * 100:+.0f}%)'
+            cells.append(f'{cell:>18}')
+        print(f'{name:<20}' + ''.join(cells))
+
+
+def git_commit():
+    try:
+        return subprocess.check_output(
+            ['git', 'rev-parse', '--short', 'HEAD'], cwd=BASE_DIR,
+            stderr=subprocess.DEVNULL, text=True
+        ).strip()
+    except (OSError, subprocess.CalledProcessError):
+        return None
+
+
+def load_baseline(name):
+    path = Path(name)
+    if not path.exists():
+        path = RESULTS_DIR / f'{name}.json'
+    with open(path, encoding='utf-8') as baseline_file:
+        return json.load(baseline_file)
+
+
+def parse_args():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument('--duration', type=float, default=20,
+                        help='Длительность замера в секундах')
+    parser.add_argument('--warmup', type=float, default=3,
+                        help='Прогрев перед замером в секундах')
+    parser.add_argument('--concurrency', type=int, default=8,
+                        help='Число одновременных клиентов')
+    parser.add_argument('--port', type=int, default=8765)
+    parser.add_argument('--routes', nargs='+',
+                        choices=[route[0] for route in ROUTES],
+                        help='Нагружать только эти маршруты')
+    parser.add_argument('--reseed', action='store_true',
+                        help='Пересоздать базу с данными')
+    parser.add_argument('--titles', type=int, default=2000)
+    parser.add_argument('--users', type=int, default=2000)
+    parser.add_argument('--reviews', type=int, default=50000)
+    parser.add_argument('--comments', type=int, default=100000)
+    parser.add_argument('--save', metavar='NAME',
+                        help='Сохранить результат в results/NAME.json '
+                             '(по умолчанию - хеш текущего коммита)')
+    parser.add_argument('--compare', metavar='NAME',
+                        help='Сравнить с сохранённым результатом '
+                             '(имя в results/ или путь к файлу)')
+    return parser.parse_args()
+
+
+def main():
+    args = parse_args()
+    setup_django()
+    fixtures = seed(args)
+    routes = [
+        route for route in ROUTES
+        if not args.routes or route[0] in args.routes
+    ]
+    server = start_server(args.port)
+    try:
+        if args.warmup:
+            run_load(args.port, routes, fixtures, args.concurrency,
+                     args.warmup)
+        report = run_load(args.port, routes, fixtures, args.concurrency,
+                          args.duration)
+    finally:
+        server.terminate()
+        server.wait()
+
+    baseline = load_baseline(args.compare) if args.compare else None
+    print_report(report, baseline and baseline['routes'])
+
+    commit = git_commit()
+    RESULTS_DIR.mkdir(exist_ok=True)
+    name = args.save or commit or time.strftime('%Y%m%d-%H%M%S')
+    result_path = RESULTS_DIR / f'{name}.json'
+    with open(result_path, 'w', encoding='utf-8') as result_file:
+        json.dump({
+            'commit': commit,
+            'created': time.strftime('%Y-%m-%dT%H:%M:%S'),
+            'config': {
+                key: getattr(args, key)
+                for key in ('duration', 'concurrency', 'titles', 'users',
+                            'reviews', 'comments')
+            },
+            'routes': report,
+        }, result_file, indent=2)
+    print(f'Результат сохранён в {result_path}')
+
+
+if __name__ == '__main__':
+    main()
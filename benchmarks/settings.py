@@ -0,0 +1,40 @@
+"""Настройки для нагрузочного тестирования.
+
+Совпадают с боевыми, но работают с отдельной базой и без DEBUG, чтобы
+не копить запросы в connection.queries и не искажать замеры.
+"""
+import os
+from pathlib import Path
+
+from api_yamdb.settings import *  # noqa: F401,F403
+
+BENCH_DATA_DIR = Path(
+    os.environ.get('BENCH_DATA_DIR', Path(__file__).resolve().parent / '.data')
+)
+
+DEBUG = False
+
+DATABASES = {
+    'default': {
+        'ENGINE': 'django.db.backends.sqlite3',
+        'NAME': os.environ.get('BENCH_DB', BENCH_DATA_DIR / 'bench.sqlite3'),
+    }
+}
+
+EMAIL_FILE_PATH = BENCH_DATA_DIR / 'sent_emails'
+
+CACHES = {
+    'default': {
+        **CACHES['default'],  # noqa: F405
+        'LOCATION': str(BENCH_DATA_DIR / 'cache'),
+    }
+}
+
+# Запросы нагрузочного теста идут с одного адреса и от одного
+# пользователя: с лимитами auth/signup и auth/token почти сразу
+# отвечали бы 429.
+REST_FRAMEWORK = {
+    **REST_FRAMEWORK,  # noqa: F405
+    'DEFAULT_THROTTLE_RATES': {'auth_ip': None, 'auth_username': None},
+}
+THROTTLE_STORE_PATH = str(BENCH_DATA_DIR / 'throttle.sqlite3')
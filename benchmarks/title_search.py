@@ -0,0 +1,69 @@
+"""Сравнение поиска произведений через FTS5 с поиском через icontains.
+
+Для каждого размера каталога заново заполняет базу в памяти через
+generate_data и замеряет первую страницу выдачи по каждому слову: по
+частому слову icontains быстро набирает страницу и останавливается, а
+по редкому или отсутствующему просматривает всю таблицу.
+
+    python benchmarks/title_search.py --sizes 1000,10000,50000
+"""
+import argparse
+import io
+import os
+import sys
+import timeit
+from pathlib import Path
+
+BASE_DIR = Path(__file__).resolve().parent.parent
+sys.path[:0] = [str(BASE_DIR / 'api_yamdb'), str(BASE_DIR)]
+os.environ.setdefault('DJANGO_SETTINGS_MODULE', 'benchmarks.settings')
+os.environ['BENCH_DB'] = ':memory:'
+
+
+def fill(titles):
+    from django.core.management import call_command
+
+    call_command('flush', interactive=False, verbosity=0)
+    call_command('generate_data', load=True, titles=titles, users=10,
+                 reviews=0, comments=0, stdout=io.StringIO())
+
+
+def measure(function, repeat):
+    return min(timeit.repeat(function, number=repeat, repeat=5)) / repeat
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument('--sizes', default='1000,10000,50000')
+    parser.add_argument('--terms', default='автор,несуществующее')
+    parser.add_argument('--page-size', type=int, default=10)
+    parser.add_argument('--repeat', type=int, default=20)
+    args = parser.parse_args()
+
+    import django
+    django.setup()
+    from django.core.management import call_command
+    from django.db.models import Q
+
+    from reviews.models import Title
+
+    call_command('migrate', verbosity=0)
+    for size in map(int, args.sizes.split(',')):
+        fill(size)
+        for term in args.terms.split(','):
+            queries = (
+                ('icontains', Title.objects.filter(
+                    Q(name__icontains=term) | Q(description__icontains=term)
+                )),
+                ('fts5', Title.objects.search(term)),
+            )
+            line = [f'{size:>7} произведений  {term:<16}']
+            for label, queryset in queries:
+                seconds = measure(
+                    lambda: list(queryset[:args.page_size]), args.repeat)
+                line.append(f'{label} {seconds * 1e3:8.2f} мс')
+            print('   '.join(line))
+
+
+if __name__ == '__main__':
+    main()
@@ -1,6 +1,7 @@
 import os
 import sys
 
+import pytest
 from django.utils.version import get_version
 
 BASE_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
@@ -33,3 +34,30 @@ assert get_version() < '4.0.0', 'Пожалуйста, используйте в
 pytest_plugins = [
     'tests.fixtures.fixture_user',
 ]
+
+
+@pytest.fixture(autouse=True)
+def clear_cache(settings, tmp_path_factory):
+    # Файловый кеш ответов и кеш пользователей в памяти процесса
+    # пережили бы очистку БД между тестами.
+    from api.authentication import user_cache
+    settings.CACHES = {'default': {
+        **settings.CACHES['default'],
+        'LOCATION': str(tmp_path_factory.mktemp('cache')),
+    }}
+    user_cache.clear()
+
+
+@pytest.fixture(autouse=True)
+def eager_outbox(settings):
+    # Тесты регистрации ждут письмо в mail.outbox сразу после запроса,
+    # без отдельного запуска send_outbox.
+    settings.EMAIL_OUTBOX_EAGER = True
+
+
+@pytest.fixture(autouse=True)
+def throttle_store(settings, tmp_path_factory):
+    # Свежие корзины в каждом тесте: тесты регистрации шлют много
+    # запросов с одного адреса.
+    settings.THROTTLE_STORE_PATH = str(
+        tmp_path_factory.mktemp('throttle') / 'throttle.sqlite3')
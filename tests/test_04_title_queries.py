@@ -0,0 +1,54 @@
+import pytest
+
+from reviews.models import Category, Genre, Title
+
+
+@pytest.mark.django_db(transaction=True)
+class Test04TitleQueries:
+
+    TITLES_URL = '/api/v1/titles/'
+    TITLES_DETAIL_URL_TEMPLATE = '/api/v1/titles/{title_id}/'
+
+    @staticmethod
+    def create_titles(count):
+        genres = [
+            Genre.objects.create(name=f'Жанр {idx}', slug=f'genre-{idx}')
+            for idx in range(3)
+        ]
+        titles = []
+        for idx in range(count):
+            category = Category.objects.create(
+                name=f'Категория {idx}', slug=f'category-{idx}'
+            )
+            title = Title.objects.create(
+                name=f'Произведение {idx}',
+                year=2000 + idx,
+                category=category
+            )
+            title.genre.set(genres)
+            titles.append(title)
+        return titles
+
+    def test_01_titles_list_query_count(self, client,
+                                        django_assert_max_num_queries):
+        self.create_titles(5)
+        # COUNT(*) для пагинации, произведения с категориями, жанры.
+        with django_assert_max_num_queries(3):
+            response = client.get(self.TITLES_URL)
+        assert len(response.json()['results']) == 5, (
+            f'Проверьте, что GET-запрос к `{self.TITLES_URL}` возвращает '
+            'все произведения текущей страницы.'
+        )
+
+    def test_02_titles_detail_query_count(self, client,
+                                          django_assert_max_num_queries):
+        titles = self.create_titles(1)
+        with django_assert_max_num_queries(2):
+            response = client.get(
+                self.TITLES_DETAIL_URL_TEMPLATE.format(title_id=titles[0].id)
+            )
+        assert len(response.json()['genre']) == 3, (
+            'Проверьте, что ответ на GET-запрос к '
+            f'`{self.TITLES_DETAIL_URL_TEMPLATE}` содержит жанры '
+            'произведения.'
+        )
@@ -413,3 +413,53 @@ class Test05ReviewAPI:
             f'Проверьте, что PUT-запрос к `{self.REVIEW_DETAIL_URL_TEMPLATE} '
             'не предусмотрен и возвращает статус 405.'
         )
+
+    def test_07_rating_follows_review_changes(self, admin_client, admin,
+                                              user_client, user,
+                                              moderator_client, moderator):
+        author_map = {
+            admin: admin_client,
+            user: user_client,
+            moderator: moderator_client
+        }
+        reviews, titles = create_reviews(admin_client, author_map)
+        title_url = self.TITLE_DETAIL_URL_TEMPLATE.format(
+            title_id=titles[0]['id']
+        )
+        assert_msg = (
+            'Проверьте, что рейтинг произведения в ответе на GET-запрос к '
+            f'`{self.TITLE_DETAIL_URL_TEMPLATE}` пересчитывается после '
+            '{action} отзыва.'
+        )
+
+        user_client.patch(
+            self.REVIEW_DETAIL_URL_TEMPLATE.format(
+                title_id=titles[0]['id'], review_id=reviews[1]['id']
+            ),
+            data={'score': 10}
+        )
+        response = admin_client.get(title_url)
+        assert response.json().get('rating') == 6, (
+            assert_msg.format(action='изменения')
+        )
+
+        admin_client.delete(
+            self.REVIEW_DETAIL_URL_TEMPLATE.format(
+                title_id=titles[0]['id'], review_id=reviews[2]['id']
+            )
+        )
+        response = admin_client.get(title_url)
+        assert response.json().get('rating') == 7, (
+            assert_msg.format(action='удаления')
+        )
+
+        for review in reviews[:2]:
+            admin_client.delete(
+                self.REVIEW_DETAIL_URL_TEMPLATE.format(
+                    title_id=titles[0]['id'], review_id=review['id']
+                )
+            )
+        response = admin_client.get(title_url)
+        assert response.json().get('rating') is None, (
+            assert_msg.format(action='удаления')
+        )
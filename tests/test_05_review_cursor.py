@@ -0,0 +1,107 @@
+from http import HTTPStatus
+
+import pytest
+
+from reviews.models import Comment, Review, Title
+
+
+@pytest.mark.django_db(transaction=True)
+class Test05ReviewCursorPagination:
+
+    REVIEWS_URL_TEMPLATE = '/api/v1/titles/{title_id}/reviews/'
+    COMMENTS_URL_TEMPLATE = (
+        '/api/v1/titles/{title_id}/reviews/{review_id}/comments/'
+    )
+
+    @staticmethod
+    def create_reviews(django_user_model, title, count, start=0):
+        return [
+            Review.objects.create(
+                title=title,
+                author=django_user_model.objects.create_user(
+                    username=f'author{idx}', email=f'author{idx}@yamdb.fake'
+                ),
+                text=f'review {idx}',
+                score=5
+            )
+            for idx in range(start, start + count)
+        ]
+
+    @staticmethod
+    def collect_pages(client, url):
+        ids = []
+        while url:
+            data = client.get(url).json()
+            assert 'count' not in data, (
+                'Проверьте, что при пагинации курсором ответ не содержит '
+                'ключ `count`.'
+            )
+            ids.extend(item['id'] for item in data['results'])
+            url = data['next']
+        return ids
+
+    def test_01_reviews_cursor_walks_all_pages(self, client,
+                                               django_user_model):
+        title = Title.objects.create(name='Произведение', year=2000)
+        reviews = self.create_reviews(django_user_model, title, 12)
+        url = self.REVIEWS_URL_TEMPLATE.format(title_id=title.id)
+
+        ids = self.collect_pages(client, f'{url}?pagination=cursor')
+        assert ids == [review.id for review in reversed(reviews)], (
+            f'Проверьте, что пагинация курсором на `{url}` возвращает все '
+            'отзывы по одному разу в порядке убывания `pub_date`.'
+        )
+
+    def test_02_reviews_cursor_stable_on_insert(self, client,
+                                                django_user_model):
+        title = Title.objects.create(name='Произведение', year=2000)
+        reviews = self.create_reviews(django_user_model, title, 8)
+        url = self.REVIEWS_URL_TEMPLATE.format(title_id=title.id)
+
+        first_page = client.get(f'{url}?pagination=cursor').json()
+        self.create_reviews(django_user_model, title, 3, start=8)
+        ids = [item['id'] for item in first_page['results']]
+        ids.extend(self.collect_pages(client, first_page['next']))
+        assert ids == [review.id for review in reversed(reviews)], (
+            'Проверьте, что новые отзывы не сдвигают уже выданные страницы '
+            'при пагинации курсором.'
+        )
+
+        previous = client.get(first_page['next']).json()['previous']
+        data = client.get(previous).json()
+        assert [item['id'] for item in data['results']] == (
+            [item['id'] for item in first_page['results']]
+        ), (
+            'Проверьте, что ссылка `previous` при пагинации курсором '
+            'возвращает предыдущую страницу.'
+        )
+
+    def test_03_comments_cursor(self, client, django_user_model):
+        title = Title.objects.create(name='Произведение', year=2000)
+        review = self.create_reviews(django_user_model, title, 1)[0]
+        comments = [
+            Comment.objects.create(
+                review=review, author=review.author, text=f'comment {idx}'
+            )
+            for idx in range(7)
+        ]
+        url = self.COMMENTS_URL_TEMPLATE.format(
+            title_id=title.id, review_id=review.id
+        )
+
+        ids = self.collect_pages(client, f'{url}?pagination=cursor')
+        assert ids == [comment.id for comment in reversed(comments)], (
+            f'Проверьте, что пагинация курсором на `{url}` возвращает все '
+            'комментарии по одному разу в порядке убывания `pub_date`.'
+        )
+
+    def test_04_invalid_cursor(self, client):
+        title = Title.objects.create(name='Произведение', year=2000)
+        response = client.get(
+            self.REVIEWS_URL_TEMPLATE.format(title_id=title.id)
+            + '?cursor=broken'
+        )
+        assert response.status_code == HTTPStatus.NOT_FOUND, (
+            'Проверьте, что некорректный курсор возвращает ответ со '
+            'статусом 404.'
+        )
@@ -0,0 +1,62 @@
+import pytest
+
+from reviews.models import Comment, Review, Title
+
+
+@pytest.mark.django_db(transaction=True)
+class Test05ReviewCommentQueries:
+
+    REVIEWS_URL_TEMPLATE = '/api/v1/titles/{title_id}/reviews/'
+    COMMENTS_URL_TEMPLATE = (
+        '/api/v1/titles/{title_id}/reviews/{review_id}/comments/'
+    )
+
+    @staticmethod
+    def create_authors(django_user_model, count):
+        return [
+            django_user_model.objects.create_user(
+                username=f'author{idx}', email=f'author{idx}@yamdb.fake'
+            )
+            for idx in range(count)
+        ]
+
+    def test_01_reviews_list_query_count(self, client, django_user_model,
+                                         django_assert_max_num_queries):
+        title = Title.objects.create(name='Произведение', year=2000)
+        for idx, author in enumerate(
+                self.create_authors(django_user_model, 5)):
+            Review.objects.create(
+                title=title, author=author, text=f'review {idx}', score=5
+            )
+        # Произведение, COUNT(*) для пагинации, отзывы с авторами.
+        with django_assert_max_num_queries(3):
+            response = client.get(
+                self.REVIEWS_URL_TEMPLATE.format(title_id=title.id)
+            )
+        assert len(response.json()['results']) == 5, (
+            f'Проверьте, что GET-запрос к `{self.REVIEWS_URL_TEMPLATE}` '
+            'возвращает все отзывы текущей страницы.'
+        )
+
+    def test_02_comments_list_query_count(self, client, django_user_model,
+                                          django_assert_max_num_queries):
+        authors = self.create_authors(django_user_model, 5)
+        title = Title.objects.create(name='Произведение', year=2000)
+        review = Review.objects.create(
+            title=title, author=authors[0], text='review', score=5
+        )
+        for idx, author in enumerate(authors):
+            Comment.objects.create(
+                review=review, author=author, text=f'comment {idx}'
+            )
+        # Отзыв, COUNT(*) для пагинации, комментарии с авторами.
+        with django_assert_max_num_queries(3):
+            response = client.get(
+                self.COMMENTS_URL_TEMPLATE.format(
+                    title_id=title.id, review_id=review.id
+                )
+            )
+        assert len(response.json()['results']) == 5, (
+            f'Проверьте, что GET-запрос к `{self.COMMENTS_URL_TEMPLATE}` '
+            'возвращает все комментарии текущей страницы.'
+        )
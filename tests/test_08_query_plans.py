@@ -0,0 +1,139 @@
+import re
+
+import pytest
+from django.db import connection
+from django.test.utils import CaptureQueriesContext
+
+from reviews.models import Category, Comment, Genre, Review, Title
+
+pytestmark = pytest.mark.skipif(
+    connection.vendor != 'sqlite',
+    reason='Планы запросов проверяются для SQLite.'
+)
+
+HOT_TABLES = (
+    'reviews_title', 'reviews_title_genre', 'reviews_review',
+    'reviews_comment',
+)
+
+
+def get_plan(sql):
+    with connection.cursor() as cursor:
+        cursor.execute(f'EXPLAIN QUERY PLAN {sql}')
+        return '\n'.join(row[-1] for row in cursor.fetchall())
+
+
+def assert_queries_use_indexes(client, url):
+    with CaptureQueriesContext(connection) as context:
+        response = client.get(url)
+    assert response.status_code == 200, (
+        f'Проверьте, что GET-запрос к `{url}` возвращает ответ со статусом '
+        '200.'
+    )
+    for query in context.captured_queries:
+        plan = get_plan(query['sql'])
+        for table in HOT_TABLES:
+            assert not re.search(rf'\bSCAN {table}\b(?! USING)', plan), (
+                f'Проверьте, что запрос к `{url}` использует индекс, а не '
+                f'полный просмотр таблицы `{table}`.\n'
+                f'{query["sql"]}\n{plan}'
+            )
+        # Сортировка без индекса опасна там, где из неё берётся страница.
+        paged = ' LIMIT ' in query['sql']
+        assert not paged or 'TEMP B-TREE' not in plan, (
+            f'Проверьте, что запрос к `{url}` получает порядок сортировки '
+            f'из индекса, а не сортирует строки отдельно.\n'
+            f'{query["sql"]}\n{plan}'
+        )
+
+
+@pytest.mark.django_db
+class Test08QueryPlans:
+
+    @pytest.fixture
+    def dataset(self, django_user_model):
+        categories = [
+            Category.objects.create(name=f'Категория {idx}', slug=f'c{idx}')
+            for idx in range(5)
+        ]
+        genres = [
+            Genre.objects.create(name=f'Жанр {idx}', slug=f'g{idx}')
+            for idx in range(8)
+        ]
+        Title.objects.bulk_create(
+            Title(
+                name=f'Произведение {idx}',
+                year=1900 + idx % 100,
+                category=categories[idx % len(categories)]
+            )
+            for idx in range(2000)
+        )
+        title_ids = list(Title.objects.values_list('id', flat=True))
+        Title.genre.through.objects.bulk_create(
+            Title.genre.through(
+                title_id=title_id,
+                genre_id=genres[(title_id + shift) % len(genres)].id
+            )
+            for title_id in title_ids for shift in range(2)
+        )
+        django_user_model.objects.bulk_create(
+            django_user_model(
+                username=f'author{idx}', email=f'author{idx}@yamdb.fake'
+            )
+            for idx in range(20)
+        )
+        author_ids = list(
+            django_user_model.objects.values_list('id', flat=True)
+        )
+        Review.objects.bulk_create(
+            Review(
+                title_id=title_id, author_id=author_id, text='review',
+                score=5
+            )
+            for title_id in title_ids[:100] for author_id in author_ids
+        )
+        review_ids = list(Review.objects.values_list('id', flat=True))
+        Comment.objects.bulk_create(
+            Comment(
+                review_id=review_ids[idx % 100],
+                author_id=author_ids[idx % len(author_ids)],
+                text='comment'
+            )
+            for idx in range(2000)
+        )
+        with connection.cursor() as cursor:
+            cursor.execute('ANALYZE')
+        return title_ids[0], review_ids[0]
+
+    @pytest.mark.parametrize('query', (
+        '', '?name=Произведение 7', '?year=1950', '?category=c1',
+        '?genre=g2', '?page=3',
+    ))
+    def test_01_titles_list(self, client, dataset, query):
+        assert_queries_use_indexes(client, f'/api/v1/titles/{query}')
+
+    def test_02_titles_detail(self, client, dataset):
+        title_id, _ = dataset
+        assert_queries_use_indexes(client, f'/api/v1/titles/{title_id}/')
+
+    @pytest.mark.parametrize('query', ('', '?page=2', '?pagination=cursor'))
+    def test_03_reviews_list(self, client, dataset, query):
+        title_id, _ = dataset
+        assert_queries_use_indexes(
+            client, f'/api/v1/titles/{title_id}/reviews/{query}'
+        )
+
+    @pytest.mark.parametrize('query', ('', '?page=2', '?pagination=cursor'))
+    def test_04_comments_list(self, client, dataset, query):
+        title_id, review_id = dataset
+        assert_queries_use_indexes(
+            client,
+            f'/api/v1/titles/{title_id}/reviews/{review_id}/comments/{query}'
+        )
+
+    def test_05_reviews_cursor_next_page(self, client, dataset):
+        title_id, _ = dataset
+        response = client.get(
+            f'/api/v1/titles/{title_id}/reviews/?pagination=cursor'
+        )
+        assert_queries_use_indexes(client, response.json()['next'])
@@ -0,0 +1,281 @@
+import gzip
+import json
+import os
+import shutil
+from csv import DictReader, DictWriter
+from datetime import timedelta
+from io import StringIO
+
+import pytest
+from django.core.management import call_command
+from django.core.management.base import CommandError
+from django.db.models import F, Max, Min
+from django.utils.dateparse import parse_datetime
+
+from csv_import.chunks import parse_chunk, split_csv
+from csv_import.tables import TABLES, get_load_order
+from reviews.models import Comment, Genre, Review, Title
+from tests.conftest import MANAGE_PATH
+
+DATA_PATH = os.path.join(MANAGE_PATH, 'static', 'data')
+
+
+def count_rows_in(path, filename):
+    with open(os.path.join(path, filename), encoding='utf-8-sig') as f:
+        return sum(1 for _ in DictReader(f))
+
+
+def count_rows(filename):
+    return count_rows_in(DATA_PATH, filename)
+
+
+@pytest.mark.django_db(transaction=True)
+class Test09CsvImport:
+
+    @pytest.mark.parametrize('options', (
+        {'batch_size': 7},
+        {'batch_size': 7, 'workers': 2, 'chunk_size': 512},
+    ))
+    def test_01_import_in_small_batches(self, django_user_model, options):
+        call_command('csv_import', path=DATA_PATH, **options)
+
+        for model, filename in (
+                (Title, 'titles.csv'),
+                (Title.genre.through, 'genre_title.csv'),
+                (Genre, 'genre.csv'),
+                (django_user_model, 'users.csv'),
+                (Review, 'review.csv'),
+                (Comment, 'comments.csv')):
+            assert model.objects.count() == count_rows(filename), (
+                'Проверьте, что `csv_import` загружает все строки файла '
+                f'`{filename}` при любом значении `--batch-size`.'
+            )
+
+        title = Title.objects.filter(score_count__gt=0).first()
+        scores = list(title.reviews.values_list('score', flat=True))
+        assert title.rating == sum(scores) // len(scores), (
+            'Проверьте, что после загрузки отзывов `csv_import` '
+            'пересчитывает рейтинг произведений.'
+        )
+
+    @pytest.mark.parametrize('option', ('batch_size', 'workers', 'chunk_size'))
+    def test_02_invalid_sizes(self, option):
+        with pytest.raises(CommandError):
+            call_command('csv_import', path=DATA_PATH, **{option: 0})
+
+    def test_03_chunks_split_on_record_boundaries(self):
+        filepath = os.path.join(DATA_PATH, 'review.csv')
+        with open(filepath, encoding='utf-8-sig') as f:
+            expected = [row['id'] for row in DictReader(f)]
+
+        fieldnames, chunks = split_csv(filepath, 300)
+        assert len(chunks) > 1
+        ids = [
+            str(values[0])
+            for start, end in chunks
+            for values in parse_chunk(
+                'review', filepath, fieldnames, start, end
+            )
+        ]
+        assert ids == expected, (
+            'Проверьте, что `split_csv` делит файл только по границам '
+            'записей, в том числе с многострочными полями.'
+        )
+
+    def test_04_dependencies_loaded_first(self):
+        order = get_load_order()
+        for name, table in TABLES.items():
+            for field in table.model._meta.concrete_fields:
+                if field.is_relation and field.related_model in {
+                        other.model for other in TABLES.values()}:
+                    required = next(
+                        other for other, spec in TABLES.items()
+                        if spec.model is field.related_model
+                    )
+                    assert order.index(required) < order.index(name)
+
+    def test_05_upsert_writes_only_changes(self, tmp_path):
+        call_command('csv_import', path=DATA_PATH)
+        for filename in os.listdir(DATA_PATH):
+            shutil.copy(os.path.join(DATA_PATH, filename), tmp_path)
+
+        review_path = tmp_path / 'review.csv'
+        with open(review_path, encoding='utf-8-sig') as f:
+            reader = DictReader(f)
+            fieldnames = reader.fieldnames
+            rows = list(reader)
+        changed = rows[0]
+        changed['score'] = '1' if changed['score'] != '1' else '2'
+        taken = {
+            (row['title_id'], row['author'])
+            for row in rows if row['title_id'] == changed['title_id']
+        }
+        author = next(
+            row['author'] for row in rows
+            if (changed['title_id'], row['author']) not in taken
+        )
+        added = dict(
+            changed, id=str(max(int(row['id']) for row in rows) + 1),
+            author=author, score='10', text='новый отзыв'
+        )
+        rows.append(added)
+        with open(review_path, 'w', encoding='utf-8', newline='') as f:
+            writer = DictWriter(f, fieldnames=fieldnames)
+            writer.writeheader()
+            writer.writerows(rows)
+
+        out = StringIO()
+        call_command('csv_import', path=str(tmp_path), upsert=True,
+                     batch_size=10, stdout=out)
+
+        assert 'Данные по отзывам: добавлено строк 1, обновлено 1' in (
+            out.getvalue()), (
+            'Проверьте, что `csv_import --upsert` не перезаписывает '
+            'неизменившиеся строки.'
+        )
+        assert Review.objects.count() == len(rows), (
+            'Проверьте, что `csv_import --upsert` добавляет новые отзывы.'
+        )
+        assert Review.objects.get(pk=changed['id']).score == int(
+            changed['score']), (
+            'Проверьте, что `csv_import --upsert` обновляет изменившиеся '
+            'отзывы.'
+        )
+        title = Title.objects.get(pk=changed['title_id'])
+        scores = list(title.reviews.values_list('score', flat=True))
+        assert title.rating == sum(scores) // len(scores), (
+            'Проверьте, что `csv_import --upsert` пересчитывает рейтинг '
+            'произведений с изменившимися отзывами.'
+        )
+
+    def test_06_export_round_trip(self, tmp_path):
+        call_command('csv_import', path=DATA_PATH)
+        call_command('csv_export', path=str(tmp_path), chunk_size=10)
+
+        for name, table in TABLES.items():
+            with open(os.path.join(DATA_PATH, table.filename),
+                      encoding='utf-8-sig') as f:
+                expected = list(DictReader(f))
+            with open(tmp_path / table.filename, encoding='utf-8-sig') as f:
+                exported = list(DictReader(f))
+            columns = [
+                column for column in table.columns.values()
+                if column in expected[0]
+            ]
+            assert [
+                [row[column] for column in columns] for row in exported
+            ] == [
+                [row[column] for column in columns]
+                for row in sorted(expected, key=lambda row: int(row['id']))
+            ], (
+                'Проверьте, что `csv_export` пишет файл `{}` в формате, '
+                'который читает `csv_import`.'.format(table.filename)
+            )
+
+        reviews_before = list(Review.objects.order_by('id').values_list(
+            'id', 'title_id', 'author_id', 'text', 'score', 'pub_date'))
+        Review.objects.all().delete()
+        call_command('csv_import', path=str(tmp_path), upsert=True)
+        assert list(Review.objects.order_by('id').values_list(
+            'id', 'title_id', 'author_id', 'text', 'score', 'pub_date')
+        ) == reviews_before, (
+            'Проверьте, что выгрузка `csv_export` загружается обратно '
+            'через `csv_import` без потерь.'
+        )
+
+    def test_07_export_ndjson_gzip(self, tmp_path):
+        call_command('csv_import', path=DATA_PATH)
+        call_command('csv_export', path=str(tmp_path), format='ndjson',
+                     gzip=True, tables=['review'])
+
+        with gzip.open(tmp_path / 'review.ndjson.gz', 'rt',
+                       encoding='utf-8') as f:
+            rows = [json.loads(line) for line in f]
+        assert len(rows) == Review.objects.count()
+        review = Review.objects.get(pk=rows[0]['id'])
+        assert rows[0]['text'] == review.text
+        assert rows[0]['author'] == review.author_id
+
+    @pytest.mark.parametrize('options', (
+        {'format': 'csv', 'gzip': True},
+        {'format': 'ndjson'},
+        {'format': 'ndjson', 'gzip': True},
+    ))
+    def test_08_dump_round_trip(self, tmp_path, options):
+        call_command('csv_import', path=DATA_PATH)
+        call_command('csv_export', path=str(tmp_path), **options)
+        titles_before = list(Title.objects.order_by('id').values_list(
+            'id', 'name', 'year', 'category_id', 'description', 'score_sum'))
+        comments_before = list(Comment.objects.order_by('id').values_list(
+            'id', 'review_id', 'author_id', 'text', 'pub_date'))
+
+        Title.objects.all().delete()
+        call_command('csv_import', path=str(tmp_path), workers=2,
+                     chunk_size=512)
+        assert list(Title.objects.order_by('id').values_list(
+            'id', 'name', 'year', 'category_id', 'description', 'score_sum')
+        ) == titles_before, (
+            'Проверьте, что `csv_import` загружает выгрузки `csv_export` '
+            'в ndjson и со сжатием gzip.'
+        )
+        assert list(Comment.objects.order_by('id').values_list(
+            'id', 'review_id', 'author_id', 'text', 'pub_date')
+        ) == comments_before
+
+        Comment.objects.filter(pk=comments_before[0][0]).update(text='Новый')
+        call_command('csv_import', path=str(tmp_path), upsert=True)
+        assert Comment.objects.get(
+            pk=comments_before[0][0]).text == comments_before[0][3]
+
+    def test_09_generate_data_loads_with_csv_import(self, tmp_path):
+        options = {
+            'titles': 50, 'users': 20, 'reviews': 400, 'comments': 800,
+            'skew': 1.2, 'seed': 7,
+        }
+        call_command('generate_data', path=str(tmp_path), **options)
+
+        assert Review.objects.count() == 0
+        call_command('csv_import', path=str(tmp_path))
+        assert Title.objects.count() == 50
+        assert Review.objects.count() == count_rows_in(tmp_path, 'review.csv')
+        assert abs(Review.objects.count() - 400) <= 10, (
+            'Проверьте, что `generate_data` создаёт заданное число отзывов.'
+        )
+        assert Comment.objects.count() == count_rows_in(
+            tmp_path, 'comments.csv')
+        with open(tmp_path / 'review.csv', encoding='utf-8') as f:
+            row = next(DictReader(f))
+        assert Review.objects.get(pk=row['id']).pub_date == parse_datetime(
+            row['pub_date']), (
+            'Проверьте, что `csv_import` сохраняет pub_date из файла.'
+        )
+        most_reviewed = max(
+            Title.objects.values_list('score_count', flat=True))
+        assert most_reviewed == 20, (
+            'Проверьте, что при `--skew` у популярных произведений больше '
+            'отзывов, но не больше, чем пользователей.'
+        )
+
+        first = (tmp_path / 'review.csv').read_bytes()
+        call_command('generate_data', path=str(tmp_path), **options)
+        assert (tmp_path / 'review.csv').read_bytes() == first, (
+            'Проверьте, что `generate_data` с одинаковым `--seed` '
+            'генерирует одинаковые данные.'
+        )
+
+    def test_10_generate_data_load(self):
+        call_command('generate_data', load=True, titles=10, users=5,
+                     reviews=30, comments=30)
+        assert Title.objects.count() == 10
+        title = Title.objects.filter(score_count__gt=0).first()
+        assert title.score_count == title.reviews.count()
+        dates = Review.objects.aggregate(
+            first=Min('pub_date'), last=Max('pub_date'))
+        assert dates['last'] - dates['first'] > timedelta(days=365), (
+            'Проверьте, что `generate_data --load` сохраняет сгенерированные '
+            'даты отзывов, а не время загрузки.'
+        )
+        assert not Comment.objects.filter(
+            pub_date__lt=F('review__pub_date')).exists(), (
+            'Проверьте, что комментарий не старше своего отзыва.'
+        )
@@ -0,0 +1,191 @@
+from http import HTTPStatus
+
+import pytest
+from django.db import connection
+from django.test.utils import CaptureQueriesContext
+
+from api.authentication import get_access_token
+from api.metrics import MetricsRegistry, registry
+from reviews.models import Title
+
+
+@pytest.mark.django_db(transaction=True)
+class Test10RequestMetrics:
+
+    TITLES_URL = '/api/v1/titles/'
+    METRICS_URL = '/api/v1/internal/metrics/'
+
+    @pytest.fixture(autouse=True)
+    def clear_registry(self):
+        registry.clear()
+        yield
+        registry.clear()
+
+    def test_01_headers_on_request(self, client):
+        Title.objects.create(name='Произведение', year=2000)
+        response = client.get('/api/v1/categories/')
+        assert 'X-Query-Count' not in response, (
+            'Проверьте, что метрики не попадают в заголовки ответа, '
+            'если клиент их не запрашивал.'
+        )
+
+        with CaptureQueriesContext(connection) as queries:
+            response = client.get(
+                self.TITLES_URL, HTTP_X_REQUEST_METRICS='1'
+            )
+        assert response['X-Query-Count'] == str(len(queries)), (
+            'Проверьте, что заголовок X-Query-Count содержит число '
+            'SQL-запросов, выполненных при обработке запроса.'
+        )
+        timings = dict(
+            item.split(';dur=')
+            for item in response['Server-Timing'].split(', ')
+        )
+        assert set(timings) == {'db', 'serializer', 'total'}, (
+            'Проверьте, что заголовок Server-Timing содержит время БД, '
+            'сериализации и всего запроса.'
+        )
+        assert float(timings['serializer']) > 0, (
+            'Проверьте, что время сериализации учитывается для списков.'
+        )
+        assert float(timings['total']) >= float(timings['db']), (
+            'Проверьте, что время БД входит в общее время запроса.'
+        )
+
+    def test_02_histograms_by_route(self, client, admin_client):
+        title = Title.objects.create(name='Произведение', year=2000)
+        client.get(self.TITLES_URL)
+        client.get(self.TITLES_URL)
+        client.get(f'{self.TITLES_URL}{title.id}/')
+
+        response = admin_client.get(self.METRICS_URL)
+        assert response.status_code == HTTPStatus.OK, (
+            f'Проверьте, что GET-запрос администратора к `{self.METRICS_URL}` '
+            'возвращает статус 200.'
+        )
+        data = response.json()
+        assert data['title-list']['latency']['count'] == 2, (
+            'Проверьте, что метрики собираются по имени маршрута.'
+        )
+        assert data['title-detail']['queries']['buckets']['+Inf'] == 1, (
+            'Проверьте, что гистограммы накопительные и последняя корзина '
+            'равна числу запросов.'
+        )
+        assert set(data['title-list']) == {
+            'queries', 'db_time', 'serializer_time', 'latency'
+        }, (
+            'Проверьте, что для маршрута собираются число запросов к БД, '
+            'время БД, время сериализации и время ответа.'
+        )
+
+    def test_03_metrics_permissions(self, client, user_client):
+        response = client.get(self.METRICS_URL)
+        assert response.status_code == HTTPStatus.UNAUTHORIZED, (
+            f'Проверьте, что `{self.METRICS_URL}` недоступен анонимному '
+            'пользователю.'
+        )
+        response = user_client.get(self.METRICS_URL)
+        assert response.status_code == HTTPStatus.FORBIDDEN, (
+            f'Проверьте, что `{self.METRICS_URL}` доступен только '
+            'администратору.'
+        )
+
+
+@pytest.mark.django_db(transaction=True)
+class Test10PrometheusMetrics:
+
+    TITLES_URL = '/api/v1/titles/'
+    METRICS_URL = '/metrics'
+
+    @pytest.fixture(autouse=True)
+    def clear_registry(self):
+        registry.clear()
+        yield
+        registry.clear()
+
+    def get_metrics(self, client, **kwargs):
+        response = client.get(self.METRICS_URL, **kwargs)
+        assert response.status_code == HTTPStatus.OK, (
+            f'Проверьте, что `{self.METRICS_URL}` возвращает статус 200.'
+        )
+        return response.content.decode()
+
+    def test_01_exposition_format(self, client):
+        client.get(self.TITLES_URL)
+        client.get('/api/v1/users/')
+        response = client.get(self.METRICS_URL)
+        assert response['Content-Type'].startswith('text/plain'), (
+            f'Проверьте, что `{self.METRICS_URL}` отдаёт текстовый формат '
+            'Prometheus.'
+        )
+        text = response.content.decode()
+        for line in (
+            '# TYPE api_request_duration_seconds histogram',
+            'api_requests_total{method="GET",route="title-list",'
+            'status="200"} 1',
+            'api_request_duration_seconds_bucket{method="GET",'
+            'route="title-list",le="+Inf"} 1',
+            'api_db_queries_count{method="GET",route="title-list"} 1',
+            'api_auth_failures_total{reason="unauthenticated"} 1',
+        ):
+            assert line in text.splitlines(), (
+                f'Проверьте, что `{self.METRICS_URL}` содержит строку '
+                f'`{line}`.'
+            )
+
+    def test_02_multiple_processes(self, client, settings, tmp_path):
+        settings.PROMETHEUS_MULTIPROC_DIR = str(tmp_path)
+        other_process = MetricsRegistry()
+        other_process.inc(
+            'api_requests_total',
+            route='title-list', method='GET', status='200'
+        )
+        other_process.flush()
+
+        client.get(self.TITLES_URL)
+        text = self.get_metrics(client)
+        assert (
+            'api_requests_total{method="GET",route="title-list",'
+            'status="200"} 2'
+        ) in text.splitlines(), (
+            'Проверьте, что /metrics складывает значения всех процессов '
+            'из PROMETHEUS_MULTIPROC_DIR.'
+        )
+
+    def test_03_token(self, client, settings):
+        settings.PROMETHEUS_METRICS_TOKEN = 'secret'
+        response = client.get(self.METRICS_URL)
+        assert response.status_code == HTTPStatus.UNAUTHORIZED, (
+            'Проверьте, что при заданном PROMETHEUS_METRICS_TOKEN '
+            f'`{self.METRICS_URL}` без токена возвращает статус 401.'
+        )
+        self.get_metrics(client, HTTP_AUTHORIZATION='Bearer secret')
+
+    def test_04_each_failure_counted_once(self, client, settings, admin):
+        settings.REST_FRAMEWORK = {
+            **settings.REST_FRAMEWORK,
+            'DEFAULT_THROTTLE_RATES': {'auth_ip': '1/min'},
+        }
+        token = get_access_token(admin)
+        admin.role = 'user'
+        admin.save()
+        assert client.get(
+            '/api/v1/users/', HTTP_AUTHORIZATION=f'Bearer {token}'
+        ).status_code == HTTPStatus.UNAUTHORIZED
+        for _ in range(2):
+            response = client.post('/api/v1/auth/token/', data={
+                'username': 'nobody', 'confirmation_code': 'code'})
+        assert response.status_code == HTTPStatus.TOO_MANY_REQUESTS
+
+        lines = [
+            line for line in self.get_metrics(client).splitlines()
+            if line.startswith(('api_auth_failures_total{',
+                                'api_throttled_total{'))
+        ]
+        assert lines == [
+            'api_auth_failures_total{reason="unauthenticated"} 1',
+            'api_throttled_total{scope="auth_ip"} 1',
+        ], (
+            'Проверьте, что каждый отказ считается один раз, а '
+            'ограничение частоты - отдельной метрикой.'
+        )
@@ -0,0 +1,119 @@
+import os
+import subprocess
+import sys
+from http import HTTPStatus
+
+import pytest
+from django.core.management import call_command
+from django.db import connection
+from django.test.utils import CaptureQueriesContext
+
+from reviews.models import Category, Genre, Review, Title
+from tests.conftest import MANAGE_PATH
+
+DATA_PATH = os.path.join(MANAGE_PATH, 'static', 'data')
+
+
+@pytest.mark.django_db(transaction=True)
+class Test11ResponseCache:
+
+    TITLES_URL = '/api/v1/titles/'
+    CATEGORIES_URL = '/api/v1/categories/'
+
+    def test_01_anonymous_get_cached(self, client,
+                                     django_assert_num_queries):
+        Title.objects.create(name='Произведение', year=2000)
+        first = client.get(self.TITLES_URL + '?year=2000&name=Про')
+        with django_assert_num_queries(0):
+            second = client.get(self.TITLES_URL + '?name=Про&year=2000')
+        assert second.status_code == HTTPStatus.OK
+        assert second.json() == first.json(), (
+            'Проверьте, что повторный анонимный GET-запрос с теми же '
+            'параметрами в любом порядке отдаётся из кеша.'
+        )
+        assert second['Content-Type'] == first['Content-Type']
+
+    def test_02_authenticated_not_cached(self, user_client):
+        user_client.get(self.CATEGORIES_URL)
+        with CaptureQueriesContext(connection) as queries:
+            user_client.get(self.CATEGORIES_URL)
+        assert len(queries), (
+            'Проверьте, что ответы авторизованным пользователям не '
+            'кешируются.'
+        )
+
+    def test_03_write_invalidates(self, client, admin_client, user_client):
+        category = Category.objects.create(name='Фильм', slug='film')
+        genre = Genre.objects.create(name='Драма', slug='drama')
+        title = Title.objects.create(
+            name='Произведение', year=2000, category=category)
+        title.genre.add(genre)
+        detail_url = f'{self.TITLES_URL}{title.id}/'
+        client.get(self.TITLES_URL)
+        client.get(detail_url)
+        client.get(self.CATEGORIES_URL)
+
+        admin_client.post(self.TITLES_URL, data={
+            'name': 'Новое', 'year': 2001, 'category': 'film',
+            'genre': ['drama']
+        })
+        assert client.get(self.TITLES_URL).json()['count'] == 2, (
+            'Проверьте, что создание произведения сбрасывает кеш списка.'
+        )
+
+        user_client.post(
+            f'{detail_url}reviews/', data={'text': 'Отзыв', 'score': 7})
+        assert client.get(detail_url).json()['rating'] == 7, (
+            'Проверьте, что новый отзыв сбрасывает кеш произведения.'
+        )
+        review = Review.objects.get()
+        review.score = 3
+        review.save()
+        assert client.get(detail_url).json()['rating'] == 3
+
+        category.name = 'Кино'
+        category.save()
+        assert client.get(detail_url).json()['category']['name'] == 'Кино', (
+            'Проверьте, что изменение категории сбрасывает кеш произведений.'
+        )
+        assert client.get(self.CATEGORIES_URL).json()['results'][0][
+            'name'] == 'Кино'
+
+        title.genre.remove(genre)
+        assert client.get(detail_url).json()['genre'] == [], (
+            'Проверьте, что изменение жанров сбрасывает кеш произведения.'
+        )
+
+    def test_04_bulk_load_invalidates(self, client):
+        assert client.get(self.TITLES_URL).json()['count'] == 0
+        call_command('generate_data', load=True, titles=3, users=2,
+                     reviews=0, comments=0)
+        assert client.get(self.TITLES_URL).json()['count'] == 3, (
+            'Проверьте, что загрузка данных командой сбрасывает кеш.'
+        )
+        call_command('csv_import', path=DATA_PATH, upsert=True)
+        assert (client.get(self.TITLES_URL).json()['count']
+                == Title.objects.count()), (
+            'Проверьте, что csv_import сбрасывает кеш.'
+        )
+
+    def test_05_invalidation_from_other_process(self, client, settings):
+        Category.objects.create(name='Фильм', slug='film')
+        etag = client.get(self.CATEGORIES_URL)['ETag']
+        # Команды manage.py и другие процессы сервера меняют версии в
+        # том же кеше.
+        subprocess.run(
+            [sys.executable, '-c',
+             'import django; django.setup(); '
+             'from api.cache import bump; bump("category")'],
+            cwd=MANAGE_PATH, check=True,
+            env={**os.environ,
+                 'DJANGO_SETTINGS_MODULE': 'api_yamdb.settings',
+                 'CACHE_LOCATION': settings.CACHES['default']['LOCATION']}
+        )
+        assert client.get(
+            self.CATEGORIES_URL, HTTP_IF_NONE_MATCH=etag
+        ).status_code == HTTPStatus.OK, (
+            'Проверьте, что кеш по умолчанию общий для процессов: '
+            'сброс в другом процессе виден серверу.'
+        )
@@ -0,0 +1,194 @@
+import time
+from http import HTTPStatus
+
+import pytest
+from django.utils.http import parse_http_date
+
+from reviews.models import Comment, Review, Title
+
+
+@pytest.mark.django_db(transaction=True)
+class Test12ConditionalGet:
+
+    TITLES_URL = '/api/v1/titles/'
+    REVIEWS_URL_TEMPLATE = '/api/v1/titles/{title_id}/reviews/'
+    COMMENTS_URL_TEMPLATE = (
+        '/api/v1/titles/{title_id}/reviews/{review_id}/comments/'
+    )
+
+    @pytest.fixture(autouse=True)
+    def clock(self, monkeypatch):
+        # Часы для версий: по умолчанию каждое обращение - следующая
+        # секунда, поэтому у ответов всегда есть Last-Modified.
+        clock = {'now': time.time_ns() - 100 * 10 ** 9, 'step': 10 ** 9}
+
+        def time_ns():
+            clock['now'] += clock['step']
+            return clock['now']
+        monkeypatch.setattr('api.cache.time_ns', time_ns)
+        return clock
+
+    @pytest.fixture
+    def review(self, admin):
+        title = Title.objects.create(name='Произведение', year=2000)
+        return Review.objects.create(
+            title=title, author=admin, text='Отзыв', score=5)
+
+    def get_etag(self, client, url):
+        response = client.get(url)
+        assert response.status_code == HTTPStatus.OK
+        assert response.has_header('ETag'), (
+            f'Проверьте, что ответ на GET-запрос к `{url}` содержит ETag.'
+        )
+        assert response.has_header('Last-Modified'), (
+            f'Проверьте, что ответ на GET-запрос к `{url}` содержит '
+            'Last-Modified.'
+        )
+        return response['ETag']
+
+    def test_01_unchanged_reviews_not_modified(self, client, review,
+                                               django_assert_num_queries):
+        url = self.REVIEWS_URL_TEMPLATE.format(title_id=review.title_id)
+        etag = self.get_etag(client, url)
+        with django_assert_num_queries(0):
+            response = client.get(url, HTTP_IF_NONE_MATCH=etag)
+        assert response.status_code == HTTPStatus.NOT_MODIFIED, (
+            'Проверьте, что GET-запрос с совпадающим If-None-Match '
+            'возвращает статус 304 без запросов к БД.'
+        )
+        assert response['ETag'] == etag
+        assert not response.content
+
+        response = client.get(
+            url + '?pagination=cursor', HTTP_IF_NONE_MATCH=etag)
+        assert response.status_code != HTTPStatus.NOT_MODIFIED, (
+            'Проверьте, что ETag зависит от параметров запроса.'
+        )
+
+    def test_02_review_changes_etag(self, client, user_client, review):
+        url = self.REVIEWS_URL_TEMPLATE.format(title_id=review.title_id)
+        detail_url = f'{url}{review.id}/'
+        list_etag = self.get_etag(client, url)
+        detail_etag = self.get_etag(client, detail_url)
+
+        review.text = 'Исправленный отзыв'
+        review.save()
+        assert client.get(
+            detail_url, HTTP_IF_NONE_MATCH=detail_etag
+        ).status_code == HTTPStatus.OK, (
+            'Проверьте, что правка отзыва меняет его ETag.'
+        )
+        list_etag = self.get_etag(client, url)
+
+        user_client.post(url, data={'text': 'Новый', 'score': 9})
+        response = client.get(url, HTTP_IF_NONE_MATCH=list_etag)
+        assert response.status_code == HTTPStatus.OK, (
+            'Проверьте, что новый отзыв меняет ETag списка отзывов.'
+        )
+        assert response.json()['count'] == 2
+
+        title_url = f'{self.TITLES_URL}{review.title_id}/'
+        title_etag = self.get_etag(client, title_url)
+        Review.objects.get(text='Новый').delete()
+        assert client.get(
+            title_url, HTTP_IF_NONE_MATCH=title_etag
+        ).status_code == HTTPStatus.OK, (
+            'Проверьте, что удаление отзыва меняет ETag произведения: '
+            'меняется рейтинг.'
+        )
+
+    def test_03_comments_and_authors(self, client, review, admin):
+        url = self.COMMENTS_URL_TEMPLATE.format(
+            title_id=review.title_id, review_id=review.id)
+        etag = self.get_etag(client, url)
+        comment = Comment.objects.create(
+            review=review, author=admin, text='Комментарий')
+        assert client.get(
+            url, HTTP_IF_NONE_MATCH=etag
+        ).status_code == HTTPStatus.OK, (
+            'Проверьте, что новый комментарий меняет ETag списка.'
+        )
+
+        etag = self.get_etag(client, url)
+        admin.username = 'RenamedAdmin'
+        admin.save()
+        response = client.get(url, HTTP_IF_NONE_MATCH=etag)
+        assert response.status_code == HTTPStatus.OK, (
+            'Проверьте, что смена имени автора меняет ETag: имя автора '
+            'есть в ответе.'
+        )
+        assert response.json()['results'][0]['author'] == 'RenamedAdmin'
+
+        etag = self.get_etag(client, url)
+        comment.delete()
+        assert client.get(
+            url, HTTP_IF_NONE_MATCH=etag
+        ).status_code == HTTPStatus.OK
+
+    def test_04_titles_if_modified_since(self, client, user_client):
+        title = Title.objects.create(name='Произведение', year=2000)
+        url = f'{self.TITLES_URL}{title.id}/'
+        response = client.get(url)
+        for request_client in (client, user_client):
+            response = request_client.get(
+                url, HTTP_IF_MODIFIED_SINCE=response['Last-Modified'])
+            assert response.status_code == HTTPStatus.NOT_MODIFIED, (
+                'Проверьте, что GET-запрос с If-Modified-Since не раньше '
+                'Last-Modified возвращает статус 304.'
+            )
+
+        etag = self.get_etag(client, self.TITLES_URL)
+        response = client.get(self.TITLES_URL, HTTP_IF_NONE_MATCH=etag)
+        assert response.status_code == HTTPStatus.NOT_MODIFIED, (
+            'Проверьте, что ответ из кеша тоже учитывает If-None-Match.'
+        )
+
+    def test_05_deleted_parent_changes_etag(self, client, review, admin):
+        comments_url = self.COMMENTS_URL_TEMPLATE.format(
+            title_id=review.title_id, review_id=review.id)
+        comments_etag = self.get_etag(client, comments_url)
+        Review.objects.filter(pk=review.pk).delete()
+        assert client.get(
+            comments_url, HTTP_IF_NONE_MATCH=comments_etag
+        ).status_code == HTTPStatus.NOT_FOUND, (
+            'Проверьте, что после удаления отзыва список его комментариев '
+            'не отвечает 304.'
+        )
+
+        title = Title.objects.create(name='Без отзывов', year=2000)
+        url = self.REVIEWS_URL_TEMPLATE.format(title_id=title.id)
+        etag = self.get_etag(client, url)
+        title.delete()
+        assert client.get(
+            url, HTTP_IF_NONE_MATCH=etag
+        ).status_code == HTTPStatus.NOT_FOUND, (
+            'Проверьте, что после удаления произведения без отзывов '
+            'список отзывов не отвечает 304.'
+        )
+
+    def test_06_change_within_second(self, client, clock):
+        clock['step'] = 0
+        title = Title.objects.create(name='Произведение', year=2000)
+        url = f'{self.TITLES_URL}{title.id}/'
+        assert not client.get(url).has_header('Last-Modified'), (
+            'Проверьте, что ответ без Last-Modified, пока не прошла '
+            'секунда последнего изменения.'
+        )
+        clock['now'] += 10 ** 9
+        last_modified = client.get(url)['Last-Modified']
+
+        title.name = 'Новое название'
+        title.save()
+        response = client.get(url, HTTP_IF_MODIFIED_SINCE=last_modified)
+        assert response.status_code == HTTPStatus.OK, (
+            'Проверьте, что изменение в ту же секунду не даёт 304 на '
+            'If-Modified-Since.'
+        )
+        assert response.json()['name'] == 'Новое название'
+
+        clock['now'] += 10 ** 9
+        response = client.get(url, HTTP_IF_MODIFIED_SINCE=last_modified)
+        assert response.status_code == HTTPStatus.OK
+        assert parse_http_date(response['Last-Modified']) <= time.time(), (
+            'Проверьте, что Last-Modified не опережает часы.'
+        )
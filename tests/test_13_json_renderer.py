@@ -0,0 +1,85 @@
+import datetime
+import decimal
+import io
+import uuid
+from collections import OrderedDict
+
+import pytest
+from django.utils import timezone
+from django.utils.translation import gettext_lazy
+from rest_framework.exceptions import ParseError
+from rest_framework.parsers import JSONParser
+from rest_framework.renderers import JSONRenderer
+
+from api import renderers
+from api.parsers import FastJSONParser
+from api.renderers import FastJSONRenderer
+
+MOSCOW = datetime.timezone(datetime.timedelta(hours=3))
+
+DATA = OrderedDict([
+    ('name', 'Властелин колец'),
+    ('slug', 'книги'),
+    ('pub_date', datetime.datetime(2022, 1, 2, 3, 4, 5, 123456,
+                                   tzinfo=datetime.timezone.utc)),
+    ('local', datetime.datetime(2022, 1, 2, 3, 4, 5, tzinfo=MOSCOW)),
+    ('naive', datetime.datetime(2022, 1, 2, 3, 4, 5)),
+    ('now', timezone.now()),
+    ('date', datetime.date(2022, 1, 2)),
+    ('time', datetime.time(3, 4, 5, 6)),
+    ('duration', datetime.timedelta(days=1, seconds=5)),
+    ('decimal', decimal.Decimal('1.50')),
+    ('uuid', uuid.UUID('12345678-1234-5678-1234-567812345678')),
+    ('lazy', gettext_lazy('Недопустимое имя')),
+    ('separators', 'a b c'),
+    ('quotes', 'ёлка "в" \\ кавычках\n\t'),
+    ('numbers', [0, -1, 2 ** 62, 0.5, True, False, None]),
+    ('results', [{'id': idx, 'genre': ['драма', 'комедия']}
+                 for idx in range(3)]),
+    (1, 'ключ-число'),
+])
+
+
+class Test13JSONRenderer:
+
+    def test_01_output_matches_json_renderer(self):
+        expected = JSONRenderer().render(DATA)
+        assert FastJSONRenderer().render(DATA) == expected, (
+            'Проверьте, что FastJSONRenderer выдаёт те же байты, что и '
+            'JSONRenderer, для дат, кириллицы и спецсимволов.'
+        )
+
+    @pytest.mark.parametrize('media_type,context', (
+        ('application/json; indent=4', {}),
+        ('application/json', {'indent': 2}),
+        (None, None),
+    ))
+    def test_02_indent_matches(self, media_type, context):
+        assert FastJSONRenderer().render(
+            DATA, media_type, context
+        ) == JSONRenderer().render(DATA, media_type, context)
+
+    def test_03_fallback_without_orjson(self, monkeypatch):
+        monkeypatch.setattr(renderers, 'orjson', None)
+        assert FastJSONRenderer().render(DATA) == JSONRenderer().render(DATA)
+        assert FastJSONRenderer().render(None) == b''
+
+    def test_04_unsupported_values_fall_back(self):
+        data = {'big': 2 ** 70}
+        assert FastJSONRenderer().render(data) == JSONRenderer().render(data)
+
+    def test_05_parser(self):
+        body = JSONRenderer().render({'name': 'Властелин колец', 'n': [1.5]})
+        for parser in (FastJSONParser(), JSONParser()):
+            assert parser.parse(io.BytesIO(body)) == {
+                'name': 'Властелин колец', 'n': [1.5]
+            }
+        for bad_body in (b'{"a": NaN}', b'{"a": ', 'ы'.encode('cp1251')):
+            with pytest.raises(ParseError):
+                FastJSONParser().parse(io.BytesIO(bad_body))
+
+    def test_06_parser_other_encoding(self):
+        body = '{"name": "Властелин"}'.encode('cp1251')
+        assert FastJSONParser().parse(
+            io.BytesIO(body), parser_context={'encoding': 'cp1251'}
+        ) == {'name': 'Властелин'}
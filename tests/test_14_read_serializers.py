@@ -0,0 +1,68 @@
+import pytest
+from rest_framework.renderers import JSONRenderer
+
+from api.serializers import (
+    CommentReadSerializer,
+    CommentSerializer,
+    ReviewReadSerializer,
+    ReviewSerializer,
+    TitleReadSerializer,
+    TitleSerializerGet
+)
+from api.views import TitleViewSet
+from reviews.models import Category, Comment, Genre, Review, Title
+
+
+@pytest.mark.django_db(transaction=True)
+class Test14ReadSerializers:
+
+    def assert_same_output(self, fast_class, full_class, instances):
+        render = JSONRenderer().render
+        assert render(fast_class(instances, many=True).data) == render(
+            full_class(instances, many=True).data
+        ), (
+            f'Проверьте, что `{fast_class.__name__}` выдаёт тот же JSON, '
+            f'что `{full_class.__name__}`.'
+        )
+        for instance in instances:
+            assert render(fast_class(instance).data) == render(
+                full_class(instance).data
+            )
+
+    def test_01_titles(self, admin):
+        category = Category.objects.create(name='Фильм', slug='film')
+        genres = [
+            Genre.objects.create(name=f'Жанр «{idx}»', slug=f'genre-{idx}')
+            for idx in range(3)
+        ]
+        with_all = Title.objects.create(
+            name='Властелин колец', year=1954, category=category,
+            description='Описание с разделителем'
+        )
+        with_all.genre.set(genres)
+        Title.objects.create(name='Без категории', year=2000,
+                             description=None)
+        Review.objects.create(title=with_all, author=admin, text='Отзыв',
+                              score=7)
+        self.assert_same_output(
+            TitleReadSerializer, TitleSerializerGet,
+            list(TitleViewSet.queryset)
+        )
+
+    def test_02_reviews_and_comments(self, admin, user):
+        title = Title.objects.create(name='Произведение', year=2000)
+        reviews = [
+            Review.objects.create(title=title, author=author,
+                                  text='Отзыв', score=score)
+            for author, score in ((admin, 1), (user, 10))
+        ]
+        Comment.objects.create(review=reviews[0], author=user,
+                               text='Комментарий')
+        self.assert_same_output(
+            ReviewReadSerializer, ReviewSerializer,
+            list(title.reviews.select_related('author'))
+        )
+        self.assert_same_output(
+            CommentReadSerializer, CommentSerializer,
+            list(Comment.objects.select_related('author'))
+        )
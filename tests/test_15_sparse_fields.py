@@ -0,0 +1,112 @@
+from http import HTTPStatus
+
+import pytest
+from django.db import connection
+from django.test.utils import CaptureQueriesContext
+
+from reviews.models import Category, Comment, Genre, Review, Title
+
+
+@pytest.mark.django_db(transaction=True)
+class Test15SparseFields:
+
+    TITLES_URL = '/api/v1/titles/'
+    REVIEWS_URL_TEMPLATE = '/api/v1/titles/{title_id}/reviews/'
+    COMMENTS_URL_TEMPLATE = (
+        '/api/v1/titles/{title_id}/reviews/{review_id}/comments/'
+    )
+    USERS_URL = '/api/v1/users/'
+
+    @pytest.fixture
+    def titles(self, admin):
+        category = Category.objects.create(name='Фильм', slug='film')
+        genre = Genre.objects.create(name='Драма', slug='drama')
+        titles = []
+        for idx in range(3):
+            title = Title.objects.create(
+                name=f'Произведение {idx}', year=2000 + idx,
+                category=category, description='Длинное описание'
+            )
+            title.genre.add(genre)
+            Review.objects.create(
+                title=title, author=admin, text='Отзыв', score=idx + 1)
+            titles.append(title)
+        return titles
+
+    def get(self, client, url):
+        with CaptureQueriesContext(connection) as queries:
+            response = client.get(url)
+        assert response.status_code == HTTPStatus.OK, (
+            f'Проверьте, что GET-запрос к `{url}` возвращает статус 200.'
+        )
+        return response.json(), [query['sql'] for query in queries]
+
+    def test_01_titles_fields(self, client, titles):
+        data, queries = self.get(
+            client, self.TITLES_URL + '?fields=id,name,rating')
+        assert data['results'][0] == {
+            'id': titles[0].id, 'name': 'Произведение 0', 'rating': 1
+        }, (
+            'Проверьте, что `?fields=` оставляет в ответе только '
+            'перечисленные поля в обычном порядке.'
+        )
+        # COUNT(*) и сами произведения: без подгрузки жанров и категорий.
+        assert len(queries) == 2, (
+            'Проверьте, что без полей genre и category не выполняются '
+            'запросы жанров и не подтягивается категория.'
+        )
+        assert 'description' not in queries[-1]
+        assert 'reviews_category' not in queries[-1]
+
+    def test_02_titles_omit(self, client, titles):
+        full, _ = self.get(client, f'{self.TITLES_URL}{titles[0].id}/')
+        data, queries = self.get(
+            client, f'{self.TITLES_URL}{titles[0].id}/?omit=description')
+        del full['description']
+        assert data == full, (
+            'Проверьте, что `?omit=` убирает из ответа только указанные '
+            'поля.'
+        )
+        assert 'description' not in queries[0]
+
+        data, _ = self.get(
+            client, self.TITLES_URL + '?fields=genre,category&omit=genre')
+        assert set(data['results'][0]) == {'category'}
+
+    def test_03_unknown_field(self, client, titles):
+        response = client.get(self.TITLES_URL + '?fields=id,secret')
+        assert response.status_code == HTTPStatus.BAD_REQUEST, (
+            'Проверьте, что неизвестное поле в `?fields=` приводит к '
+            'ответу со статусом 400.'
+        )
+        assert 'secret' in response.json()['fields']
+
+    def test_04_reviews_and_comments(self, client, titles, admin):
+        title = titles[0]
+        review = title.reviews.get()
+        Comment.objects.create(review=review, author=admin, text='Текст')
+        url = self.REVIEWS_URL_TEMPLATE.format(title_id=title.id)
+        for query in ('?fields=id,author', '?fields=id,author&'
+                      'pagination=cursor'):
+            data, queries = self.get(client, url + query)
+            assert data['results'] == [
+                {'id': review.id, 'author': admin.username}
+            ]
+            assert all('"text"' not in sql for sql in queries), (
+                'Проверьте, что ненужные колонки отзывов не читаются.'
+            )
+        data, _ = self.get(
+            client,
+            self.COMMENTS_URL_TEMPLATE.format(
+                title_id=title.id, review_id=review.id
+            ) + '?omit=text,pub_date'
+        )
+        assert set(data['results'][0]) == {'id', 'author'}
+
+    def test_05_users(self, admin_client, admin):
+        data, _ = self.get(admin_client, self.USERS_URL + '?fields=username')
+        assert data['results'] == [{'username': admin.username}], (
+            f'Проверьте, что `{self.USERS_URL}` поддерживает `?fields=`.'
+        )
+        data, _ = self.get(admin_client, self.USERS_URL + 'me/?omit=bio')
+        assert 'bio' not in data and data['username'] == admin.username
@@ -0,0 +1,100 @@
+from http import HTTPStatus
+
+import pytest
+from django.conf import settings
+from django.db import connection
+from django.test.utils import CaptureQueriesContext
+
+from reviews.models import Category, Review, Title
+
+
+@pytest.mark.django_db(transaction=True)
+class Test16Pagination:
+
+    TITLES_URL = '/api/v1/titles/'
+    CATEGORIES_URL = '/api/v1/categories/'
+    REVIEWS_URL_TEMPLATE = '/api/v1/titles/{title_id}/reviews/'
+
+    @pytest.fixture
+    def titles(self):
+        return [
+            Title.objects.create(name=f'Произведение {idx}', year=2000 + idx)
+            for idx in range(7)
+        ]
+
+    def get(self, client, url):
+        with CaptureQueriesContext(connection) as queries:
+            response = client.get(url)
+        assert response.status_code == HTTPStatus.OK, (
+            f'Проверьте, что GET-запрос к `{url}` возвращает статус 200.'
+        )
+        return response.json(), [query['sql'] for query in queries]
+
+    def test_01_page_size(self, client, titles):
+        data, _ = self.get(client, self.TITLES_URL + '?page_size=3')
+        assert data['count'] == 7 and len(data['results']) == 3, (
+            'Проверьте, что `?page_size=` задаёт размер страницы.'
+        )
+        assert 'page_size=3' in data['next']
+
+        data, _ = self.get(client, self.TITLES_URL + '?page_size=abc')
+        assert len(data['results']) == 5, (
+            'Проверьте, что при некорректном `?page_size=` используется '
+            'размер страницы по умолчанию.'
+        )
+
+    def test_02_max_page_size(self, client):
+        Category.objects.bulk_create(
+            Category(name=f'Категория {idx}', slug=f'category-{idx}')
+            for idx in range(settings.MAX_PAGE_SIZE + 1)
+        )
+        data, _ = self.get(client, self.CATEGORIES_URL + '?page_size=100000')
+        assert len(data['results']) == settings.MAX_PAGE_SIZE, (
+            'Проверьте, что размер страницы не превышает MAX_PAGE_SIZE.'
+        )
+
+    def test_03_without_count(self, client, titles):
+        data, queries = self.get(
+            client, self.TITLES_URL + '?count=false&page_size=3')
+        assert data['count'] is None, (
+            'Проверьте, что с `?count=false` в ответе count равен null.'
+        )
+        assert [title['id'] for title in data['results']] == [
+            title.id for title in titles[:3]
+        ]
+        assert data['previous'] is None
+        assert all('COUNT(' not in sql.upper() for sql in queries), (
+            'Проверьте, что с `?count=false` не выполняется COUNT(*).'
+        )
+
+        data, _ = self.get(client, data['next'])
+        assert [title['id'] for title in data['results']] == [
+            title.id for title in titles[3:6]
+        ]
+        assert 'page=' not in data['previous'], (
+            'Проверьте, что ссылка на первую страницу не содержит `page`.'
+        )
+
+        data, _ = self.get(client, data['next'])
+        assert len(data['results']) == 1 and data['next'] is None, (
+            'Проверьте, что на последней странице next равен null.'
+        )
+        assert 'page=2' in data['previous']
+
+    @pytest.mark.parametrize('page', ('0', 'last', '10'))
+    def test_04_without_count_invalid_page(self, client, titles, page):
+        response = client.get(f'{self.TITLES_URL}?count=false&page={page}')
+        assert response.status_code == HTTPStatus.NOT_FOUND, (
+            'Проверьте, что несуществующая страница с `?count=false` '
+            'возвращает статус 404.'
+        )
+
+    def test_05_cursor_page_size(self, client, titles, admin, user):
+        for author in (admin, user):
+            Review.objects.create(
+                title=titles[0], author=author, text='Отзыв', score=5)
+        url = self.REVIEWS_URL_TEMPLATE.format(title_id=titles[0].id)
+        data, _ = self.get(client, url + '?pagination=cursor&page_size=1')
+        assert len(data['results']) == 1 and data['next'], (
+            'Проверьте, что курсорная пагинация учитывает `?page_size=`.'
+        )
@@ -0,0 +1,105 @@
+from http import HTTPStatus
+
+import pytest
+from django.core.management import call_command
+from django.db import connection
+
+from reviews.models import Title
+from reviews.search import TRIGGERS_SQL
+
+
+@pytest.mark.django_db(transaction=True)
+class Test17TitleSearch:
+
+    TITLES_URL = '/api/v1/titles/'
+
+    @pytest.fixture
+    def titles(self):
+        return {
+            key: Title.objects.create(name=name, year=2000,
+                                      description=description)
+            for key, name, description in (
+                ('in_name', 'Ёжик в тумане', 'Мультфильм'),
+                ('in_description', 'Сказка', 'Про ежика и медвежонка'),
+                ('other', 'Война и мир', 'Роман-эпопея'),
+            )
+        }
+
+    def search(self, client, query):
+        response = client.get(self.TITLES_URL, {'search': query})
+        assert response.status_code == HTTPStatus.OK, (
+            'Проверьте, что GET-запрос с `?search=` возвращает статус 200.'
+        )
+        return [title['name'] for title in response.json()['results']]
+
+    def test_01_ranked_search(self, client, titles):
+        assert self.search(client, 'ежик') == [
+            'Ёжик в тумане', 'Сказка'
+        ], (
+            'Проверьте, что `?search=` ищет по названию и описанию без '
+            'учёта регистра и буквы ё, а совпадения в названии идут первыми.'
+        )
+        assert self.search(client, 'медвеж') == ['Сказка'], (
+            'Проверьте, что слова запроса ищутся как префиксы.'
+        )
+        assert self.search(client, 'ежик туман') == ['Ёжик в тумане'], (
+            'Проверьте, что найденные произведения содержат все слова.'
+        )
+
+    @pytest.mark.parametrize('query', ('"', 'NEAR(', '* OR', '!!!'))
+    def test_02_query_syntax_is_escaped(self, client, titles, query):
+        assert self.search(client, query + ' мир') in (
+            ['Война и мир'], []
+        ), (
+            'Проверьте, что спецсимволы в `?search=` не ломают запрос.'
+        )
+
+    def test_03_index_follows_changes(self, client, titles):
+        title = titles['other']
+        title.description = 'Про ежика'
+        title.save()
+        assert 'Война и мир' in self.search(client, 'ежик'), (
+            'Проверьте, что поиск видит изменённое описание.'
+        )
+        Title.objects.filter(pk=title.pk).update(name='Анна Каренина')
+        assert self.search(client, 'каренина') == ['Анна Каренина']
+        Title.objects.bulk_create([Title(name='Ежевика', year=2001)])
+        assert 'Ежевика' in self.search(client, 'еже')
+        title.delete()
+        assert self.search(client, 'каренина') == [], (
+            'Проверьте, что удалённое произведение пропадает из поиска.'
+        )
+
+    def test_04_combined_with_filters(self, client, titles):
+        Title.objects.create(name='Ёжик', year=1975)
+        response = client.get(
+            self.TITLES_URL, {'search': 'ёжик', 'year': 1975})
+        assert [title['name'] for title in response.json()['results']] == [
+            'Ёжик'
+        ]
+
+    def test_05_triggers_restored_after_migrate(self, client, titles):
+        triggers = set(TRIGGERS_SQL)
+        assert self.get_triggers() == triggers, (
+            'Проверьте, что после migrate есть все триггеры индекса.'
+        )
+        # Так выглядит пересоздание таблицы при AddField на SQLite.
+        with connection.cursor() as cursor:
+            for name in triggers:
+                cursor.execute(f'DROP TRIGGER {name}')
+        Title.objects.filter(pk=titles['other'].pk).update(name='Ёлка')
+        call_command('migrate', verbosity=0)
+        assert self.get_triggers() == triggers, (
+            'Проверьте, что migrate восстанавливает пропавшие триггеры.'
+        )
+        assert self.search(client, 'елка') == ['Ёлка'], (
+            'Проверьте, что индекс догоняет изменения, сделанные без '
+            'триггеров.'
+        )
+
+    def get_triggers(self):
+        with connection.cursor() as cursor:
+            cursor.execute(
+                "SELECT name FROM sqlite_master WHERE type = 'trigger' "
+                "AND tbl_name = 'reviews_title'")
+            return {name for name, in cursor.fetchall()}
@@ -0,0 +1,114 @@
+import io
+import smtplib
+from datetime import timedelta
+from http import HTTPStatus
+
+import pytest
+from django.core import mail
+from django.core.mail.backends import locmem
+from django.core.management import call_command
+from django.utils import timezone
+
+from outbox.mail import deliver, send_mail_later
+from outbox.models import OutboxMessage
+
+
+class FlakyBackend(locmem.EmailBackend):
+    """Не принимает письма на адреса, где есть fail."""
+
+    def send_messages(self, messages):
+        for message in messages:
+            if any('fail' in address for address in message.to):
+                raise smtplib.SMTPRecipientsRefused(message.to)
+        return super().send_messages(messages)
+
+
+@pytest.mark.django_db(transaction=True)
+class Test18EmailOutbox:
+
+    URL_SIGNUP = '/api/v1/auth/signup/'
+
+    @pytest.fixture(autouse=True)
+    def queued(self, settings, tmp_path):
+        settings.EMAIL_OUTBOX_EAGER = False
+        settings.EMAIL_BACKEND = (
+            'django.core.mail.backends.filebased.EmailBackend')
+        settings.EMAIL_FILE_PATH = tmp_path
+        return tmp_path
+
+    def test_01_signup_queues_message(self, client, queued):
+        data = {'email': 'valid@yamdb.fake', 'username': 'valid_username'}
+        response = client.post(self.URL_SIGNUP, data=data)
+        assert response.status_code == HTTPStatus.OK
+        message = OutboxMessage.objects.get()
+        assert message.recipients == [data['email']], (
+            'Проверьте, что регистрация кладёт письмо в очередь outbox.'
+        )
+        assert not list(queued.iterdir()), (
+            'Проверьте, что регистрация не отправляет письмо сама.'
+        )
+
+        call_command('send_outbox', once=True, stdout=io.StringIO())
+        files = list(queued.iterdir())
+        assert len(files) == 1, (
+            'Проверьте, что send_outbox отправляет письма из очереди.'
+        )
+        code = message.body.split('confirmation_code:\n')[1].strip()
+        assert code in files[0].read_text(), (
+            'Проверьте, что в письме есть код подтверждения.'
+        )
+        message.refresh_from_db()
+        assert message.status == OutboxMessage.Status.Sent
+        assert message.sent_at is not None
+
+    def test_02_invalid_signup_queues_nothing(self, client):
+        client.post(self.URL_SIGNUP, data={'email': 'invalid'})
+        assert not OutboxMessage.objects.exists()
+
+    def test_03_batch_uses_one_connection(self, queued):
+        for idx in range(5):
+            send_mail_later('Тема', 'Текст', None, [f'user{idx}@yamdb.fake'])
+        assert deliver(batch_size=3) == (3, 0)
+        assert deliver(batch_size=3) == (2, 0)
+        assert deliver(batch_size=3) == (0, 0)
+        assert len(list(queued.iterdir())) == 2, (
+            'Проверьте, что пачка писем уходит через одно соединение.'
+        )
+
+    def test_04_retry_with_backoff(self, settings):
+        settings.EMAIL_BACKEND = f'{__name__}.FlakyBackend'
+        settings.EMAIL_OUTBOX_MAX_ATTEMPTS = 2
+        mail.outbox = []
+        good = send_mail_later('Тема', 'Текст', None, ['ok@yamdb.fake'])
+        bad = send_mail_later('Тема', 'Текст', None, ['fail@yamdb.fake'])
+
+        before = timezone.now()
+        assert deliver() == (1, 1), (
+            'Проверьте, что ошибка одного письма не мешает остальным.'
+        )
+        assert [message.to for message in mail.outbox] == [good.recipients]
+        bad.refresh_from_db()
+        assert bad.status == OutboxMessage.Status.Pending
+        assert bad.attempts == 1 and 'SMTPRecipientsRefused' in bad.last_error
+        assert bad.send_after >= before + timedelta(
+            seconds=settings.EMAIL_OUTBOX_RETRY_DELAY), (
+            'Проверьте, что неудачное письмо откладывается.'
+        )
+        assert deliver() == (0, 0)
+
+        OutboxMessage.objects.filter(pk=bad.pk).update(
+            send_after=timezone.now())
+        assert deliver() == (0, 1)
+        bad.refresh_from_db()
+        assert bad.status == OutboxMessage.Status.Failed, (
+            'Проверьте, что после EMAIL_OUTBOX_MAX_ATTEMPTS попыток письмо '
+            'больше не отправляется.'
+        )
+
+    def test_05_eager_mode(self, settings):
+        settings.EMAIL_BACKEND = 'django.core.mail.backends.locmem.EmailBackend'
+        settings.EMAIL_OUTBOX_EAGER = True
+        mail.outbox = []
+        send_mail_later('Тема', 'Текст', None, ['ok@yamdb.fake'])
+        assert len(mail.outbox) == 1
+        assert OutboxMessage.objects.get().status == OutboxMessage.Status.Sent
@@ -0,0 +1,124 @@
+import time
+from http import HTTPStatus
+
+import pytest
+from django.db import connection
+from django.test.utils import CaptureQueriesContext
+from rest_framework.test import APIClient
+
+from api.authentication import LOCAL_ACCESS_TIMEOUT
+from reviews.models import Title
+
+
+@pytest.mark.django_db(transaction=True)
+class Test19StatelessAuth:
+
+    URL_SIGNUP = '/api/v1/auth/signup/'
+    URL_TOKEN = '/api/v1/auth/token/'
+    URL_CATEGORIES = '/api/v1/categories/'
+    URL_USERS = '/api/v1/users/'
+
+    def token_client(self, client, user):
+        client.post(self.URL_SIGNUP,
+                    data={'username': user.username, 'email': user.email})
+        user.refresh_from_db()
+        response = client.post(self.URL_TOKEN, data={
+            'username': user.username,
+            'confirmation_code': user.confirmation_code,
+        })
+        assert response.status_code == HTTPStatus.OK
+        token_client = APIClient()
+        token_client.credentials(
+            HTTP_AUTHORIZATION=f'Bearer {response.json()["token"]}')
+        return token_client
+
+    def test_01_no_user_query(self, client, admin):
+        admin_client = self.token_client(client, admin)
+        admin_client.post(self.URL_CATEGORIES,
+                          data={'name': 'Фильм', 'slug': 'film'})
+        with CaptureQueriesContext(connection) as queries:
+            response = admin_client.post(
+                self.URL_CATEGORIES, data={'name': 'Книга', 'slug': 'book'})
+        assert response.status_code == HTTPStatus.CREATED
+        assert all('users_customuser' not in query['sql']
+                   for query in queries), (
+            'Проверьте, что запрос с JWT не читает пользователя из БД, '
+            'когда роли из токена достаточно.'
+        )
+
+    def test_02_full_user_when_needed(self, client, user):
+        user_client = self.token_client(client, user)
+        response = user_client.get(self.URL_USERS + 'me/')
+        assert response.status_code == HTTPStatus.OK
+        assert response.json()['email'] == user.email
+        assert response.json()['bio'] == 'user bio'
+
+        title = Title.objects.create(name='Произведение', year=2000)
+        response = user_client.post(
+            f'/api/v1/titles/{title.id}/reviews/',
+            data={'text': 'Отзыв', 'score': 5})
+        assert response.status_code == HTTPStatus.CREATED
+        assert response.json()['author'] == user.username
+
+    def test_03_role_change_revokes_token(self, client, admin):
+        admin_client = self.token_client(client, admin)
+        assert admin_client.get(self.URL_USERS).status_code == HTTPStatus.OK
+        admin.role = 'user'
+        admin.save()
+        assert admin_client.get(
+            self.URL_USERS
+        ).status_code == HTTPStatus.UNAUTHORIZED, (
+            'Проверьте, что после смены роли старый токен не действует.'
+        )
+        assert self.token_client(client, admin).get(
+            self.URL_USERS
+        ).status_code == HTTPStatus.FORBIDDEN
+
+    def test_04_role_change_in_other_process(self, client, admin, settings,
+                                             django_user_model, monkeypatch):
+        # Кеш в памяти процесса: сброс прав до других процессов не доходит.
+        settings.CACHES = {'default': {
+            'BACKEND': 'django.core.cache.backends.locmem.LocMemCache',
+        }}
+        admin_client = self.token_client(client, admin)
+        assert admin_client.get(self.URL_USERS).status_code == HTTPStatus.OK
+        # update() без сигналов: так выглядит смена роли в другом процессе,
+        # который сбросил только свой кеш в памяти.
+        django_user_model.objects.filter(pk=admin.pk).update(role='user')
+        now = time.time()
+        monkeypatch.setattr(
+            'django.core.cache.backends.locmem.time.time',
+            lambda: now + LOCAL_ACCESS_TIMEOUT + 1
+        )
+        assert admin_client.get(
+            self.URL_USERS
+        ).status_code == HTTPStatus.UNAUTHORIZED, (
+            'Проверьте, что смена роли в другом процессе отзывает токен '
+            'через несколько секунд.'
+        )
+
+    def test_05_inactive_user(self, client, user):
+        user_client = self.token_client(client, user)
+        user.is_active = False
+        user.save()
+        assert user_client.get(
+            self.URL_USERS + 'me/'
+        ).status_code == HTTPStatus.UNAUTHORIZED, (
+            'Проверьте, что токен заблокированного пользователя не действует.'
+        )
+
+    def test_06_object_permissions(self, client, user, moderator, admin):
+        title = Title.objects.create(name='Произведение', year=2000)
+        url = f'/api/v1/titles/{title.id}/reviews/'
+        review = admin.reviews.create(title=title, text='Отзыв', score=5)
+        assert self.token_client(client, user).delete(
+            f'{url}{review.id}/'
+        ).status_code == HTTPStatus.FORBIDDEN, (
+            'Проверьте, что пользователь из токена не может удалить чужой '
+            'отзыв.'
+        )
+        assert self.token_client(client, moderator).delete(
+            f'{url}{review.id}/'
+        ).status_code == HTTPStatus.NO_CONTENT, (
+            'Проверьте, что модератор из токена может удалить чужой отзыв.'
+        )
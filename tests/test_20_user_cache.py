@@ -0,0 +1,105 @@
+from http import HTTPStatus
+
+import pytest
+from django.core.cache import cache
+from django.db import connection
+from django.test.utils import CaptureQueriesContext
+
+from api.authentication import ACCESS_KEY, UserCache, user_cache
+
+
+class Test20UserCacheUnit:
+
+    def test_01_lru_and_ttl(self):
+        users = UserCache(maxsize=2)
+        users.set(1, {'id': 1})
+        users.set(2, {'id': 2})
+        assert users.get(1) == {'id': 1}
+        users.set(3, {'id': 3})
+        assert users.get(2) is None, (
+            'Проверьте, что при переполнении вытесняется давно не '
+            'использованная запись.'
+        )
+        assert users.get(1) and users.get(3)
+
+        expired = UserCache(ttl=-1)
+        expired.set(1, {'id': 1})
+        assert expired.get(1) is None, (
+            'Проверьте, что устаревшие записи не возвращаются.'
+        )
+
+
+@pytest.mark.django_db(transaction=True)
+class Test20UserCache:
+
+    URL_CATEGORIES = '/api/v1/categories/'
+    URL_USERS = '/api/v1/users/'
+
+    def test_02_hot_user_not_queried(self, admin_client, admin):
+        admin_client.post(self.URL_CATEGORIES,
+                          data={'name': 'Фильм', 'slug': 'film'})
+        assert user_cache.get(admin.pk) is not None
+        with CaptureQueriesContext(connection) as queries:
+            response = admin_client.post(
+                self.URL_CATEGORIES, data={'name': 'Книга', 'slug': 'book'})
+        assert response.status_code == HTTPStatus.CREATED
+        assert all('users_customuser' not in query['sql']
+                   for query in queries), (
+            'Проверьте, что повторный запрос того же пользователя не '
+            'читает таблицу пользователей.'
+        )
+
+    def test_03_role_change_through_api(self, admin_client, user_client,
+                                        user):
+        assert user_client.get(
+            self.URL_USERS).status_code == HTTPStatus.FORBIDDEN
+        admin_client.patch(f'{self.URL_USERS}{user.username}/',
+                           data={'role': 'admin'})
+        assert user_client.get(self.URL_USERS).status_code == HTTPStatus.OK, (
+            'Проверьте, что смена роли сбрасывает пользователя в кеше.'
+        )
+        admin_client.patch(f'{self.URL_USERS}{user.username}/',
+                           data={'role': 'user'})
+        assert user_client.get(
+            self.URL_USERS).status_code == HTTPStatus.FORBIDDEN
+
+        admin_client.delete(f'{self.URL_USERS}{user.username}/')
+        assert user_client.get(
+            self.URL_USERS + 'me/'
+        ).status_code == HTTPStatus.UNAUTHORIZED, (
+            'Проверьте, что удалённый пользователь не остаётся в кеше.'
+        )
+
+    def test_04_my_user_patch(self, user_client):
+        user_client.get(self.URL_USERS + 'me/')
+        user_client.patch(self.URL_USERS + 'me/', data={'bio': 'Новое'})
+        assert user_client.get(
+            self.URL_USERS + 'me/').json()['bio'] == 'Новое'
+
+    def test_05_change_in_other_process(self, user_client, user,
+                                        django_user_model):
+        assert user_client.get(
+            self.URL_USERS).status_code == HTTPStatus.FORBIDDEN
+        # Другой процесс меняет роль: до этого процесса доходит только
+        # сброс прав в общем кеше.
+        django_user_model.objects.filter(pk=user.pk).update(role='admin')
+        cache.delete(ACCESS_KEY.format(user.pk))
+        assert user_client.get(self.URL_USERS).status_code == HTTPStatus.OK, (
+            'Проверьте, что запись кеша с устаревшей ролью не используется.'
+        )
+
+    def test_06_patch_keeps_changes_from_other_process(
+            self, user_client, user, django_user_model):
+        user_client.get(self.URL_USERS + 'me/')
+        django_user_model.objects.filter(pk=user.pk).update(
+            email='changed@yamdb.fake', bio='Из другого процесса')
+        response = user_client.patch(
+            self.URL_USERS + 'me/', data={'first_name': 'X'})
+        assert response.status_code == HTTPStatus.OK
+        user.refresh_from_db()
+        assert (user.first_name, user.email, user.bio) == (
+            'X', 'changed@yamdb.fake', 'Из другого процесса'
+        ), (
+            'Проверьте, что PATCH `/users/me/` не перезаписывает поля '
+            'устаревшими значениями из кеша.'
+        )
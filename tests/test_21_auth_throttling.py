@@ -0,0 +1,98 @@
+from http import HTTPStatus
+
+import pytest
+from django.db import connection
+from django.test.utils import CaptureQueriesContext
+
+from api.throttling import BucketStore
+
+
+class Test21TokenBucket:
+
+    @pytest.fixture(autouse=True, params=('upsert', 'old_sqlite'))
+    def sqlite_version(self, request, monkeypatch):
+        # До SQLite 3.35 корзина обновляется без RETURNING.
+        if request.param == 'old_sqlite':
+            monkeypatch.setattr(
+                'api.throttling.sqlite3.sqlite_version_info', (3, 31, 1))
+
+    def test_01_bucket(self, tmp_path, monkeypatch):
+        now = [1000.0]
+        monkeypatch.setattr('api.throttling.time.time', lambda: now[0])
+        store = BucketStore(tmp_path / 'buckets.sqlite3')
+        assert [store.take('ip', 3, 1.0) for _ in range(3)] == [0, 0, 0], (
+            'Проверьте, что корзина пропускает запросы подряд до ёмкости.'
+        )
+        assert store.take('ip', 3, 1.0) == pytest.approx(1.0)
+        assert store.take('other', 3, 1.0) == 0, (
+            'Проверьте, что у каждого ключа своя корзина.'
+        )
+        now[0] += 0.5
+        assert store.take('ip', 3, 1.0) == pytest.approx(0.5)
+        now[0] += 0.5
+        assert store.take('ip', 3, 1.0) == 0, (
+            'Проверьте, что корзина пополняется со временем.'
+        )
+        now[0] += 100
+        assert [store.take('ip', 3, 1.0) for _ in range(4)][-1] > 0, (
+            'Проверьте, что корзина не копит больше своей ёмкости.'
+        )
+
+    def test_02_shared_between_connections(self, tmp_path):
+        path = tmp_path / 'buckets.sqlite3'
+        first, second = BucketStore(path), BucketStore(path)
+        assert first.take('ip', 1, 0.01) == 0
+        assert second.take('ip', 1, 0.01) > 0, (
+            'Проверьте, что состояние корзин общее для процессов.'
+        )
+
+
+@pytest.mark.django_db(transaction=True)
+class Test21AuthThrottling:
+
+    URL_SIGNUP = '/api/v1/auth/signup/'
+    URL_TOKEN = '/api/v1/auth/token/'
+
+    @pytest.fixture(autouse=True)
+    def rates(self, settings):
+        settings.REST_FRAMEWORK = {
+            **settings.REST_FRAMEWORK,
+            'DEFAULT_THROTTLE_RATES': {
+                'auth_ip': '4/min', 'auth_username': '2/min'
+            },
+        }
+
+    def test_03_signup_per_username(self, client):
+        data = {'username': 'valid_username', 'email': 'valid@yamdb.fake'}
+        for _ in range(2):
+            assert client.post(
+                self.URL_SIGNUP, data=data).status_code == HTTPStatus.OK
+        with CaptureQueriesContext(connection) as queries:
+            response = client.post(self.URL_SIGNUP, data=data)
+        assert response.status_code == HTTPStatus.TOO_MANY_REQUESTS, (
+            'Проверьте, что частые запросы с одним username получают '
+            'ответ со статусом 429.'
+        )
+        assert int(response['Retry-After']) > 0
+        assert not queries, (
+            'Проверьте, что ограниченный запрос не обращается к БД.'
+        )
+        assert client.post(self.URL_SIGNUP, data={
+            'username': 'other', 'email': 'other@yamdb.fake'
+        }).status_code == HTTPStatus.OK
+
+    def test_04_token_per_ip(self, client, user):
+        statuses = [
+            client.post(self.URL_TOKEN, data={
+                'username': f'user{idx}', 'confirmation_code': 'code'
+            }).status_code
+            for idx in range(5)
+        ]
+        assert statuses[:4] == [HTTPStatus.NOT_FOUND] * 4
+        assert statuses[4] == HTTPStatus.TOO_MANY_REQUESTS, (
+            f'Проверьте, что `{self.URL_TOKEN}` ограничен по IP-адресу.'
+        )
+        assert client.post(
+            self.URL_TOKEN, data={'username': user.username},
+            REMOTE_ADDR='10.0.0.2'
+        ).status_code == HTTPStatus.BAD_REQUEST
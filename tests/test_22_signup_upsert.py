@@ -0,0 +1,87 @@
+from http import HTTPStatus
+
+import pytest
+from django.db import connection
+from django.test.utils import CaptureQueriesContext
+
+from api.serializers import SignupSerializer
+from outbox.models import OutboxMessage
+
+
+@pytest.mark.django_db(transaction=True)
+class Test22SignupUpsert:
+
+    URL_SIGNUP = '/api/v1/auth/signup/'
+    DATA = {'username': 'valid_username', 'email': 'valid@yamdb.fake'}
+
+    @pytest.fixture(autouse=True)
+    def queued(self, settings):
+        settings.EMAIL_OUTBOX_EAGER = False
+
+    def signup(self, client, data):
+        with CaptureQueriesContext(connection) as queries:
+            response = client.post(self.URL_SIGNUP, data=data)
+        # BEGIN транзакции не считаем.
+        return response, len(
+            [query for query in queries if query['sql'] != 'BEGIN'])
+
+    def test_01_two_queries(self, client, django_user_model):
+        for attempt in range(2):
+            response, queries = self.signup(client, self.DATA)
+            assert response.status_code == HTTPStatus.OK
+            assert response.json() == self.DATA
+            assert queries == 2, (
+                'Проверьте, что регистрация выполняет два запроса: '
+                'запись пользователя и письма в очередь.'
+            )
+        user = django_user_model.objects.get()
+        codes = [message.body.split('confirmation_code:\n')[1].strip()
+                 for message in OutboxMessage.objects.all()]
+        assert len(set(codes)) == 2 and user.confirmation_code == codes[-1], (
+            'Проверьте, что повторная регистрация меняет код '
+            'подтверждения.'
+        )
+        assert user.role == 'user' and user.is_active
+        assert user.date_joined is not None and user.bio == ''
+
+    @pytest.mark.parametrize('data', (
+        {'username': 'valid_username', 'email': 'other@yamdb.fake'},
+        {'username': 'other', 'email': 'valid@yamdb.fake'},
+        {'username': 'valid_username', 'email': 'admin@yamdb.fake'},
+        {'username': 'me', 'email': 'valid@yamdb.fake'},
+        {'username': 'valid_username', 'email': 'invalid'},
+    ))
+    def test_02_same_errors(self, client, django_user_model, data):
+        self.signup(client, self.DATA)
+        django_user_model.objects.create(
+            username='admin', email='admin@yamdb.fake')
+        serializer = SignupSerializer(data=data)
+        assert not serializer.is_valid()
+        response, _ = self.signup(client, data)
+        assert response.status_code == HTTPStatus.BAD_REQUEST
+        assert response.json() == serializer.errors, (
+            'Проверьте, что ошибки регистрации совпадают с ошибками '
+            'SignupSerializer.'
+        )
+        assert OutboxMessage.objects.count() == 1
+        assert django_user_model.objects.count() == 2
+
+    def test_03_old_sqlite(self, client, django_user_model, monkeypatch):
+        monkeypatch.setattr(
+            connection.Database, 'sqlite_version_info', (3, 31, 1))
+        with CaptureQueriesContext(connection) as queries:
+            for attempt in range(2):
+                response = client.post(self.URL_SIGNUP, data=self.DATA)
+                assert response.status_code == HTTPStatus.OK, (
+                    'Проверьте, что регистрация работает на SQLite '
+                    'старше 3.35.'
+                )
+        assert all('ON CONFLICT' not in query['sql'] for query in queries)
+        user = django_user_model.objects.get()
+        assert user.confirmation_code == OutboxMessage.objects.latest(
+            'pk').body.split('confirmation_code:\n')[1].strip()
+
+        data = {'username': 'other', 'email': self.DATA['email']}
+        response = client.post(self.URL_SIGNUP, data=data)
+        assert response.status_code == HTTPStatus.BAD_REQUEST
+        assert django_user_model.objects.count() == 1